@@ -0,0 +1,149 @@
+"""
+Abuse detection for verifications
+
+Two patterns are caught before a lookup reaches the partner bot:
+  - enumeration: one Telegram account submitting more than
+    ABUSE_MAX_IDS_PER_USER different Quotex IDs within ABUSE_WINDOW_SECONDS;
+  - account sharing: one Quotex ID submitted from ABUSE_MAX_SUBMITTERS_PER_ID
+    other Telegram accounts within the window, or already verified on
+    ABUSE_MAX_ACCOUNTS_PER_ID other accounts (checked again right before a
+    link is handed out, since the lookup takes a while).
+
+Submissions are kept in per-account and per-ID sliding windows in memory.
+A window that is not in memory yet (after a restart, or once it went quiet)
+is seeded from verification_attempts through its (telegram_id,
+attempted_at) and (quotex_user_id, attempted_at) indexes, and verified
+accounts are counted through the users (quotex_user_id) index. Blocks are
+written to abuse_flags, at most once per window for each enumerating
+account and each account/ID pair, for /admin_abuse. Settings are read on
+each check, so they can be reloaded.
+"""
+
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+from database import Database
+from logging_setup import log_event
+from metrics import ABUSE_BLOCKS_TOTAL
+
+logger = logging.getLogger(__name__)
+
+ENUMERATION = 'enumeration'
+SHARED_ID = 'shared_id'
+ID_IN_USE = 'id_in_use'
+REASONS = (ENUMERATION, SHARED_ID, ID_IN_USE)
+
+# Submissions between full passes dropping windows that went quiet
+PRUNE_EVERY = 1000
+
+
+def _epoch(timestamp: str) -> float:
+    """SQLite CURRENT_TIMESTAMP text (UTC) as a Unix time"""
+    return datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc).timestamp()
+
+
+class AbuseDetector:
+    def __init__(self, db: Database, clock=time.time):
+        self.db = db
+        self.clock = clock
+        # telegram_id -> [(time, quotex_user_id)] and quotex_user_id -> [(time, telegram_id)],
+        # oldest first; lists rather than deques since windows hold a few entries
+        # and an empty deque alone costs ~600 bytes per account
+        self._by_user: Dict[int, List[Tuple[float, str]]] = {}
+        self._by_quotex_id: Dict[str, List[Tuple[float, int]]] = {}
+        # (reason, telegram_id, quotex_user_id or None) -> when it was last flagged
+        self._flagged: Dict[tuple, float] = {}
+        self._submissions = 0
+
+    def check(self, telegram_id: int, quotex_user_id: str) -> Optional[str]:
+        """Reason to refuse this submission (ENUMERATION, SHARED_ID or ID_IN_USE), or None"""
+        now = self.clock()
+        window = Config.ABUSE_WINDOW_SECONDS
+
+        if Config.ABUSE_MAX_IDS_PER_USER:
+            tried = {quotex_id for _, quotex_id in self._user_window(telegram_id, now, window)}
+            if quotex_user_id not in tried and len(tried) >= Config.ABUSE_MAX_IDS_PER_USER:
+                return self._block(ENUMERATION, telegram_id, quotex_user_id, now,
+                                   f"{len(tried)} Quotex IDs tried within {window}s")
+
+        if Config.ABUSE_MAX_SUBMITTERS_PER_ID:
+            accounts = {user for _, user in self._quotex_id_window(quotex_user_id, now, window)}
+            accounts.discard(telegram_id)
+            if len(accounts) >= Config.ABUSE_MAX_SUBMITTERS_PER_ID:
+                return self._block(SHARED_ID, telegram_id, quotex_user_id, now,
+                                   f"also submitted by {len(accounts)} other accounts within {window}s")
+
+        if self.id_in_use(telegram_id, quotex_user_id):
+            return ID_IN_USE
+        return None
+
+    def record(self, telegram_id: int, quotex_user_id: str):
+        """Count a submission that passed check() and goes to the partner bot"""
+        now = self.clock()
+        window = Config.ABUSE_WINDOW_SECONDS
+        self._user_window(telegram_id, now, window).append((now, quotex_user_id))
+        self._quotex_id_window(quotex_user_id, now, window).append((now, telegram_id))
+
+        self._submissions += 1
+        if self._submissions % PRUNE_EVERY == 0:
+            self.prune(now)
+
+    def id_in_use(self, telegram_id: int, quotex_user_id: str) -> bool:
+        """Whether the Quotex ID is already verified on as many other accounts as allowed"""
+        if not Config.ABUSE_MAX_ACCOUNTS_PER_ID:
+            return False
+        others = self.db.count_other_accounts(quotex_user_id, telegram_id)
+        if others < Config.ABUSE_MAX_ACCOUNTS_PER_ID:
+            return False
+        self._block(ID_IN_USE, telegram_id, quotex_user_id, self.clock(), f"verified on {others} other accounts")
+        return True
+
+    def prune(self, now: Optional[float] = None):
+        """Drop windows with nothing left in them, so memory tracks recent activity only"""
+        now = self.clock() if now is None else now
+        cutoff = now - Config.ABUSE_WINDOW_SECONDS
+        for windows in (self._by_user, self._by_quotex_id):
+            for key in [key for key, events in windows.items() if not events or events[-1][0] < cutoff]:
+                del windows[key]
+        self._flagged = {key: at for key, at in self._flagged.items() if at >= cutoff}
+
+    def _user_window(self, telegram_id: int, now: float, window: int) -> List[Tuple[float, str]]:
+        events = self._by_user.get(telegram_id)
+        if events is None:
+            events = sorted((_epoch(attempt.attempted_at), attempt.quotex_user_id)
+                            for attempt in self.db.get_recent_attempts_by_user(telegram_id, window))
+            self._by_user[telegram_id] = events
+        return self._trim(events, now - window)
+
+    def _quotex_id_window(self, quotex_user_id: str, now: float, window: int) -> List[Tuple[float, int]]:
+        events = self._by_quotex_id.get(quotex_user_id)
+        if events is None:
+            events = sorted((_epoch(attempt.attempted_at), attempt.telegram_id)
+                            for attempt in self.db.get_recent_attempts_by_quotex_id(quotex_user_id, window))
+            self._by_quotex_id[quotex_user_id] = events
+        return self._trim(events, now - window)
+
+    @staticmethod
+    def _trim(events: list, cutoff: float) -> list:
+        expired = 0
+        while expired < len(events) and events[expired][0] < cutoff:
+            expired += 1
+        if expired:
+            del events[:expired]
+        return events
+
+    def _block(self, reason: str, telegram_id: int, quotex_user_id: str, now: float, detail: str) -> str:
+        ABUSE_BLOCKS_TOTAL.labels(reason).inc()
+        # An enumerator is flagged once, not once per ID tried
+        key = (reason, telegram_id, None if reason == ENUMERATION else quotex_user_id)
+        last = self._flagged.get(key)
+        if last is None or now - last >= Config.ABUSE_WINDOW_SECONDS:
+            self._flagged[key] = now
+            self.db.add_abuse_flag(reason, telegram_id, quotex_user_id, detail)
+            log_event(logger, 'abuse_flagged',
+                      f"Verification by {telegram_id} with Quotex ID {quotex_user_id} blocked ({reason}): {detail}",
+                      level=logging.WARNING, telegram_id=telegram_id, quotex_user_id=quotex_user_id, reason=reason)
+        return reason
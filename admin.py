@@ -2,24 +2,53 @@
 Admin functionality for the Quotex VIP Channel Bot
 """
 
+import asyncio
+import html
+import io
 import logging
-from typing import List
+import os
+from datetime import datetime
+from typing import List, Optional
 from telegram import Update
 from telegram.ext import ContextTypes
 from database import Database
 from config import Config
+from tracing import tracer
+from profiling import profiler
+from loop_monitor import loop_monitor
+from export import FORMATS, TABLE_ALIASES, date_bounds, export_to_tempfile
+from config_reload import ConfigError, config_reloader
+from link_generator import InviteLinkGenerator
+from backup import BackupError, BackupJob, list_backups
+from tenants import DEFAULT_TENANT, Tenant
 
 logger = logging.getLogger(__name__)
 
+# Most invite links /admin_generate_links creates in one go
+MAX_GENERATE_LINKS = 500
+
 class AdminHandler:
-    def __init__(self, database: Database):
+    def __init__(self, database: Database, link_generator: Optional[InviteLinkGenerator] = None,
+                 backup_job: Optional[BackupJob] = None, tenant: Optional[Tenant] = None):
         self.db = database
-        self.admin_ids = Config.ADMIN_USER_IDS
+        self.link_generator = link_generator
+        self.backup_job = backup_job
+        self.tenant = tenant or DEFAULT_TENANT
+        self._profile_task = None
+    
+    @property
+    def admin_ids(self) -> List[int]:
+        """Read on every check so a reloaded ADMIN_USER_IDS applies at once"""
+        return self.tenant.ADMIN_USER_IDS
     
     def is_admin(self, user_id: int) -> bool:
-        """Check if user is an admin"""
+        """Check if user is an admin of this bot"""
         return user_id in self.admin_ids
     
+    def is_process_admin(self, user_id: int) -> bool:
+        """Admins of the whole process (Config.ADMIN_USER_IDS), for commands that affect every bot in it"""
+        return user_id in Config.ADMIN_USER_IDS
+    
     async def add_links_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle admin command to add VIP links"""
         if not update.message:
@@ -63,6 +92,44 @@ class AdminHandler:
         
         logger.info(f"Admin {user_id} added {added_count} VIP links")
     
+    async def generate_links_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle admin command to create single-use invite links for the VIP channel"""
+        if not update.message:
+            return
+        
+        user_id = update.message.from_user.id
+        
+        if not self.is_admin(user_id):
+            await update.message.reply_text("❌ You don't have permission to use this command.")
+            return
+        
+        if not self.link_generator or not self.tenant.VIP_CHANNEL_ID:
+            await update.message.reply_text("❌ Link generation is disabled. Set VIP_CHANNEL_ID to enable it.")
+            return
+        
+        count = Config.LINK_BATCH_SIZE
+        if context.args:
+            try:
+                count = int(context.args[0])
+            except ValueError:
+                count = 0
+            if not 1 <= count <= MAX_GENERATE_LINKS:
+                await update.message.reply_text(
+                    f"📝 Usage: /admin_generate_links [count]\n"
+                    f"count: 1-{MAX_GENERATE_LINKS} (default {Config.LINK_BATCH_SIZE})"
+                )
+                return
+        
+        await update.message.reply_text(f"⏳ Creating {count} invite links...")
+        added = await self.link_generator.generate(count)
+        
+        await update.message.reply_text(
+            f"✅ Added {added} of {count} invite links!\n"
+            f"📊 Unused links in the pool: {self.db.count_unused_links()}"
+        )
+        
+        logger.info(f"Admin {user_id} generated {added} invite links")
+    
     async def stats_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle admin command to show bot statistics"""
         if not update.message:
@@ -86,8 +153,11 @@ class AdminHandler:
             f"🔗 Total VIP Links: {stats.get('total_links', 0)}\n"
             f"✅ Used Links: {stats.get('used_links', 0)}\n"
             f"🟢 Available Links: {stats.get('available_links', 0)}\n"
+            f"🔒 Leased Links: {stats.get('leased_links', 0)}\n"
+            f"⌛ Expired Links: {stats.get('expired_links', 0)}\n"
             f"🔍 Total Verification Attempts: {stats.get('total_attempts', 0)}\n"
-            f"✅ Successful Verifications: {stats.get('successful_verifications', 0)}\n\n"
+            f"✅ Successful Verifications: {stats.get('successful_verifications', 0)}\n"
+            f"⏳ Queued (backend unavailable): {stats.get('pending_verifications', 0)}\n\n"
         )
         
         # Calculate success rate
@@ -121,20 +191,94 @@ class AdminHandler:
         users_message = "👥 **Recent Verified Users**\n\n"
         
         for i, user in enumerate(users, 1):
-            telegram_id = user['telegram_id']
-            quotex_id = user['quotex_user_id']
-            verified_at = user['verified_at']
-            
             users_message += (
-                f"{i}. TG: `{telegram_id}`\n"
-                f"   Quotex ID: `{quotex_id}`\n"
-                f"   Verified: {verified_at}\n\n"
+                f"{i}. TG: `{user.telegram_id}`\n"
+                f"   Quotex ID: `{user.quotex_user_id}`\n"
+                f"   Verified: {user.verified_at}\n"
+                f"   {self._format_trader_fields(user)}\n\n"
             )
         
         await update.message.reply_text(users_message, parse_mode='Markdown')
         
         logger.info(f"Admin {user_id} requested user list")
     
+    def _format_trader_fields(self, record) -> str:
+        """Deposits sum and country as stored from the partner bot's reply (UserRecord or TraderProfile)"""
+        deposits = record.deposits_sum
+        deposits_text = f"${deposits:,.2f}" if deposits is not None else "unknown"
+        return f"Deposits: {deposits_text} | Country: {record.country or 'unknown'}"
+    
+    async def deposits_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle admin command to list verified users with deposits of at least an amount"""
+        if not update.message:
+            return
+        
+        user_id = update.message.from_user.id
+        
+        if not self.is_admin(user_id):
+            await update.message.reply_text("❌ You don't have permission to use this command.")
+            return
+        
+        try:
+            min_deposits = float(context.args[0].lstrip('$'))
+        except (IndexError, ValueError):
+            await update.message.reply_text("❌ Usage: /admin_deposits <amount>")
+            return
+        
+        users = self.db.get_users_by_deposits(min_deposits, limit=20)
+        
+        if not users:
+            await update.message.reply_text(f"📝 No verified users with deposits of at least ${min_deposits:,.2f}.")
+            return
+        
+        users_message = f"💰 **Users with deposits ≥ ${min_deposits:,.2f}**\n\n"
+        
+        for i, user in enumerate(users, 1):
+            users_message += (
+                f"{i}. TG: `{user.telegram_id}`\n"
+                f"   Quotex ID: `{user.quotex_user_id}`\n"
+                f"   {self._format_trader_fields(user)}\n\n"
+            )
+        
+        await update.message.reply_text(users_message, parse_mode='Markdown')
+        
+        logger.info(f"Admin {user_id} requested users with deposits >= {min_deposits}")
+    
+    async def trader_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle admin command to show stored partner bot data for a Quotex ID"""
+        if not update.message:
+            return
+        
+        user_id = update.message.from_user.id
+        
+        if not self.is_admin(user_id):
+            await update.message.reply_text("❌ You don't have permission to use this command.")
+            return
+        
+        if not context.args:
+            await update.message.reply_text("❌ Usage: /admin_trader <quotex_id>")
+            return
+        
+        quotex_id = context.args[0]
+        profile = self.db.get_trader_profile(quotex_id)
+        
+        if not profile:
+            await update.message.reply_text(f"📝 No stored partner bot data for Quotex ID `{quotex_id}`.",
+                                            parse_mode='Markdown')
+            return
+        
+        status = "✅ Verified" if profile.verified else "⏳ Not verified"
+        await update.message.reply_text(
+            f"🔎 **Quotex ID** `{quotex_id}`\n\n"
+            f"{status}\n"
+            f"TG: `{profile.telegram_id}`\n"
+            f"{self._format_trader_fields(profile)}\n"
+            f"Checked: {profile.checked_at}",
+            parse_mode='Markdown'
+        )
+        
+        logger.info(f"Admin {user_id} looked up Quotex ID {quotex_id}")
+    
     async def broadcast_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle admin command to broadcast message to all users"""
         if not update.message:
@@ -164,20 +308,362 @@ class AdminHandler:
             await update.message.reply_text("❌ Broadcast message cannot be empty.")
             return
         
-        # Get all verified users
-        users = self.db.get_recent_users(limit=1000)  # Adjust limit as needed
+        # Count all verified users; the broadcast itself streams them (Database.iter_users)
+        user_count = self.db.count_users()
         
-        if not users:
+        if not user_count:
             await update.message.reply_text("📝 No users to broadcast to.")
             return
         
-        await update.message.reply_text(f"📢 Starting broadcast to {len(users)} users...")
+        await update.message.reply_text(f"📢 Starting broadcast to {user_count} users...")
         
         # Send broadcast (this would need to be implemented with the main bot instance)
         # For now, just confirm the command
         await update.message.reply_text(
-            f"✅ Broadcast prepared for {len(users)} users.\n"
+            f"✅ Broadcast prepared for {user_count} users.\n"
             f"Message: {broadcast_message[:100]}{'...' if len(broadcast_message) > 100 else ''}"
         )
         
-        logger.info(f"Admin {user_id} initiated broadcast to {len(users)} users")
+        logger.info(f"Admin {user_id} initiated broadcast to {user_count} users")
+    
+    async def latency_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle admin command to show verification latency percentiles per stage"""
+        if not update.message:
+            return
+        
+        user_id = update.message.from_user.id
+        
+        if not self.is_process_admin(user_id):
+            await update.message.reply_text("❌ You don't have permission to use this command.")
+            return
+        
+        # "/admin_latency reset" clears the collected samples
+        if context.args and context.args[0].lower() == 'reset':
+            tracer.reset()
+            await update.message.reply_text("✅ Latency samples cleared.")
+            return
+        
+        summary = tracer.summary()
+        
+        if not summary:
+            await update.message.reply_text("📝 No verification timings recorded yet.")
+            return
+        
+        lines = [f"{'stage':<20} {'n':>6} {'p50':>9} {'p95':>9} {'p99':>9}"]
+        for stage, stats in summary.items():
+            lines.append(
+                f"{stage:<20} {stats['count']:>6} "
+                f"{stats['p50'] * 1000:>7.0f}ms {stats['p95'] * 1000:>7.0f}ms {stats['p99'] * 1000:>7.0f}ms"
+            )
+        
+        latency_message = "⏱️ **Verification Latency**\n\n```\n" + "\n".join(lines) + "\n```"
+        
+        await update.message.reply_text(latency_message, parse_mode='Markdown')
+        
+        logger.info(f"Admin {user_id} requested latency report")
+    
+    async def loop_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle admin command to show event loop lag and the stacks of recent stalls"""
+        if not update.message:
+            return
+        
+        user_id = update.message.from_user.id
+        
+        if not self.is_process_admin(user_id):
+            await update.message.reply_text("❌ You don't have permission to use this command.")
+            return
+        
+        # "/admin_loop reset" clears the collected samples and stalls
+        if context.args and context.args[0].lower() == 'reset':
+            loop_monitor.reset()
+            await update.message.reply_text("✅ Event loop samples cleared.")
+            return
+        
+        if not loop_monitor.running:
+            await update.message.reply_text("📝 The event loop monitor is off (LOOP_LAG_INTERVAL is 0).")
+            return
+        
+        lag = loop_monitor.summary()
+        stalls = loop_monitor.recent_stalls()
+        lines = [
+            f"heartbeats {lag['count']}, every {Config.LOOP_LAG_INTERVAL * 1000:.0f}ms",
+            f"lag p50 {lag['p50'] * 1000:.1f}ms  p95 {lag['p95'] * 1000:.1f}ms  "
+            f"p99 {lag['p99'] * 1000:.1f}ms  max {lag['max'] * 1000:.0f}ms",
+            f"stalls over {Config.LOOP_LAG_THRESHOLD:g}s kept: {len(stalls)}",
+        ]
+        # Newest first; the innermost frames are the blocking call
+        for stall in reversed(stalls[-3:]):
+            at = datetime.fromtimestamp(stall['at']).strftime('%Y-%m-%d %H:%M:%S')
+            stack = stall['stack'].splitlines()[-8:]
+            lines.append("")
+            lines.append(f"{at} blocked {stall['blocked']:.2f}s")
+            lines.extend(line[:120] for line in stack)
+        
+        report = "\n".join(lines)
+        await update.message.reply_text(f"🔁 Event Loop\n\n<pre>{html.escape(report[-3800:])}</pre>",
+                                        parse_mode='HTML')
+        
+        logger.info(f"Admin {user_id} requested the event loop report")
+    
+    async def abuse_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle admin command to show blocked verifications and shared Quotex IDs"""
+        if not update.message:
+            return
+        
+        user_id = update.message.from_user.id
+        
+        if not self.is_admin(user_id):
+            await update.message.reply_text("❌ You don't have permission to use this command.")
+            return
+        
+        hours = 24.0
+        if context.args:
+            try:
+                hours = float(context.args[0])
+            except ValueError:
+                await update.message.reply_text("📝 Usage: /admin_abuse [hours]")
+                return
+        
+        flags = self.db.get_abuse_flags(hours, limit=200)
+        shared = self.db.get_shared_quotex_ids(limit=10)
+        
+        lines = [f"🛡️ Abuse report (last {hours:g}h)", ""]
+        if flags:
+            counts = {}
+            for flag in flags:
+                counts[flag.kind] = counts.get(flag.kind, 0) + 1
+            lines.append("Blocked: " + ", ".join(f"{kind} {count}" for kind, count in sorted(counts.items()))
+                         + (" (latest 200)" if len(flags) == 200 else ""))
+            for flag in flags[:15]:
+                lines.append(f"• {flag.flagged_at} {flag.kind} tg {flag.telegram_id} "
+                             f"qx {flag.quotex_user_id}: {flag.detail}")
+        else:
+            lines.append("No verifications blocked.")
+        
+        lines.append("")
+        if shared:
+            lines.append("Quotex IDs verified on several accounts:")
+            for quotex_user_id, accounts in shared:
+                lines.append(f"• {quotex_user_id}: {accounts} accounts")
+        else:
+            lines.append("No Quotex ID is verified on more than one account.")
+        
+        await update.message.reply_text("\n".join(lines))
+        
+        logger.info(f"Admin {user_id} requested the abuse report")
+    
+    async def backup_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle admin command to take and verify a database snapshot, or list snapshots"""
+        if not update.message:
+            return
+        
+        user_id = update.message.from_user.id
+        
+        if not self.is_admin(user_id):
+            await update.message.reply_text("❌ You don't have permission to use this command.")
+            return
+        
+        if not self.backup_job:
+            await update.message.reply_text("❌ Backups are not available.")
+            return
+        
+        if context.args and context.args[0].lower() == 'list':
+            snapshots = list_backups(Config.BACKUP_DIR, self.backup_job.db_path)
+            if not snapshots:
+                await update.message.reply_text(f"📝 No snapshots in {Config.BACKUP_DIR} yet.")
+                return
+            lines = [f"💾 Snapshots in {Config.BACKUP_DIR} (newest first):"]
+            for path in reversed(snapshots):
+                lines.append(f"• {os.path.basename(path)}  {os.path.getsize(path) / 1024 / 1024:.1f} MiB")
+            await update.message.reply_text("\n".join(lines))
+            return
+        
+        if self.backup_job.running:
+            await update.message.reply_text("⏳ A backup is already running.")
+            return
+        
+        await update.message.reply_text("⏳ Taking a database snapshot...")
+        try:
+            result = await self.backup_job.backup(verify=True)
+        except BackupError as e:
+            await update.message.reply_text(f"❌ Backup failed: {e}")
+            return
+        
+        rows = result['verified']['rows']
+        await update.message.reply_text(
+            f"✅ Snapshot {os.path.basename(result['path'])}\n"
+            f"📦 {result['bytes'] / 1024 / 1024:.1f} MiB compressed, {result['pages']} pages "
+            f"in {result['seconds']:.1f}s"
+            + (f", {result['restarts']} restarts" if result['restarts'] else "")
+            + (" (finished in one step)" if result['single_step'] else "") + "\n"
+            f"🔍 Restore check passed: " + ", ".join(f"{table} {count}" for table, count in rows.items()) + "\n"
+            f"🗑️ Old snapshots removed: {len(result['removed'])}"
+        )
+        
+        logger.info(f"Admin {user_id} took a database snapshot")
+    
+    async def export_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle admin command to export a table as a compressed CSV or JSONL document"""
+        if not update.message:
+            return
+        
+        user_id = update.message.from_user.id
+        
+        if not self.is_admin(user_id):
+            await update.message.reply_text("❌ You don't have permission to use this command.")
+            return
+        
+        usage = (
+            "❌ Usage: /admin_export <users|links|attempts> [csv|jsonl] [from YYYY-MM-DD] [to YYYY-MM-DD]\n\n"
+            "Example: /admin_export attempts jsonl 2025-01-01 2025-01-31"
+        )
+        args = list(context.args or [])
+        table = TABLE_ALIASES.get(args.pop(0).lower()) if args else None
+        if not table:
+            await update.message.reply_text(usage)
+            return
+        fmt = args.pop(0).lower() if args and args[0].lower() in FORMATS else 'csv'
+        if len(args) > 2:
+            await update.message.reply_text(usage)
+            return
+        try:
+            since, until = date_bounds(*(args + [None, None])[:2])
+        except ValueError:
+            await update.message.reply_text(usage)
+            return
+        
+        await update.message.reply_text(f"📦 Exporting {table}...")
+        
+        # Reading and compressing the table blocks, so it runs off the event loop
+        try:
+            fileobj, rows = await asyncio.to_thread(export_to_tempfile, self.db, table, fmt, since, until)
+        except Exception as e:
+            logger.error(f"Export of {table} failed: {e}")
+            await update.message.reply_text("❌ Export failed. Check the logs for details.")
+            return
+        
+        with fileobj:
+            size = fileobj.seek(0, io.SEEK_END)
+            fileobj.seek(0)
+            if size > Config.EXPORT_MAX_BYTES:
+                await update.message.reply_text(
+                    f"❌ The export is {size / 1024 / 1024:.1f} MB compressed, over Telegram's upload limit. "
+                    f"Narrow it with a date range."
+                )
+                return
+            
+            date_range = f" from {args[0]}" if args else ""
+            date_range += f" to {args[1]}" if len(args) > 1 else ""
+            await update.message.reply_document(
+                document=fileobj,
+                filename=f"{table}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}.gz",
+                caption=f"📦 {table}{date_range}: {rows} rows"
+            )
+        
+        logger.info(f"Admin {user_id} exported {rows} rows of {table} as {fmt}")
+    
+    async def reload_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle admin command to reload settings from the config file"""
+        if not update.message:
+            return
+        
+        user_id = update.message.from_user.id
+        
+        if not self.is_process_admin(user_id):
+            await update.message.reply_text("❌ You don't have permission to use this command.")
+            return
+        
+        try:
+            result = config_reloader.load()
+        except ConfigError as e:
+            await update.message.reply_text(f"❌ Config not reloaded, nothing was changed:\n{e}")
+            return
+        
+        lines = [f"🔄 Reloaded {config_reloader.path}"]
+        if result['changed']:
+            lines.append("Applied: " + ", ".join(result['changed']))
+        else:
+            lines.append("No setting changed.")
+        if result['restart_required']:
+            lines.append("Applies after a restart: " + ", ".join(result['restart_required']))
+        await update.message.reply_text("\n".join(lines))
+        
+        logger.info(f"Admin {user_id} reloaded the configuration")
+    
+    async def profile_start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle admin command to start a bounded CPU and memory profiling window"""
+        if not update.message:
+            return
+        
+        user_id = update.message.from_user.id
+        
+        if not self.is_process_admin(user_id):
+            await update.message.reply_text("❌ You don't have permission to use this command.")
+            return
+        
+        duration = 60
+        if context.args:
+            try:
+                duration = int(context.args[0])
+            except ValueError:
+                await update.message.reply_text("❌ Usage: /admin_profile_start [seconds]")
+                return
+        duration = max(1, min(duration, Config.PROFILE_MAX_SECONDS))
+        
+        if not profiler.start(duration):
+            await update.message.reply_text("⚠️ Profiling is already running. Use /admin_profile_stop first.")
+            return
+        
+        # Stop automatically at the end of the window and deliver the report
+        chat_id = update.message.chat_id
+        self._profile_task = asyncio.create_task(self._auto_stop_profile(context.bot, chat_id, duration))
+        
+        await update.message.reply_text(
+            f"🔬 Profiling started for {duration}s.\n"
+            f"The report will be sent here, or use /admin_profile_stop to end early."
+        )
+        
+        logger.info(f"Admin {user_id} started profiling for {duration}s")
+    
+    async def profile_stop_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle admin command to stop profiling and send the report"""
+        if not update.message:
+            return
+        
+        user_id = update.message.from_user.id
+        
+        if not self.is_process_admin(user_id):
+            await update.message.reply_text("❌ You don't have permission to use this command.")
+            return
+        
+        if self._profile_task:
+            self._profile_task.cancel()
+            self._profile_task = None
+        
+        report = profiler.stop()
+        
+        if report is None:
+            await update.message.reply_text("📝 Profiling is not running.")
+            return
+        
+        await self._send_profile_report(context.bot, update.message.chat_id, report)
+        
+        logger.info(f"Admin {user_id} stopped profiling")
+    
+    async def _auto_stop_profile(self, bot, chat_id: int, duration: int):
+        """Stop profiling after the requested window and send the report"""
+        await asyncio.sleep(duration)
+        self._profile_task = None
+        report = profiler.stop()
+        if report is not None:
+            await self._send_profile_report(bot, chat_id, report)
+    
+    async def _send_profile_report(self, bot, chat_id: int, report: str):
+        """Upload a profiling report as a text document"""
+        filename = f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+        await bot.send_document(
+            chat_id=chat_id,
+            document=io.BytesIO(report.encode('utf-8')),
+            filename=filename,
+            caption="🔬 Profiling report"
+        )
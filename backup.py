@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Online backups of the bot database
+
+A snapshot is taken with SQLite's online backup API, BACKUP_PAGES_PER_STEP
+pages at a time with a BACKUP_STEP_SLEEP pause in between, on a worker
+thread: the database is only read-locked for one step at a time, so writers
+(and the event loop) carry on while it runs. SQLite restarts the copy if
+another connection writes between steps; after BACKUP_MAX_RESTARTS restarts
+the rest is copied in one step, so a busy database still gets backed up (in
+WAL mode, the default with DB_MULTI_PROCESS, writers are not blocked by it).
+
+The copy is gzip-compressed into BACKUP_DIR as
+<database name>-YYYYmmdd-HHMMSS.db.gz, and only the newest BACKUP_KEEP
+snapshots are kept. verify_backup() restores a snapshot into a temporary
+file and runs PRAGMA integrity_check on it. Snapshots are taken every
+BACKUP_INTERVAL_HOURS (0 disables the schedule) and on /admin_backup.
+
+Command line:
+    python backup.py verify <snapshot.db.gz>
+    python backup.py restore <snapshot.db.gz> <database path>
+"""
+
+import argparse
+import asyncio
+import gzip
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from config import Config
+from logging_setup import log_event
+from metrics import BACKUPS_TOTAL, LAST_BACKUP_TIMESTAMP
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = '.db.gz'
+STAMP_FORMAT = '%Y%m%d-%H%M%S'
+# Tables a restored snapshot must contain
+REQUIRED_TABLES = ('users', 'vip_links', 'verification_attempts')
+
+
+class BackupError(Exception):
+    """A snapshot could not be taken, or failed verification"""
+
+
+class _TooManyRestarts(Exception):
+    """Raised from the progress callback to abort a stepwise copy"""
+
+
+def list_backups(backup_dir: str, db_path: str) -> List[str]:
+    """
+    Snapshot paths of one database, oldest first. Names must match exactly:
+    quotex_bot-billionaire-*.db.gz (a tenant's database) is not a snapshot
+    of quotex_bot.db, even though it starts with the same prefix.
+    """
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    pattern = re.compile(re.escape(stem) + r'-(\d{8}-\d{6})' + re.escape(SUFFIX))
+    try:
+        names = os.listdir(backup_dir)
+    except FileNotFoundError:
+        return []
+    snapshots = []
+    for name in names:
+        match = pattern.fullmatch(name)
+        if match:
+            try:
+                taken_at = datetime.strptime(match.group(1), STAMP_FORMAT)
+            except ValueError:
+                continue
+            snapshots.append((taken_at, os.path.join(backup_dir, name)))
+    return [path for _, path in sorted(snapshots)]
+
+
+def copy_database(db_path: str, target_path: str, pages: int, sleep: float, max_restarts: int) -> dict:
+    """
+    Copy a live database with the online backup API; returns the pages
+    copied, the restarts and whether the copy fell back to a single step
+    """
+    stats = {'pages': 0, 'restarts': 0, 'single_step': False}
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal last_remaining
+        # remaining goes back up when a write to the source restarted the copy
+        if last_remaining is not None and remaining > last_remaining:
+            stats['restarts'] += 1
+            if stats['restarts'] > max_restarts:
+                raise _TooManyRestarts()
+        last_remaining = remaining
+        stats['pages'] = total
+        # Called between steps, with the source unlocked: give writers a turn.
+        # (Connection.backup's own `sleep` only applies when a step hits SQLITE_BUSY.)
+        if remaining and sleep:
+            time.sleep(sleep)
+
+    source = sqlite3.connect(db_path, timeout=Config.DB_BUSY_TIMEOUT)
+    target = sqlite3.connect(target_path)
+    try:
+        try:
+            source.backup(target, pages=max(1, pages), progress=progress)
+        except _TooManyRestarts:
+            stats['single_step'] = True
+            source.backup(target, pages=-1)
+    finally:
+        target.close()
+        source.close()
+    return stats
+
+
+def compress(source_path: str, target_path: str):
+    """gzip a file into target_path, via a temporary name so a partial file is never left behind"""
+    partial = target_path + '.partial'
+    try:
+        with open(source_path, 'rb') as src, gzip.open(partial, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(partial, target_path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+
+
+def restore(snapshot_path: str, target_path: str):
+    """Decompress a snapshot into a database file"""
+    with gzip.open(snapshot_path, 'rb') as src, open(target_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+def verify_backup(snapshot_path: str) -> dict:
+    """Restore a snapshot into a temporary file and check it; raises BackupError if it is unusable"""
+    with tempfile.TemporaryDirectory(prefix='quotex_restore_') as workdir:
+        restored = os.path.join(workdir, 'restored.db')
+        try:
+            restore(snapshot_path, restored)
+            conn = sqlite3.connect(restored)
+            try:
+                integrity = conn.execute('PRAGMA integrity_check').fetchone()[0]
+                tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+                missing = [table for table in REQUIRED_TABLES if table not in tables]
+                counts = {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                          for table in REQUIRED_TABLES if table in tables}
+            finally:
+                conn.close()
+        except (OSError, EOFError, sqlite3.Error) as e:
+            raise BackupError(f"{os.path.basename(snapshot_path)} cannot be restored: {e}") from e
+
+    if integrity != 'ok':
+        raise BackupError(f"{os.path.basename(snapshot_path)} failed the integrity check: {integrity}")
+    if missing:
+        raise BackupError(f"{os.path.basename(snapshot_path)} is missing tables: {', '.join(missing)}")
+    return {'integrity': integrity, 'rows': counts}
+
+
+class BackupJob:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.last_backup: Optional[dict] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    async def run(self):
+        """Take a snapshot every BACKUP_INTERVAL_HOURS; cancel the task to stop"""
+        while True:
+            interval = Config.BACKUP_INTERVAL_HOURS * 3600
+            await asyncio.sleep(interval or 3600)
+            if not Config.BACKUP_INTERVAL_HOURS:
+                continue
+            try:
+                await self.backup(verify=True)
+            except BackupError as e:
+                logger.error(f"Scheduled backup failed: {e}")
+
+    async def backup(self, verify: bool = False) -> dict:
+        """Take, compress and prune snapshots, optionally verifying the new one; raises BackupError"""
+        async with self._lock:
+            try:
+                result = await asyncio.to_thread(self._backup, verify)
+            except BackupError:
+                BACKUPS_TOTAL.labels('failed').inc()
+                raise
+            except (OSError, sqlite3.Error) as e:
+                BACKUPS_TOTAL.labels('failed').inc()
+                raise BackupError(str(e)) from e
+
+        BACKUPS_TOTAL.labels('ok').inc()
+        LAST_BACKUP_TIMESTAMP.set(time.time())
+        self.last_backup = result
+        log_event(logger, 'backup_completed',
+                  f"Backup {os.path.basename(result['path'])}: {result['bytes'] / 1024 / 1024:.1f} MiB "
+                  f"in {result['seconds']:.1f}s ({result['restarts']} restarts)",
+                  path=result['path'], bytes=result['bytes'], seconds=round(result['seconds'], 3),
+                  restarts=result['restarts'], removed=len(result['removed']))
+        return result
+
+    def _backup(self, verify: bool) -> dict:
+        started = time.perf_counter()
+        backup_dir = Config.BACKUP_DIR
+        os.makedirs(backup_dir, exist_ok=True)
+
+        stamp = datetime.now(timezone.utc).strftime(STAMP_FORMAT)
+        name = os.path.splitext(os.path.basename(self.db_path))[0]
+        path = os.path.join(backup_dir, f'{name}-{stamp}{SUFFIX}')
+        if os.path.exists(path):
+            raise BackupError(f"{os.path.basename(path)} already exists; try again in a second")
+
+        with tempfile.TemporaryDirectory(prefix='.backup-', dir=backup_dir) as workdir:
+            copy_path = os.path.join(workdir, 'copy.db')
+            stats = copy_database(self.db_path, copy_path, Config.BACKUP_PAGES_PER_STEP, Config.BACKUP_STEP_SLEEP,
+                                  Config.BACKUP_MAX_RESTARTS)
+            compress(copy_path, path)
+
+        result = {
+            'path': path,
+            'bytes': os.path.getsize(path),
+            'pages': stats['pages'],
+            'restarts': stats['restarts'],
+            'single_step': stats['single_step'],
+            'verified': None,
+        }
+        if verify:
+            try:
+                result['verified'] = verify_backup(path)
+            except BackupError:
+                # Never keep (or prune older snapshots for) a snapshot that does not restore
+                os.remove(path)
+                raise
+        result['removed'] = self._prune(backup_dir)
+        result['seconds'] = time.perf_counter() - started
+        return result
+
+    def _prune(self, backup_dir: str) -> List[str]:
+        """Delete all but the newest BACKUP_KEEP snapshots; returns the deleted paths"""
+        snapshots = list_backups(backup_dir, self.db_path)
+        removed = snapshots[:-Config.BACKUP_KEEP] if Config.BACKUP_KEEP > 0 else []
+        for path in removed:
+            os.remove(path)
+        return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    verify_parser = commands.add_parser('verify', help='check that a snapshot restores cleanly')
+    verify_parser.add_argument('snapshot')
+    restore_parser = commands.add_parser('restore', help='decompress a snapshot into a database file')
+    restore_parser.add_argument('snapshot')
+    restore_parser.add_argument('database')
+    restore_parser.add_argument('--force', action='store_true', help='overwrite an existing database')
+    args = parser.parse_args()
+
+    try:
+        result = verify_backup(args.snapshot)
+    except BackupError as e:
+        sys.exit(str(e))
+    print(f"{args.snapshot}: integrity {result['integrity']}, "
+          + ", ".join(f"{table} {rows}" for table, rows in result['rows'].items()))
+
+    if args.command == 'restore':
+        if os.path.exists(args.database) and not args.force:
+            sys.exit(f"{args.database} exists; stop the bot and pass --force to overwrite it")
+        for stale in (args.database + '-wal', args.database + '-shm'):
+            if os.path.exists(stale):
+                os.remove(stale)
+        restore(args.snapshot, args.database)
+        print(f"Restored into {args.database}")
+
+
+if __name__ == '__main__':
+    main()
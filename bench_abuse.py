@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Abuse detector throughput
+
+Times abuse.AbuseDetector.check() + record() for --users accounts submitting
+one Quotex ID each against a temporary database: first seeded from the
+database, then again from the in-memory windows. Prints the rate and the
+memory the windows take. The detector's behaviour is covered by
+tests/test_abuse.py.
+
+Usage: python bench_abuse.py [--users 100000]
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+from abuse import AbuseDetector
+from database import Database
+
+
+def bench(db: Database, users: int):
+    """check() + record() for `users` accounts submitting one ID each, then again (all from memory)"""
+    detector = AbuseDetector(db)
+    tracemalloc.start()
+    for label in ('first submission (seeded from DB)', 'second submission (in memory)'):
+        started = time.perf_counter()
+        for i in range(users):
+            telegram_id, quotex_id = 5_000_000 + i, str(60_000_000 + i)
+            if detector.check(telegram_id, quotex_id) is None:
+                detector.record(telegram_id, quotex_id)
+        elapsed = time.perf_counter() - started
+        print(f"  {label:<36} {users / elapsed:>10.0f} checks/s  {elapsed / users * 1e6:7.1f} us/check")
+    print(f"  windows for {users} accounts: {tracemalloc.get_traced_memory()[0] / 1024 / 1024:.1f} MiB")
+    tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100_000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    with tempfile.TemporaryDirectory(prefix='quotex_abuse_') as workdir:
+        db = Database(os.path.join(workdir, 'abuse.db'))
+        print(f"Detector throughput ({args.users} accounts)")
+        bench(db, args.users)
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Online backup benchmark
+
+Builds a synthetic database (bench_database.generate), then snapshots it
+with backup.BackupJob while a writer thread logs verification attempts
+through Database and the event loop runs a lag heartbeat. For comparison
+the same database is copied in one backup step, as a plain file copy would
+hold it. Reports backup time, restarts, compressed size, the writer's
+p50/p99/max latency and the loop's max lag for each. Snapshot integrity,
+retention and `backup.py restore` are covered by tests/test_backup.py.
+
+Usage: python bench_backup.py [--users 200000] [--links 200000] [--attempts 2000000]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from backup import BackupJob, copy_database
+from bench_database import generate
+from config import Config
+from database import Database
+from tracing import percentile
+
+
+class Writer(threading.Thread):
+    """Logs verification attempts back to back and records each write's latency"""
+
+    def __init__(self, db: Database):
+        super().__init__(daemon=True)
+        self.db = db
+        self.latencies = []
+        self.stop_event = threading.Event()
+
+    def run(self):
+        i = 0
+        while not self.stop_event.is_set():
+            started = time.perf_counter()
+            self.db.log_verification_attempt(7_000_000 + i, str(70_000_000 + i), False)
+            self.latencies.append(time.perf_counter() - started)
+            i += 1
+            time.sleep(0.002)
+
+    def report(self) -> str:
+        values = sorted(self.latencies)
+        return (f"writer: {len(values)} writes, p50 {percentile(values, 50) * 1000:.1f}ms "
+                f"p99 {percentile(values, 99) * 1000:.1f}ms max {values[-1] * 1000:.0f}ms")
+
+
+async def under_load(db: Database, action) -> tuple:
+    """Run action() while the writer and a loop heartbeat run; returns (result, writer, max loop lag)"""
+    writer = Writer(db)
+    writer.start()
+    max_lag = 0.0
+    done = asyncio.Event()
+
+    async def heartbeat():
+        nonlocal max_lag
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            max_lag = max(max_lag, time.perf_counter() - started - 0.01)
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0.2)
+    result = await action()
+    done.set()
+    await beat
+    writer.stop_event.set()
+    writer.join()
+    return result, writer, max_lag
+
+
+async def run(args, workdir: str):
+    db_path = os.path.join(workdir, 'quotex_bot.db')
+    db = Database(db_path)
+    generate(db_path, args.users, args.links, args.attempts, seed=1)
+    print(f"Database: {os.path.getsize(db_path) / 1024 / 1024:.1f} MiB\n")
+
+    Config.BACKUP_DIR = os.path.join(workdir, 'backups')
+    job = BackupJob(db_path)
+
+    result, writer, max_lag = await under_load(db, lambda: job.backup(verify=True))
+    print(f"stepwise ({Config.BACKUP_PAGES_PER_STEP} pages/step): {result['seconds']:.1f}s incl. verify, "
+          f"{result['restarts']} restarts{' then one step' if result['single_step'] else ''}, "
+          f"{result['bytes'] / 1024 / 1024:.1f} MiB compressed")
+    print(f"  {writer.report()}, loop max lag {max_lag * 1000:.0f}ms")
+
+    def single_step():
+        copy_database(db_path, os.path.join(workdir, 'single.db'), pages=-1, sleep=0, max_restarts=0)
+
+    _, writer, max_lag = await under_load(db, lambda: asyncio.to_thread(single_step))
+    print("one step (like a locked file copy):")
+    print(f"  {writer.report()}, loop max lag {max_lag * 1000:.0f}ms")
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200_000)
+    parser.add_argument('--links', type=int, default=200_000)
+    parser.add_argument('--attempts', type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    with tempfile.TemporaryDirectory(prefix='quotex_backup_') as workdir:
+        asyncio.run(run(args, workdir))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for response_classifier
+
+Times classify() against the two keyword-loop classifiers it replaced,
+over the replies of the test corpus (tests/test_response_classifier.py,
+which checks what classify() makes of each).
+
+Usage: python bench_classifier.py [--iterations 200000]
+"""
+
+import argparse
+import time
+
+from response_classifier import NOT_FOUND, REGISTERED, UNKNOWN, classify
+from tests.test_response_classifier import CORPUS
+
+
+def legacy_simple(text: str):
+    """verification_simple.py before the shared classifier"""
+    response_text = text.lower()
+    if any(i in response_text for i in ['was not found', 'not found', 'invalid', 'not registered', 'error', 'failed', 'not valid']):
+        return NOT_FOUND
+    if 'deposits sum:' in response_text or 'deposit sum:' in response_text:
+        return REGISTERED
+    if any(i in response_text for i in ['registered', 'verified', 'valid', 'success', 'confirmed', 'deposits sum:', 'deposit sum:']):
+        return REGISTERED
+    return UNKNOWN
+
+
+def legacy_telethon(text: str):
+    """verification.py before the shared classifier"""
+    message_text = text.lower()
+    if any(k in message_text for k in ['found', 'verified', 'valid', 'registered', 'success']):
+        return REGISTERED
+    if any(k in message_text for k in ['not found', 'invalid', 'not registered', 'error', 'fail']):
+        return NOT_FOUND
+    return UNKNOWN
+
+
+def time_classifier(name: str, func, texts, iterations: int):
+    started = time.perf_counter()
+    for i in range(iterations):
+        func(texts[i % len(texts)])
+    elapsed = time.perf_counter() - started
+    print(f"  {name:<18} {iterations / elapsed:>12,.0f} replies/s  {elapsed / iterations * 1e6:7.2f} us/reply")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200_000)
+    args = parser.parse_args()
+
+    texts = [text for text, _, _, _ in CORPUS]
+    print(f"Throughput over {args.iterations} replies:")
+    time_classifier('classify', classify, texts, args.iterations)
+    time_classifier('legacy simple', legacy_simple, texts, args.iterations)
+    time_classifier('legacy telethon', legacy_telethon, texts, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
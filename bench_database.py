@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Database microbenchmarks at realistic table sizes
+
+Generates synthetic users, VIP links and verification attempts into a
+temporary SQLite file, times each public Database method, and prints an
+EXPLAIN QUERY PLAN report for every statement those methods execute, so
+missing indexes show up as full-table SCANs or temporary B-trees. Streaming
+exports (export.py) are timed separately, with their peak Python memory,
+since reading a whole table is a scan by design.
+
+Usage: python bench_database.py [--users 1000000] [--links 1000000] [--attempts 50000000]
+"""
+
+import argparse
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import OrderedDict, defaultdict
+
+from database import Database
+from export import write_export
+from tracing import percentile
+
+BATCH = 50_000
+LITERAL_PATTERN = re.compile(r"'[^']*'|\b\d+\b")
+
+
+def generate(db_path: str, users: int, links: int, attempts: int, seed: int):
+    """Bulk-load synthetic rows with durability switched off for speed"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA journal_mode = MEMORY')
+
+    def chunks(rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == BATCH:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    started = time.perf_counter()
+    # Links: the first `users` links are used, one per user
+    used = min(users, links)
+    link_rows = (
+        (i + 1, f'https://t.me/+bench_{i}', i < used, 1_000_000 + i if i < used else None,
+         f'2025-01-01 00:{(i // 60) % 60:02d}:{i % 60:02d}')
+        for i in range(links)
+    )
+    for batch in chunks(link_rows):
+        conn.executemany('INSERT INTO vip_links (id, link, is_used, used_by, created_at) VALUES (?, ?, ?, ?, ?)', batch)
+    conn.commit()
+
+    user_rows = (
+        (1_000_000 + i, str(10_000_000 + i), i + 1 if i < links else None,
+         f'2025-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:00',
+         round(rng.expovariate(1 / 300), 2), rng.choice(['IN', 'BR', 'ID', 'NG']))
+        for i in range(users)
+    )
+    for batch in chunks(user_rows):
+        conn.executemany('INSERT INTO users (telegram_id, quotex_user_id, vip_link_id, verified_at, deposits_sum, country) '
+                         'VALUES (?, ?, ?, ?, ?, ?)', batch)
+    conn.commit()
+
+    attempt_rows = (
+        (1_000_000 + rng.randrange(max(users, 1) * 2), str(10_000_000 + rng.randrange(max(users, 1) * 2)),
+         rng.random() < 0.3, f'2025-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:00:00')
+        for i in range(attempts)
+    )
+    for batch in chunks(attempt_rows):
+        conn.executemany('INSERT INTO verification_attempts (telegram_id, quotex_user_id, success, attempted_at) VALUES (?, ?, ?, ?)', batch)
+    conn.commit()
+    conn.execute('ANALYZE')
+    conn.close()
+    print(f"Generated {users} users, {links} links, {attempts} attempts in {time.perf_counter() - started:.1f}s")
+
+
+class TracingDatabase(Database):
+    """Database that records the SQL each method runs, for the query plan report"""
+
+    def __init__(self, db_path: str):
+        self.statements = defaultdict(OrderedDict)
+        self.current_method = None
+        super().__init__(db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = super()._connect()
+        conn.set_trace_callback(self._trace)
+        return conn
+
+    def _trace(self, sql: str):
+        if self.current_method:
+            normalized = ' '.join(sql.split())
+            if normalized.split(' ', 1)[0].upper() in ('SELECT', 'UPDATE', 'INSERT', 'DELETE'):
+                # The trace callback sees bound values; group calls by statement shape
+                template = LITERAL_PATTERN.sub('?', normalized)
+                self.statements[self.current_method].setdefault(template, normalized)
+
+
+def bench(db: TracingDatabase, name: str, func, iterations: int):
+    """Time `iterations` calls of func(i) and print latency percentiles"""
+    db.current_method = name
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(i)
+        timings.append(time.perf_counter() - start)
+    db.current_method = None
+    timings.sort()
+    print(f"  {name:<28} n={iterations:<6} p50={percentile(timings, 50) * 1000:9.3f}ms "
+          f"p99={percentile(timings, 99) * 1000:9.3f}ms max={timings[-1] * 1000:9.3f}ms")
+
+
+def bench_export(db: Database, table: str, fmt: str, since=None, until=None):
+    """Export into a temporary file and print rows/s, compressed size and peak traced memory"""
+    with tempfile.TemporaryFile() as fileobj:
+        tracemalloc.start()
+        start = time.perf_counter()
+        rows = write_export(db, table, fmt, fileobj, since, until)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        size = fileobj.tell()
+    label = f"{table} {fmt}" + (f" {since}..{until}" if since or until else '')
+    print(f"  {label:<50} rows={rows:<9} {rows / elapsed if elapsed else 0:>10.0f} rows/s "
+          f"{size / 1024 / 1024:7.1f} MiB  peak={peak / 1024:7.0f} KiB")
+
+
+def explain(db_path: str, statements: dict) -> int:
+    """Print EXPLAIN QUERY PLAN per statement; returns the number of problem plans"""
+    conn = sqlite3.connect(db_path)
+    problems = 0
+    for method, sqls in statements.items():
+        for sql in sqls.values():
+            try:
+                plan = conn.execute(f'EXPLAIN QUERY PLAN {sql}').fetchall()
+            except sqlite3.Error as e:
+                print(f"  [{method}] could not explain: {e}")
+                continue
+            details = [row[3] for row in plan]
+            flagged = [d for d in details if (d.startswith('SCAN') and 'USING' not in d) or 'TEMP B-TREE' in d]
+            marker = 'FULL SCAN' if flagged else 'ok'
+            problems += bool(flagged)
+            print(f"  [{method}] {marker}")
+            print(f"    {sql[:160]}")
+            for detail in details:
+                print(f"      - {detail}")
+    conn.close()
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--links', type=int, default=100_000)
+    parser.add_argument('--attempts', type=int, default=1_000_000)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--keep', help='write the database here instead of a temporary file')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='quotex_dbbench_')
+    db_path = args.keep or os.path.join(workdir, 'bench.db')
+    if os.path.exists(db_path):
+        sys.exit(f"{db_path} already exists")
+
+    db = TracingDatabase(db_path)
+    generate(db_path, args.users, args.links, args.attempts, args.seed)
+    size_mb = os.path.getsize(db_path) / 1024 / 1024
+    print(f"Database file: {db_path} ({size_mb:.1f} MiB)\n")
+
+    rng = random.Random(args.seed)
+    n = args.iterations
+    new_user = 9_000_000
+
+    print("Method latency")
+    bench(db, 'is_user_verified (hit)', lambda i: db.is_user_verified(1_000_000 + rng.randrange(args.users)), n)
+    bench(db, 'is_user_verified (miss)', lambda i: db.is_user_verified(8_000_000 + i), n)
+    bench(db, 'get_unused_vip_link', lambda i: db.get_unused_vip_link(), n)
+    bench(db, 'mark_link_as_used', lambda i: db.mark_link_as_used(args.links - i, new_user + i), n)
+    bench(db, 'claim_vip_link', lambda i: db.claim_vip_link(new_user + n + i, str(new_user + i)), n)
+    bench(db, 'add_vip_links (100)', lambda i: db.add_vip_links([f'https://t.me/+new_{i}_{j}' for j in range(100)]), max(1, n // 10))
+    bench(db, 'record_link_join (link)', lambda i: db.record_link_join(1_000_000 + i, f'https://t.me/+bench_{i}'), n)
+    bench(db, 'record_link_join (user)', lambda i: db.record_link_join(1_000_000 + n + i), n)
+    bench(db, 'get_unjoined_links', lambda i: db.get_unjoined_links(48, 50), n)
+    bench(db, 'needs_new_link', lambda i: db.needs_new_link(1_000_000 + rng.randrange(args.users)), n)
+    bench(db, 'get_recent_attempts_by_user', lambda i: db.get_recent_attempts_by_user(1_000_000 + rng.randrange(args.users * 2), 3600), n)
+    bench(db, 'get_recent_attempts_by_quotex_id', lambda i: db.get_recent_attempts_by_quotex_id(str(10_000_000 + rng.randrange(args.users * 2)), 3600), n)
+    bench(db, 'count_other_accounts', lambda i: db.count_other_accounts(str(10_000_000 + rng.randrange(args.users)), 0), n)
+    bench(db, 'get_abuse_flags', lambda i: db.get_abuse_flags(24), max(1, n // 10))
+    bench(db, 'get_shared_quotex_ids', lambda i: db.get_shared_quotex_ids(), max(1, n // 10))
+    bench(db, 'log_verification_attempt', lambda i: db.log_verification_attempt(new_user + i, str(new_user + i), i % 2 == 0), n)
+    bench(db, 'count_unused_links', lambda i: db.count_unused_links(), max(1, n // 10))
+    bench(db, 'get_stats', lambda i: db.get_stats(), max(1, n // 10))
+    bench(db, 'get_recent_users (20)', lambda i: db.get_recent_users(20), max(1, n // 10))
+    bench(db, 'get_recent_users (1000)', lambda i: db.get_recent_users(1000), max(1, n // 10))
+    bench(db, 'iter_users (first batch)', lambda i: next(db.iter_users()), max(1, n // 10))
+    bench(db, 'count_users', lambda i: db.count_users(), max(1, n // 10))
+    bench(db, 'get_users_by_deposits', lambda i: db.get_users_by_deposits(500.0), max(1, n // 10))
+    bench(db, 'get_users_for_reverification', lambda i: db.get_users_for_reverification(i * 50, 50, 24), n)
+    bench(db, 'get_trader_profile', lambda i: db.get_trader_profile(str(10_000_000 + rng.randrange(args.users * 2))), n)
+
+    print("\nStreaming export")
+    bench_export(db, 'users', 'csv')
+    bench_export(db, 'users', 'jsonl', '2025-03-01', '2025-04-01')
+    bench_export(db, 'vip_links', 'csv')
+    bench_export(db, 'verification_attempts', 'csv')
+    bench_export(db, 'verification_attempts', 'jsonl', '2025-03-01', '2025-04-01')
+
+    print("\nQuery plans")
+    problems = explain(db_path, db.statements)
+    print(f"\n{problems} statement(s) need a full scan or temporary B-tree")
+
+
+if __name__ == '__main__':
+    main()
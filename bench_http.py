@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Bot API request pool benchmark against the local fake Bot API
+
+Sends --messages sendMessage calls, --concurrency at a time, through a Bot
+built with each request configuration:
+  - bot default: telegram.Bot() with its default HTTPXRequest (one connection)
+  - app default: what Application.builder() builds when nothing is configured
+  - tuned: http_requests.build_request('replies'), from Config
+  - bulk: http_requests.build_request('bulk'), from Config
+and reports messages/s, p50/p99 call latency, failures (e.g. pool timeouts)
+and how many TCP connections the fake API accepted. The fake API runs in a
+child process so it does not compete with the client for the event loop.
+
+Usage: python bench_http.py [--messages 2000] [--concurrency 100] [--api-latency 0.02]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import subprocess
+import sys
+import time
+import urllib.request
+
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+from bench_load import FAKE_TOKEN
+from fake_bot_api import FakeBotAPI
+from http_requests import build_request
+from tracing import percentile
+
+CONFIGURATIONS = {
+    'bot default': lambda: HTTPXRequest(),
+    'app default': lambda: HTTPXRequest(connection_pool_size=256),
+    'tuned': lambda: build_request('replies'),
+    'bulk': lambda: build_request('bulk'),
+}
+
+
+async def serve_api(latency: float):
+    """Child process: run the fake API and print its base URL"""
+    api = FakeBotAPI(latency=latency)
+    api.register_method('benchStats', lambda params: {'connections': api.connections})
+    await api.start()
+    print(api.base_url, flush=True)
+    await asyncio.Event().wait()
+
+
+def api_connections(base_url: str) -> int:
+    with urllib.request.urlopen(f'{base_url}{FAKE_TOKEN}/benchStats', data=b'') as response:
+        return json.loads(response.read())['result']['connections']
+
+
+async def run(name: str, make_request, args) -> dict:
+    api = subprocess.Popen([sys.executable, __file__, '--serve-api', str(args.api_latency)],
+                           stdout=subprocess.PIPE, text=True)
+    base_url = api.stdout.readline().strip()
+    bot = Bot(FAKE_TOKEN, base_url=base_url, request=make_request())
+    await bot.initialize()
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    failures = []
+
+    async def send(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await bot.send_message(chat_id=1_000 + i % 500, text=f"Broadcast {i}")
+            except Exception as e:
+                failures.append(type(e).__name__)
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(i) for i in range(args.messages)))
+    elapsed = time.perf_counter() - started
+    await bot.shutdown()
+    connections = api_connections(base_url)
+    api.terminate()
+    api.wait()
+
+    latencies.sort()
+    return {
+        'name': name,
+        'per_s': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000 if latencies else 0.0,
+        'p99_ms': percentile(latencies, 99) * 1000 if latencies else 0.0,
+        'failures': len(failures),
+        'failure_kinds': sorted(set(failures)),
+        'connections': connections,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=100, help='calls in flight at once')
+    parser.add_argument('--api-latency', type=float, default=0.02, help='fake API delay per call (s)')
+    parser.add_argument('--config', action='append', choices=sorted(CONFIGURATIONS),
+                        help='run only these configurations (repeatable)')
+    parser.add_argument('--serve-api', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_api is not None:
+        asyncio.run(serve_api(args.serve_api))
+        return
+
+    logging.basicConfig(level=logging.CRITICAL)
+
+    print(f"{args.messages} messages, {args.concurrency} in flight, {args.api_latency * 1000:.0f}ms API latency")
+    print(f"{'config':<12} {'msgs/s':>9} {'p50':>9} {'p99':>9} {'failed':>7} {'conns':>6}")
+    for name in args.config or CONFIGURATIONS:
+        result = asyncio.run(run(name, CONFIGURATIONS[name], args))
+        print(f"{result['name']:<12} {result['per_s']:>9.1f} {result['p50_ms']:>7.1f}ms {result['p99_ms']:>7.1f}ms "
+              f"{result['failures']:>7} {result['connections']:>6}  {', '.join(result['failure_kinds'])}")
+
+
+if __name__ == '__main__':
+    main()
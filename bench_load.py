@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end load test for the Quotex VIP Channel Bot
+
+Runs QuotexVIPBot in a child process against the local fake Bot API
+(fake_bot_api.py), with MockVerificationService standing in for
+@QuotexPartnerBot. Synthetic users go through /start, ID entry and "yes"
+confirmation, or /verify <id>. The report covers updates/s, per-step p50/p99
+latency, and the bot process's CPU time and peak RSS.
+
+Usage: python bench_load.py [--users 2000] [--concurrency 100] [--json results.jsonl]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+# Fixed, syntactically valid token; it never leaves localhost
+FAKE_TOKEN = '123456789:AAFakeTokenForOfflineLoadTesting000000'
+
+
+def serve_bot(options: dict):
+    """Child process: run the real bot against the fake API"""
+    from logging_setup import setup_logging
+    setup_logging()
+
+    from bot import QuotexVIPBot
+    from verification_mock import MockVerificationService
+
+    service = MockVerificationService(
+        latency=options['partner_latency'],
+        jitter=options['partner_jitter'],
+        error_rate=options['partner_error_rate'],
+        error_latency=options['partner_error_latency'],
+        registered_ratio=options['registered_ratio'],
+        connect_delay=options.get('connect_delay', 0),
+        seed=options['seed'],
+    )
+    QuotexVIPBot(verification_service=service).run()
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.outcomes = Counter()
+        self.updates_sent = 0
+        self.timeouts = 0
+
+
+def classify_reply(text: str) -> str:
+    from config import Config
+    if text.startswith(Config.VERIFICATION_SUCCESS):
+        return 'success'
+    if text == Config.VERIFICATION_FAILED:
+        return 'not_registered'
+    if text == Config.NO_LINKS_AVAILABLE:
+        return 'no_links'
+    if text == Config.ALREADY_VERIFIED:
+        return 'already_verified'
+    if text == Config.VERIFICATION_WARMING_UP:
+        return 'warming_up'
+    if text == Config.VERIFICATION_UNAVAILABLE:
+        return 'queued'
+    if text in (Config.TOO_MANY_IDS, Config.QUOTEX_ID_IN_USE):
+        return 'blocked'
+    return 'error'
+
+
+async def send_and_wait(api, stats: LoadStats, telegram_id: int, text: str, step: str, timeout: float):
+    """Push one user message and wait for the bot's first reply to it"""
+    started = time.perf_counter()
+    api.push_message(telegram_id, text)
+    stats.updates_sent += 1
+    reply = await api.next_outgoing(telegram_id, timeout)
+    stats.latencies[step].append(reply.received_at - started)
+    return started, reply
+
+
+async def drive_user(api, index: int, args, stats: LoadStats):
+    """Replay one synthetic user's conversation"""
+    telegram_id = 5_000_000 + index
+    quotex_id = str(10_000_000 + index)
+    timeout = args.step_timeout
+    try:
+        user_started, _ = await send_and_wait(api, stats, telegram_id, '/start', 'start', timeout)
+
+        if index % 100 < args.verify_command_percent:
+            confirm_started, _ = await send_and_wait(api, stats, telegram_id, f'/verify {quotex_id}', 'verify_ack', timeout)
+        else:
+            await send_and_wait(api, stats, telegram_id, quotex_id, 'id_entry', timeout)
+            confirm_started, _ = await send_and_wait(api, stats, telegram_id, 'yes', 'verify_ack', timeout)
+
+        final = await api.next_outgoing(telegram_id, timeout)
+        stats.latencies['verification'].append(final.received_at - confirm_started)
+        stats.latencies['end_to_end'].append(final.received_at - user_started)
+        stats.outcomes[classify_reply(final.text)] += 1
+    except asyncio.TimeoutError:
+        stats.timeouts += 1
+
+
+async def run_load(args) -> dict:
+    from fake_bot_api import FakeBotAPI
+    from tracing import percentile
+
+    api = FakeBotAPI(latency=args.api_latency)
+    await api.start()
+
+    workdir = tempfile.mkdtemp(prefix='quotex_load_')
+    db_path = os.path.join(workdir, 'load.db')
+
+    # Stock the link pool so every registered user can be served
+    from database import Database
+    Database(db_path).add_vip_links([f'https://t.me/+load_{i}' for i in range(args.users)])
+
+    env = dict(os.environ,
+               BOT_TOKEN=FAKE_TOKEN,
+               BOT_API_BASE_URL=api.base_url,
+               DATABASE_PATH=db_path,
+               LOG_FILE=os.path.join(workdir, 'bot.log'),
+               LOG_LEVEL=args.log_level,
+               METRICS_PORT='0')
+    options = {
+        'partner_latency': args.partner_latency,
+        'partner_jitter': args.partner_jitter,
+        'partner_error_rate': args.partner_error_rate,
+        'partner_error_latency': args.partner_error_latency,
+        'registered_ratio': args.registered_ratio,
+        'seed': args.seed,
+    }
+    child = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--bot-process', json.dumps(options)],
+        env=env, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+
+    try:
+        await asyncio.wait_for(api.polling_started.wait(), args.startup_timeout)
+
+        stats = LoadStats()
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def limited(index):
+            async with semaphore:
+                await drive_user(api, index, args, stats)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(limited(i) for i in range(args.users)))
+        elapsed = time.perf_counter() - started
+    finally:
+        child.send_signal(signal.SIGTERM)
+        await asyncio.to_thread(child.wait)
+        await api.stop()
+
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        'commit': git_commit(),
+        'params': {k: v for k, v in vars(args).items() if k not in ('json', 'bot_process')},
+        'elapsed_s': round(elapsed, 3),
+        'updates_sent': stats.updates_sent,
+        'updates_per_s': round(stats.updates_sent / elapsed, 2) if elapsed else 0.0,
+        'timeouts': stats.timeouts,
+        'outcomes': dict(stats.outcomes),
+        'latency_ms': {
+            step: {
+                'p50': round(percentile(sorted(values), 50) * 1000, 2),
+                'p99': round(percentile(sorted(values), 99) * 1000, 2),
+                'n': len(values),
+            }
+            for step, values in stats.latencies.items()
+        },
+        'bot_cpu_s': round(usage.ru_utime + usage.ru_stime, 3),
+        'bot_max_rss_mb': round(usage.ru_maxrss / 1024, 1),
+        'api_requests': dict(api.requests),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return 'unknown'
+
+
+def print_report(result: dict):
+    print(f"commit {result['commit']}  users={result['params']['users']} "
+          f"concurrency={result['params']['concurrency']}")
+    print(f"  elapsed:        {result['elapsed_s']:.2f}s")
+    print(f"  updates:        {result['updates_sent']} ({result['updates_per_s']:.1f}/s)")
+    print(f"  timeouts:       {result['timeouts']}")
+    print(f"  outcomes:       {result['outcomes']}")
+    print(f"  bot CPU:        {result['bot_cpu_s']:.2f}s")
+    print(f"  bot peak RSS:   {result['bot_max_rss_mb']:.1f} MiB")
+    print("  latency (ms)         p50        p99")
+    for step, values in result['latency_ms'].items():
+        print(f"    {step:<14} {values['p50']:>9.1f}  {values['p99']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=100, help='users in flight at once')
+    parser.add_argument('--verify-command-percent', type=int, default=25,
+                        help='share of users who use /verify <id> instead of sending the ID')
+    parser.add_argument('--partner-latency', type=float, default=0.05, help='mean partner bot reply time (s)')
+    parser.add_argument('--partner-jitter', type=float, default=0.01)
+    parser.add_argument('--partner-error-rate', type=float, default=0.0)
+    parser.add_argument('--partner-error-latency', type=float, default=1.0)
+    parser.add_argument('--registered-ratio', type=float, default=0.7)
+    parser.add_argument('--api-latency', type=float, default=0.0, help='added delay per Bot API call (s)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--log-level', default='WARNING')
+    parser.add_argument('--step-timeout', type=float, default=120)
+    parser.add_argument('--startup-timeout', type=float, default=60)
+    parser.add_argument('--json', help='append the result as a JSON line to this file')
+    parser.add_argument('--bot-process', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.bot_process:
+        serve_bot(json.loads(args.bot_process))
+        return
+
+    result = asyncio.run(run_load(args))
+    print_report(result)
+    if args.json:
+        with open(args.json, 'a') as f:
+            f.write(json.dumps(result) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Event loop monitor overhead and lag report
+
+Runs loop_monitor.LoopMonitor on a loop busy with short callbacks and prints
+the monitor's overhead, then the lag percentiles of a healthy loop and what
+the monitor recorded after the loop was blocked on purpose by a synchronous
+call (time.sleep standing in for subprocess.run or a slow sqlite3 query).
+Stall capture and the watchdog are covered by tests/test_loop_monitor.py.
+
+Usage: python bench_loop_monitor.py [--block 0.8]
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from config import Config
+from loop_monitor import LoopMonitor
+
+
+def blocking_partner_call(seconds: float):
+    """Stands in for a synchronous call made on the event loop thread"""
+    time.sleep(seconds)
+
+
+async def busy_loop(iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await asyncio.sleep(0)
+    return time.perf_counter() - started
+
+
+async def run(args):
+    Config.LOOP_LAG_INTERVAL = 0.02
+    Config.LOOP_LAG_THRESHOLD = 0.2
+    Config.LOOP_WATCHDOG_SECONDS = 0
+
+    baseline = min([await busy_loop(200_000) for _ in range(3)])
+    monitor = LoopMonitor()
+    monitor.start()
+    monitored = min([await busy_loop(200_000) for _ in range(3)])
+    print(f"busy loop: {baseline * 1000:.0f}ms without monitor, {monitored * 1000:.0f}ms with "
+          f"({(monitored / baseline - 1) * 100:+.1f}%)")
+
+    await asyncio.sleep(1)
+    healthy = monitor.summary()
+    print(f"healthy: n={healthy['count']} p50={healthy['p50'] * 1000:.1f}ms p99={healthy['p99'] * 1000:.1f}ms")
+
+    blocking_partner_call(args.block)
+    await asyncio.sleep(0.1)
+    stalls = monitor.recent_stalls()
+    lag = monitor.summary()
+    print(f"after blocking {args.block}s: max lag {lag['max'] * 1000:.0f}ms, {len(stalls)} stall(s)")
+    if stalls:
+        print(f"  blocked {stalls[0]['blocked']:.2f}s in {stalls[0]['stack'].splitlines()[-2].strip()}")
+    monitor.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--block', type=float, default=0.8, help='seconds to block the loop for')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
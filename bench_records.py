@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the row records returned by Database
+
+Generates --rows synthetic users, VIP links and verification attempts
+(bench_database.generate) and reads each table whole in three shapes:
+  - dict:   one dict per row, as Database built them before the records;
+  - tuple:  SQLite's plain row tuples;
+  - record: the NamedTuple records (UserRecord, LinkRecord, AttemptRecord).
+Prints the Python memory each result list holds (tracemalloc) and how long
+it took to build, then the peak memory of streaming every user through
+Database.iter_users, against what one 1000-user batch of records holds.
+The records' values and iter_users' order are covered by
+tests/test_database.py.
+
+Usage: python bench_records.py [--rows 1000000]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+from bench_database import generate
+from database import AttemptRecord, Database, LinkRecord, UserRecord, _columns, _record_cursor
+
+TABLES = (
+    ('users', UserRecord),
+    ('vip_links', LinkRecord),
+    ('verification_attempts', AttemptRecord),
+)
+
+
+def read_dicts(conn: sqlite3.Connection, table: str, record_type) -> list:
+    fields = record_type._fields
+    return [dict(zip(fields, row)) for row in conn.execute(f'SELECT {_columns(record_type)} FROM {table}')]
+
+
+def read_tuples(conn: sqlite3.Connection, table: str, record_type) -> list:
+    return conn.execute(f'SELECT {_columns(record_type)} FROM {table}').fetchall()
+
+
+def read_records(conn: sqlite3.Connection, table: str, record_type) -> list:
+    cursor = _record_cursor(conn, record_type)
+    cursor.execute(f'SELECT {_columns(record_type)} FROM {table}')
+    return cursor.fetchall()
+
+
+def measure(func) -> tuple:
+    """(result, seconds untraced, bytes the result holds, peak bytes while building it)"""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = func()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, held, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000, help='rows per table')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='quotex_records_') as workdir:
+        db_path = os.path.join(workdir, 'bench.db')
+        db = Database(db_path)
+        generate(db_path, args.rows, args.rows, args.rows, args.seed)
+
+        print(f"\n{'table':<22} {'shape':<7} {'rows':>9} {'held':>10} {'bytes/row':>10} {'peak':>10} {'time':>8}")
+        held_by = {}
+        conn = sqlite3.connect(db_path)
+        for table, record_type in TABLES:
+            for shape, read in (('dict', read_dicts), ('tuple', read_tuples), ('record', read_records)):
+                rows, elapsed, held, peak = measure(lambda: read(conn, table, record_type))
+                held_by[table, shape] = held
+                print(f"{table:<22} {shape:<7} {len(rows):>9} {held / 2**20:>6.1f} MiB {held / len(rows):>10.0f} "
+                      f"{peak / 2**20:>6.1f} MiB {elapsed:>7.2f}s")
+                del rows
+        conn.close()
+
+        count = 0
+        tracemalloc.start()
+        start = time.perf_counter()
+        for _ in db.iter_users():
+            count += 1
+        elapsed = time.perf_counter() - start
+        stream_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{'users':<22} {'stream':<7} {count:>9} {'':>10} {'':>10} {stream_peak / 2**20:>6.1f} MiB "
+              f"{elapsed:>7.2f}s  (Database.iter_users, traced)\n")
+
+        batch_bytes = held_by['users', 'record'] / args.rows * 1000
+        print(f"iter_users peak: {stream_peak / batch_bytes:.1f}x one 1000-user batch of records "
+              f"({batch_bytes / 2**20:.1f} MiB)")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
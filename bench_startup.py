@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the Quotex VIP Channel Bot
+
+Measures, in fresh processes:
+  - the time to import the bot module, and the slowest imports (-X importtime)
+  - the time from process spawn to the first getUpdates call, to the first
+    /start reply, and to verification becoming available. The bot runs against
+    the local fake Bot API, and a mock verification backend takes
+    --connect-delay seconds to pass its connection test.
+
+Usage: python bench_startup.py [--runs 5] [--connect-delay 15]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_load import FAKE_TOKEN
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure_import(runs: int):
+    """Wall time of `import bot` in a fresh interpreter, plus the slowest modules"""
+    timings = []
+    stderr = ''
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import bot'],
+                                cwd=HERE, capture_output=True, text=True)
+        timings.append(time.perf_counter() - started)
+        stderr = result.stderr
+
+    # Lines look like: "import time:  self [us] | cumulative | imported package"
+    modules = []
+    for line in stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            modules.append((int(parts[1]), parts[2].rstrip()))
+    # Direct imports of the bot module are indented by one level
+    direct = [(cumulative, name) for cumulative, name in modules if len(name) - len(name.lstrip()) == 3]
+    return timings, sorted(direct, reverse=True)[:10]
+
+
+async def measure_cold_start(connect_delay: float, timeout: float) -> dict:
+    """Spawn the bot and time its way to serving /start and verifications"""
+    from fake_bot_api import FakeBotAPI
+    from config import Config
+
+    api = FakeBotAPI()
+    await api.start()
+    workdir = tempfile.mkdtemp(prefix='quotex_startup_')
+    env = dict(os.environ,
+               BOT_TOKEN=FAKE_TOKEN,
+               BOT_API_BASE_URL=api.base_url,
+               DATABASE_PATH=os.path.join(workdir, 'startup.db'),
+               LOG_FILE=os.path.join(workdir, 'bot.log'),
+               LOG_LEVEL='WARNING',
+               VERIFICATION_WARMUP_RETRY_SECONDS='1')
+    options = {
+        'partner_latency': 0.0, 'partner_jitter': 0.0, 'partner_error_rate': 0.0,
+        'partner_error_latency': 0.0, 'registered_ratio': 0.0, 'seed': 1,
+        'connect_delay': connect_delay,
+    }
+
+    spawned = time.perf_counter()
+    child = subprocess.Popen([sys.executable, os.path.join(HERE, 'bench_load.py'), '--bot-process', json.dumps(options)],
+                             env=env, cwd=HERE)
+    result = {}
+    try:
+        await asyncio.wait_for(api.polling_started.wait(), timeout)
+        result['first_get_updates_s'] = time.perf_counter() - spawned
+
+        api.push_message(1, '/start')
+        await api.next_outgoing(1, timeout)
+        result['first_start_reply_s'] = time.perf_counter() - spawned
+
+        # Probe /verify until the bot stops answering "warming up"
+        probe_user = 2
+        while time.perf_counter() - spawned < timeout:
+            api.push_message(probe_user, '/verify 12345678')
+            reply = await api.next_outgoing(probe_user, timeout)
+            if reply.text != Config.VERIFICATION_WARMING_UP:
+                result['verification_ready_s'] = time.perf_counter() - spawned
+                break
+            probe_user += 1
+            await asyncio.sleep(0.25)
+    finally:
+        child.terminate()
+        await asyncio.to_thread(child.wait)
+        await api.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--connect-delay', type=float, default=15.0,
+                        help='seconds the verification connection test takes')
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    timings, slowest = measure_import(args.runs)
+    print(f"import bot: median {statistics.median(timings) * 1000:.0f} ms over {args.runs} runs")
+    print("  slowest modules imported by bot (cumulative):")
+    for cumulative, name in slowest:
+        print(f"    {cumulative / 1000:8.1f} ms  {name.strip()}")
+
+    cold = [asyncio.run(measure_cold_start(args.connect_delay, args.timeout)) for _ in range(args.runs)]
+    print(f"\ncold start (verification test takes {args.connect_delay:.1f}s), median of {args.runs} runs:")
+    for key in ('first_get_updates_s', 'first_start_reply_s', 'verification_ready_s'):
+        values = [run[key] for run in cold if key in run]
+        if values:
+            print(f"  {key:<24} {statistics.median(values):8.3f}s")
+        else:
+            print(f"  {key:<24} not reached")
+
+
+if __name__ == '__main__':
+    main()
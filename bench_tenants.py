@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Multi-tenant benchmark
+
+Serves N bots, each with its own fake Bot API (fake_bot_api.py), token,
+referral link and database stocked with its own VIP links, two ways:
+  - separate: one bot process per tenant, as before tenants.py;
+  - shared: one process with a TENANTS_FILE listing all N tenants.
+MockVerificationService stands in for @QuotexPartnerBot. The same synthetic
+Telegram users /verify with every bot. Reports the processes' total RSS and
+CPU time, under load and over an idle window, and their exit codes on
+SIGTERM. Tenant isolation is covered by tests/test_tenants.py.
+
+Usage: python bench_tenants.py [--tenants 4] [--users 50] [--idle 5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+
+def tenant_token(index: int) -> str:
+    """Fixed, syntactically valid tokens; they never leave localhost"""
+    return f'{123456780 + index}:AAFakeTokenForOfflineTenantTesting{index:04d}'
+
+
+def referral_link(index: int) -> str:
+    return f'https://broker-qx.pro/sign-up/?lid={900000 + index}'
+
+
+def serve_host(options: dict):
+    """Child process: every tenant in TENANTS_FILE, in one process"""
+    from tenants import load_tenants
+    from logging_setup import setup_logging
+    tenants = load_tenants()
+    setup_logging(secrets=[tenant.BOT_TOKEN for tenant in tenants])
+
+    from bot import build_host
+    from verification_mock import MockVerificationService
+    service = MockVerificationService(latency=options['partner_latency'], registered_ratio=1.0, connect_delay=0,
+                                      seed=options['seed'])
+    build_host(tenants, service).run()
+
+
+def bot_options(args) -> dict:
+    return {
+        'partner_latency': args.partner_latency,
+        'partner_jitter': 0.0,
+        'partner_error_rate': 0.0,
+        'partner_error_latency': None,
+        'registered_ratio': 1.0,
+        'connect_delay': 0,
+        'seed': args.seed,
+    }
+
+
+def process_usage(pid: int) -> tuple:
+    """(RSS in MiB, CPU seconds) of a running process, from /proc"""
+    with open(f'/proc/{pid}/status') as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return rss_kb / 1024, (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def total_usage(children) -> tuple:
+    usages = [process_usage(child.pid) for child in children]
+    return sum(rss for rss, _ in usages), sum(cpu for _, cpu in usages)
+
+
+async def drive_tenant(api, args):
+    """Users /verify with one bot, each waiting for the final answer"""
+    api.push_message(4_999_999, '/verify')
+    await api.next_outgoing(4_999_999, args.step_timeout)
+
+    async def verify(user: int):
+        telegram_id = 5_000_000 + user
+        api.push_message(telegram_id, f'/verify {10_000_000 + user}')
+        await api.next_outgoing(telegram_id, args.step_timeout)
+        await api.next_outgoing(telegram_id, args.step_timeout)
+
+    await asyncio.gather(*(verify(user) for user in range(args.users)))
+
+
+async def run_mode(mode: str, args, workdir: str) -> dict:
+    from database import Database
+    from fake_bot_api import FakeBotAPI
+
+    apis = [FakeBotAPI() for _ in range(args.tenants)]
+    for api in apis:
+        await api.start()
+
+    base_env = dict(os.environ, LOG_LEVEL='WARNING', METRICS_PORT='0', BACKUP_INTERVAL_HOURS='0',
+                    LOG_FILE=os.path.join(workdir, f'{mode}.log'), CONFIG_FILE=os.path.join(workdir, 'none.json'))
+    tenants = {}
+    for index, api in enumerate(apis):
+        db_path = os.path.join(workdir, f'{mode}-t{index}.db')
+        Database(db_path).add_vip_links([f'https://t.me/+t{index}_{n}' for n in range(args.users)])
+        tenants[f't{index}'] = {'BOT_TOKEN': tenant_token(index), 'BOT_API_BASE_URL': api.base_url,
+                                'REFERRAL_LINK': referral_link(index), 'DATABASE_PATH': db_path}
+
+    options = json.dumps(bot_options(args))
+    children = []
+    if mode == 'shared':
+        tenants_file = os.path.join(workdir, 'tenants.json')
+        with open(tenants_file, 'w') as f:
+            json.dump(tenants, f)
+        children.append(subprocess.Popen([sys.executable, __file__, '--host-process', options],
+                                         env=dict(base_env, TENANTS_FILE=tenants_file), cwd=HERE))
+    else:
+        for settings in tenants.values():
+            children.append(subprocess.Popen([sys.executable, os.path.join(HERE, 'bench_load.py'),
+                                              '--bot-process', options],
+                                             env=dict(base_env, **settings), cwd=HERE))
+
+    result = {'mode': mode}
+    try:
+        started = time.perf_counter()
+        await asyncio.wait_for(asyncio.gather(*(api.polling_started.wait() for api in apis)), args.startup_timeout)
+        result['startup_s'] = time.perf_counter() - started
+        await asyncio.sleep(0.5)
+        result['rss_started'], cpu_started = total_usage(children)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(drive_tenant(api, args) for api in apis))
+        result['load_s'] = time.perf_counter() - started
+        result['rss_loaded'], cpu_loaded = total_usage(children)
+        result['cpu_load'] = cpu_loaded - cpu_started
+
+        await asyncio.sleep(args.idle)
+        result['rss_idle'], cpu_idle = total_usage(children)
+        result['cpu_idle'] = cpu_idle - cpu_loaded
+    finally:
+        for child in children:
+            child.send_signal(signal.SIGTERM)
+        result['exit_codes'] = [await asyncio.to_thread(child.wait) for child in children]
+        for api in apis:
+            await api.stop()
+    return result
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory(prefix='quotex_tenants_') as workdir:
+        results = [await run_mode(mode, args, workdir) for mode in ('separate', 'shared')]
+        print(f"{args.tenants} tenants, {args.users} verifications each\n")
+        print(f"{'mode':<9} {'processes':>9} {'startup':>8} {'load':>7} {'RSS started':>12} {'RSS loaded':>11} "
+              f"{'CPU load':>9} {'CPU idle/s':>11}  exit codes")
+        for result in results:
+            print(f"{result['mode']:<9} {len(result['exit_codes']):>9} {result['startup_s']:>7.2f}s "
+                  f"{result['load_s']:>6.2f}s {result['rss_started']:>8.1f} MiB {result['rss_loaded']:>7.1f} MiB "
+                  f"{result['cpu_load']:>8.2f}s {result['cpu_idle'] / args.idle:>10.3f}s  {result['exit_codes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tenants', type=int, default=4)
+    parser.add_argument('--users', type=int, default=50, help='verifications per tenant')
+    parser.add_argument('--idle', type=float, default=5, help='seconds of idle CPU to measure')
+    parser.add_argument('--partner-latency', type=float, default=0.02)
+    parser.add_argument('--step-timeout', type=float, default=60)
+    parser.add_argument('--startup-timeout', type=float, default=60)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--host-process', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.host_process:
+        serve_host(json.loads(args.host_process))
+        return
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
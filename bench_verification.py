@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Offline correctness and throughput checks for the verification path
+
+Drives the real VerificationService through partner_bot_simulator's
+transport under a set of fault scenarios, and compares each verdict with the
+simulator's ground truth. By default time is simulated, so runs are
+deterministic and instant; --realtime uses real sleeps and --concurrency
+worker threads sharing one partner bot chat, like the live account.
+
+--outage instead sends lookups through the VerificationScheduler while the
+partner bot goes silent for the middle third of them, with and without the
+circuit breaker, and reports per phase how many lookups got an answer, got
+none (unknown) or were refused, and the mean simulated seconds each took.
+
+Usage: python bench_verification.py [--checks 2000] [--realtime --concurrency 8 --wait 0.05]
+       python bench_verification.py --outage [--checks 300]
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from partner_bot_simulator import PartnerBotSimulator, SimulatedClock, SimulatorTransport
+from verification_scheduler import VerificationScheduler
+from verification_simple import VerificationService
+
+# Fault settings per scenario, as PartnerBotSimulator keyword arguments
+SCENARIOS = {
+    'clean': {},
+    'jitter': {'jitter': 0.5},
+    'slow': {'reply_delay': 4.0},
+    'out_of_order': {'out_of_order_rate': 0.2},
+    'flood': {'flood_rate': 0.1},
+    'malformed': {'malformed_rate': 0.1},
+    'errors': {'error_rate': 0.05},
+    'everything': {'jitter': 0.5, 'out_of_order_rate': 0.1, 'flood_rate': 0.05,
+                   'malformed_rate': 0.05, 'error_rate': 0.02},
+}
+
+
+def build_simulator(faults: dict, registered: list, args, clock) -> PartnerBotSimulator:
+    rng = random.Random(args.seed)
+    simulator = PartnerBotSimulator(seed=args.seed, clock=clock, **faults)
+    for trader_id in registered:
+        simulator.add_trader(trader_id, country=rng.choice(['IN', 'BR', 'ID', 'NG']),
+                             deposits_sum=rng.choice([0, 10, 50, 250.5, 1200]))
+    return simulator
+
+
+def run_scenario(name: str, faults: dict, args) -> dict:
+    rng = random.Random(args.seed)
+    ids = [str(10_000_000 + rng.randrange(90_000_000)) for _ in range(args.checks)]
+    registered = set(ids[:int(len(ids) * args.registered_ratio)])
+
+    if args.realtime:
+        # Scale the simulator's delays from the live 3s wait window to --wait
+        scale = args.wait / 3.0
+        faults = dict(faults, reply_delay=faults.get('reply_delay', 0.5) * scale,
+                      jitter=faults.get('jitter', 0.0) * scale)
+        simulator = build_simulator(faults, registered, args, time.monotonic)
+        transport = SimulatorTransport(simulator, wait=args.wait)
+    else:
+        clock = SimulatedClock()
+        simulator = build_simulator(faults, registered, args, clock.now)
+        transport = SimulatorTransport(simulator, sleep=clock.sleep)
+    service = VerificationService(transport=transport)
+
+    started = time.perf_counter()
+    if args.realtime and args.concurrency > 1:
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            verdicts = list(pool.map(service.verify_quotex_user, ids))
+    else:
+        verdicts = [service.verify_quotex_user(quotex_id) for quotex_id in ids]
+    elapsed = time.perf_counter() - started
+
+    false_positive = sum(1 for quotex_id, verdict in zip(ids, verdicts) if verdict and quotex_id not in registered)
+    false_negative = sum(1 for quotex_id, verdict in zip(ids, verdicts) if not verdict and quotex_id in registered)
+    return {
+        'scenario': name,
+        'checks': len(ids),
+        'correct': len(ids) - false_positive - false_negative,
+        'false_positive': false_positive,
+        'false_negative': false_negative,
+        'injected': {k: v for k, v in simulator.injected.items() if v},
+        'checks_per_s': len(ids) / elapsed if elapsed else 0.0,
+    }
+
+
+OUTAGE_PHASES = ('before', 'outage', 'after')
+# Reply delay that keeps the simulated partner bot silent
+SILENT = 1e9
+
+
+async def run_outage(use_breaker: bool, args) -> dict:
+    """Per phase: outcome counts and mean simulated seconds per lookup"""
+    rng = random.Random(args.seed)
+    ids = [str(10_000_000 + rng.randrange(90_000_000)) for _ in range(args.checks)]
+    clock = SimulatedClock()
+    simulator = build_simulator({}, ids[::2], args, clock.now)
+    service = VerificationService(transport=SimulatorTransport(simulator, sleep=clock.sleep))
+    breaker = CircuitBreaker(clock=clock.now) if use_breaker else None
+    scheduler = VerificationScheduler(service, breaker=breaker)
+    await scheduler.start()
+
+    outcomes = defaultdict(Counter)
+    seconds = defaultdict(float)
+    third = len(ids) // 3
+    for i, quotex_id in enumerate(ids):
+        phase = OUTAGE_PHASES[min(i // third, 2)]
+        simulator.reply_delay = SILENT if phase == 'outage' else 0.5
+        clock.sleep(args.outage_gap)
+        started = clock.now()
+        try:
+            outcome = (await scheduler.check(quotex_id)).status
+        except CircuitOpenError:
+            outcome = 'refused'
+        outcomes[phase][outcome] += 1
+        seconds[phase] += clock.now() - started
+    await scheduler.stop()
+    return {phase: (outcomes[phase], seconds[phase] / max(1, sum(outcomes[phase].values())))
+            for phase in OUTAGE_PHASES}
+
+
+def main_outage(args):
+    print(f"{args.checks} lookups, {args.outage_gap:.0f}s apart; partner bot silent for the middle third")
+    print(f"{'breaker':<8} {'phase':<7} {'answered':>9} {'unknown':>8} {'refused':>8} {'s/lookup':>9}")
+    for use_breaker in (False, True):
+        result = asyncio.run(run_outage(use_breaker, args))
+        for phase in OUTAGE_PHASES:
+            outcomes, mean_seconds = result[phase]
+            answered = sum(count for outcome, count in outcomes.items() if outcome not in ('unknown', 'refused'))
+            print(f"{'on' if use_breaker else 'off':<8} {phase:<7} {answered:>9} {outcomes['unknown']:>8} "
+                  f"{outcomes['refused']:>8} {mean_seconds:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checks', type=int, default=2000)
+    parser.add_argument('--registered-ratio', type=float, default=0.5)
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='run only these scenarios (repeatable)')
+    parser.add_argument('--realtime', action='store_true', help='use real sleeps instead of a simulated clock')
+    parser.add_argument('--wait', type=float, default=0.05,
+                        help='reply wait in --realtime mode (s); simulator delays are scaled to match')
+    parser.add_argument('--concurrency', type=int, default=1, help='worker threads in --realtime mode')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--outage', action='store_true', help='run the circuit breaker outage scenario')
+    parser.add_argument('--outage-gap', type=float, default=10.0,
+                        help='simulated seconds between lookups in --outage mode')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+
+    if args.outage:
+        main_outage(args)
+        return
+
+    print(f"{'scenario':<14} {'checks':>7} {'correct':>8} {'false+':>7} {'false-':>7} {'checks/s':>10}  injected")
+    for name in args.scenario or SCENARIOS:
+        result = run_scenario(name, SCENARIOS[name], args)
+        print(f"{result['scenario']:<14} {result['checks']:>7} {result['correct']:>8} "
+              f"{result['false_positive']:>7} {result['false_negative']:>7} "
+              f"{result['checks_per_s']:>10.1f}  {result['injected'] or ''}")
+
+
+if __name__ == '__main__':
+    main()
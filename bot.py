@@ -2,49 +2,241 @@
 Main bot implementation for Quotex VIP Channel Bot
 """
 
+import asyncio
+import functools
 import logging
 import re
-from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+import time
+from typing import List, Optional
+from telegram import Bot, Update
+from telegram.error import RetryAfter
+from telegram.ext import Application, ChatMemberHandler, CommandHandler, MessageHandler, filters, ContextTypes
 from database import Database
-from verification_simple import VerificationService
 from admin import AdminHandler
 from config import Config
+from bot_host import BotHost, SharedServices
+from tenants import DEFAULT_TENANT, Tenant
+from reverification import ReverificationJob
+from link_generator import InviteLinkGenerator
+from link_reclaim import MEMBER_STATUSES, LinkReclaimer, is_vip_channel
+from abuse import ENUMERATION, AbuseDetector
+from circuit_breaker import CLOSED, OPEN, CircuitOpenError
+from response_classifier import UNKNOWN, ClassifiedReply
+from logging_setup import log_event
+from tracing import tracer
+from backup import BackupJob
+from metrics import (UPDATES_TOTAL, VERIFICATIONS_TOTAL, VERIFICATION_LATENCY, VERIFICATIONS_IN_FLIGHT,
+                     BROADCAST_MESSAGES_TOTAL, CHANNEL_JOINS_TOTAL)
 
 logger = logging.getLogger(__name__)
 
 class QuotexVIPBot:
-    def __init__(self):
-        self.token = Config.BOT_TOKEN
-        self.db = Database(Config.DATABASE_PATH)
-        self.verification_service = VerificationService()
-        self.admin_handler = AdminHandler(self.db)
+    def __init__(self, verification_service=None, tenant: Optional[Tenant] = None,
+                 shared: Optional[SharedServices] = None):
+        """
+        tenant: this bot's settings (tenants.py); the default reads everything from Config
+        shared: partner bot backend and HTTP pools shared with the other bots of the process
+        """
+        self.tenant = tenant or DEFAULT_TENANT
+        self.shared = shared or SharedServices(verification_service)
+        self.shared.register(self)
+        self.token = self.tenant.BOT_TOKEN
+        self.db = Database(self.tenant.DATABASE_PATH)
+        # Stops ID enumeration and one Quotex ID unlocking several accounts
+        self.abuse = AbuseDetector(self.db)
+        self.breaker = self.shared.breaker
+        self.scheduler = self.shared.scheduler
 
         if not self.token:
             raise ValueError("BOT_TOKEN not provided in environment variables")
 
-        # Initialize the application
-        self.application = Application.builder().token(self.token).build()
+        self._reverify_task = None
+        self._pending_task = None
+        self._pending_wakeup = asyncio.Event()
+        # Graceful shutdown: verifications being processed, the subset still
+        # waiting on the partner bot, and whether new ones are still taken
+        self.accepting_verifications = True
+        self._verification_tasks = set()
+        self._awaiting_backend = set()
+        self._link_generator_task = None
+        self._link_reclaim_task = None
+        self._backup_task = None
+        # Admin alerts being sent; the event loop only holds tasks weakly
+        self._alert_tasks = set()
+
+        # Initialize the application, with the shared connection pools for
+        # replies and for the getUpdates long poll
+        builder = (
+            Application.builder()
+            .token(self.token)
+            .request(self.shared.replies_request)
+            .get_updates_request(self.shared.updates_request)
+        )
+        bot_kwargs = {}
+        if self.tenant.BOT_API_BASE_URL:
+            builder = builder.base_url(self.tenant.BOT_API_BASE_URL)
+            bot_kwargs['base_url'] = self.tenant.BOT_API_BASE_URL
+        self.application = builder.build()
+        # Broadcasts go through their own Bot and pool so they cannot starve replies;
+        # it never polls, so its getUpdates slot takes the bulk pool rather than a client of its own
+        self.bulk_bot = Bot(self.token, request=self.shared.bulk_request,
+                            get_updates_request=self.shared.bulk_request, **bot_kwargs)
+        # Invite link creation is background work, so it shares the bulk pool
+        self.link_generator = InviteLinkGenerator(self.bulk_bot, self.db, self.tenant)
+        self.link_reclaimer = LinkReclaimer(self.bulk_bot, self.db, on_revoked=self.link_generator.wake,
+                                            tenant=self.tenant)
+        self.backup_job = BackupJob(self.tenant.DATABASE_PATH)
+        self.admin_handler = AdminHandler(self.db, self.link_generator, self.backup_job, self.tenant)
         self._setup_handlers()
 
+    @property
+    def verification_ready(self) -> bool:
+        """Whether the shared verification backend has passed its connection test"""
+        return self.shared.verification_ready
+
     def _setup_handlers(self):
         """Setup command and message handlers"""
         # User commands
         self.application.add_handler(CommandHandler("start", self.start_command))
         self.application.add_handler(CommandHandler("help", self.help_command))
-        self.application.add_handler(CommandHandler("verify", self.verify_command))
+        # Verifications wait on the partner bot, so they must not hold up other updates
+        self.application.add_handler(CommandHandler("verify", self.verify_command, block=False))
 
         # Admin commands
         self.application.add_handler(CommandHandler("admin_add_links", self.admin_handler.add_links_command))
+        self.application.add_handler(CommandHandler("admin_generate_links", self.admin_handler.generate_links_command,
+                                                    block=False))
         self.application.add_handler(CommandHandler("admin_stats", self.admin_handler.stats_command))
         self.application.add_handler(CommandHandler("admin_users", self.admin_handler.users_command))
         self.application.add_handler(CommandHandler("admin_broadcast", self.admin_handler.broadcast_command))
+        self.application.add_handler(CommandHandler("admin_deposits", self.admin_handler.deposits_command))
+        self.application.add_handler(CommandHandler("admin_trader", self.admin_handler.trader_command))
+        self.application.add_handler(CommandHandler("admin_abuse", self.admin_handler.abuse_command))
+        self.application.add_handler(CommandHandler("admin_backup", self.admin_handler.backup_command, block=False))
+        self.application.add_handler(CommandHandler("admin_export", self.admin_handler.export_command, block=False))
+        self.application.add_handler(CommandHandler("admin_latency", self.admin_handler.latency_command))
+        self.application.add_handler(CommandHandler("admin_loop", self.admin_handler.loop_command))
+        self.application.add_handler(CommandHandler("admin_profile_start", self.admin_handler.profile_start_command))
+        self.application.add_handler(CommandHandler("admin_profile_stop", self.admin_handler.profile_stop_command))
+        self.application.add_handler(CommandHandler("admin_reload", self.admin_handler.reload_command))
+
+        # Joins to the VIP channel, to tell used links from ones to reclaim
+        self.application.add_handler(ChatMemberHandler(self.handle_chat_member, ChatMemberHandler.CHAT_MEMBER))
 
         # Message handlers
-        self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
+        self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message, block=False))
+
+        # Count dispatched updates per handler for the metrics endpoint
+        for handlers in self.application.handlers.values():
+            for handler in handlers:
+                handler.callback = self._counted(handler)
 
         logger.info("Bot handlers setup complete")
 
+    def _counted(self, handler):
+        """Wrap a handler callback so each dispatched update is counted"""
+        callback = handler.callback
+        commands = getattr(handler, 'commands', None)
+        name = sorted(commands)[0] if commands else callback.__name__
+        counter = UPDATES_TOTAL.labels(name)
+
+        @functools.wraps(callback)
+        async def wrapper(update, context):
+            counter.inc()
+            return await callback(update, context)
+        return wrapper
+
+    async def start(self):
+        """Initialize the bot, start its background jobs and begin polling (called by BotHost)"""
+        await self._initialize_bot(self.application.bot, self.shared.replies_request, self.shared.updates_request)
+        await self.application.initialize()
+        await self._initialize_bot(self.bulk_bot, self.shared.bulk_request, self.shared.bulk_request)
+        self._pending_task = asyncio.create_task(self._retry_pending_verifications())
+        self._backup_task = asyncio.create_task(self.backup_job.run())
+        if self.tenant.VIP_CHANNEL_ID:
+            self._link_generator_task = asyncio.create_task(self.link_generator.run())
+            self._link_reclaim_task = asyncio.create_task(self.link_reclaimer.run())
+
+        # Stop signals are handled by BotHost, which drains verifications first;
+        # updates sent while the bot was down are kept unless DROP_PENDING_UPDATES is set
+        await self.application.updater.start_polling(
+            allowed_updates=['message', 'callback_query', 'chat_member'],
+            drop_pending_updates=Config.DROP_PENDING_UPDATES,
+        )
+        await self.application.start()
+        logger.info(f"Bot {self.tenant.tenant_id} is polling")
+
+    async def stop(self):
+        """Stop polling, wait for running handlers, then stop background jobs (called by BotHost)"""
+        if self.application.updater.running:
+            await self.application.updater.stop()
+        if self.application.running:
+            await self.application.stop()
+        await self.application.shutdown()
+        # Not shut down by the application if it failed to initialize after the bot did
+        await self.application.bot.shutdown()
+        for task in (self._reverify_task, self._pending_task, self._link_generator_task,
+                     self._link_reclaim_task, self._backup_task, *self._alert_tasks):
+            if task:
+                task.cancel()
+        await self.bulk_bot.shutdown()
+        self.db.close()
+
+    @staticmethod
+    async def _initialize_bot(bot: Bot, *requests):
+        """
+        Bot.initialize acquires its (shared, reference-counted) requests before
+        checking the token with getMe, and a bot that fails there is never shut
+        down, so give them back
+        """
+        try:
+            await bot.initialize()
+        except Exception:
+            await asyncio.gather(*(request.shutdown() for request in requests))
+            raise
+
+    async def drain(self):
+        """
+        Stop taking verifications, give in-flight ones SHUTDOWN_DRAIN_SECONDS to
+        finish, and persist the ones still waiting on the partner bot as pending
+        verifications for the next start. stop() then waits for the rest.
+        """
+        self.accepting_verifications = False
+        for task in (self._reverify_task, self._pending_task):
+            if task:
+                task.cancel()
+
+        finished = persisted = 0
+        in_flight = set(self._verification_tasks)
+        if in_flight:
+            done, still_running = await asyncio.wait(in_flight, timeout=Config.SHUTDOWN_DRAIN_SECONDS)
+            finished = len(done)
+            # Those past the lookup are only writing to the DB and replying; let them finish
+            for task in still_running & self._awaiting_backend:
+                task.cancel()
+                persisted += 1
+        log_event(logger, 'shutdown_drained',
+                  f"Shutdown drain: {finished} verification(s) finished, {persisted} saved for the next start",
+                  finished=finished, persisted=persisted)
+
+    def _create_task(self, coroutine) -> asyncio.Task:
+        """Start a task on this bot's behalf from shared code, tagged with the tenant"""
+        return asyncio.create_task(coroutine, context=self.tenant.context.copy())
+
+    def on_verification_ready(self):
+        """Called by SharedServices once the verification backend passed its connection test"""
+        if Config.REVERIFY_BUDGET > 0:
+            self._reverify_task = self._create_task(ReverificationJob(self.db, self.scheduler).run())
+        # Verifications queued before a restart can be retried now
+        self._pending_wakeup.set()
+
+    async def _reply_if_warming_up(self, update: Update) -> bool:
+        """Tell the user verification is not available yet; True if it is still warming up"""
+        if self.verification_ready:
+            return False
+        await update.message.reply_text(self.tenant.VERIFICATION_WARMING_UP)
+        return True
+
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command"""
         if not update.message:
@@ -54,7 +246,7 @@ class QuotexVIPBot:
         logger.info(f"User {user.id} ({user.username}) started the bot")
 
         await update.message.reply_text(
-            Config.WELCOME_MESSAGE
+            self.tenant.WELCOME_MESSAGE
         )
 
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -63,7 +255,7 @@ class QuotexVIPBot:
             return
 
         await update.message.reply_text(
-            Config.HELP_MESSAGE
+            self.tenant.HELP_MESSAGE
         )
 
     async def verify_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -75,16 +267,18 @@ class QuotexVIPBot:
         telegram_id = user.id
 
         # Check if user is already verified
-        if self.db.is_user_verified(telegram_id):
-            await update.message.reply_text(Config.ALREADY_VERIFIED)
+        with tracer.span('db_check'):
+            already_verified = self.db.is_user_verified(telegram_id)
+        if already_verified:
+            await self._reply_already_verified(update, telegram_id)
             return
 
         # Get Quotex user ID from command arguments
         if not context.args:
             await update.message.reply_text(
-                f"{Config.INVALID_USER_ID}\n\n"
+                f"{self.tenant.INVALID_USER_ID}\n\n"
                 f"🔗 **Haven't registered yet?**\n"
-                f"Register first: https://broker-qx.pro/sign-up/?lid=996329"
+                f"Register first: {self.tenant.REFERRAL_LINK}"
             )
             return
 
@@ -93,61 +287,20 @@ class QuotexVIPBot:
         # Validate Quotex user ID format (basic validation)
         if not self._is_valid_quotex_id(quotex_user_id):
             await update.message.reply_text(
-                f"{Config.INVALID_USER_ID}\n\n"
+                f"{self.tenant.INVALID_USER_ID}\n\n"
                 f"🔗 **Haven't registered yet?**\n"
-                f"Register first: https://broker-qx.pro/sign-up/?lid=996329"
+                f"Register first: {self.tenant.REFERRAL_LINK}"
             )
             return
 
-        logger.info(f"Verification request from {telegram_id} for Quotex ID: {quotex_user_id}")
-
-        # Send processing message
-        processing_msg = await update.message.reply_text(
-            "🔍 Verifying your Quotex registration with our partner bot...\n"
-            "⏳ This may take a few moments, please wait..."
-        )
-
-        try:
-            # Verify with external service (this may take a few seconds)
-            is_verified = self.verification_service.verify_quotex_user(quotex_user_id)
-
-            # Log the verification attempt
-            self.db.log_verification_attempt(telegram_id, quotex_user_id, is_verified)
-
-            if is_verified:
-                # Get an unused VIP link
-                vip_link_data = self.db.get_unused_vip_link()
-
-                if not vip_link_data:
-                    await processing_msg.edit_text(Config.NO_LINKS_AVAILABLE)
-                    return
-
-                link_id, vip_link = vip_link_data
-
-                # Mark link as used and add user to database
-                if self.db.mark_link_as_used(link_id, telegram_id):
-                    self.db.add_user(telegram_id, quotex_user_id, link_id)
-
-                    # Send success message with VIP link
-                    success_message = (
-                        f"{Config.VERIFICATION_SUCCESS}\n\n"
-                        f"🔗 {vip_link}\n\n"
-                        f"⚠️ This link is unique to you and can only be used once. "
-                        f"Don't share it with others!"
-                    )
+        log_event(logger, 'verification_requested',
+                  f"Verification request from {telegram_id} for Quotex ID: {quotex_user_id}",
+                  telegram_id=telegram_id, quotex_user_id=quotex_user_id, source='command')
 
-                    await processing_msg.edit_text(success_message)
-
-                    logger.info(f"User {telegram_id} successfully verified and received VIP link")
-                else:
-                    await processing_msg.edit_text("❌ Error processing your verification. Please try again.")
-            else:
-                await processing_msg.edit_text(Config.VERIFICATION_FAILED)
-                logger.info(f"Verification failed for user {telegram_id} with Quotex ID: {quotex_user_id}")
+        if await self._reply_if_warming_up(update):
+            return
 
-        except Exception as e:
-            logger.error(f"Error during verification process: {e}")
-            await processing_msg.edit_text("❌ An error occurred during verification. Please try again later.")
+        await self._process_verification(update, quotex_user_id)
 
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle non-command messages"""
@@ -162,10 +315,16 @@ class QuotexVIPBot:
             telegram_id = user.id
 
             # Check if user is already verified
-            if self.db.is_user_verified(telegram_id):
-                await update.message.reply_text(Config.ALREADY_VERIFIED)
+            with tracer.span('db_check'):
+                already_verified = self.db.is_user_verified(telegram_id)
+            if already_verified:
+                await self._reply_already_verified(update, telegram_id)
                 return
 
+            # Store the user ID for verification confirmation before asking, since
+            # the user's answer may be handled while this handler is still running
+            context.user_data['pending_verification'] = message_text
+
             # Ask if they want to verify this user ID
             await update.message.reply_text(
                 f"🆔 I detected a Quotex User ID: `{message_text}`\n\n"
@@ -173,18 +332,19 @@ class QuotexVIPBot:
                 f"✅ Type **yes** or **y** to verify\n"
                 f"❌ Type **no** or **n** to cancel\n\n"
                 f"⚠️ **Important:** Make sure you registered using our referral link:\n"
-                f"👉 https://broker-qx.pro/sign-up/?lid=996329",
+                f"👉 {self.tenant.REFERRAL_LINK}",
                 parse_mode='Markdown'
             )
 
-            # Store the user ID for verification confirmation
-            context.user_data['pending_verification'] = message_text
-
         elif message_text.lower() in ['yes', 'y', 'verify', 'confirm']:
             # Check if there's a pending verification
             pending_id = context.user_data.get('pending_verification')
             
             if pending_id:
+                # Keep the pending ID so the user can confirm again once ready
+                if await self._reply_if_warming_up(update):
+                    return
+
                 # Clear the pending verification
                 del context.user_data['pending_verification']
                 
@@ -208,7 +368,7 @@ class QuotexVIPBot:
                 await update.message.reply_text(
                     "❓ There's nothing to cancel.\n\n"
                     "📝 **To get VIP access:**\n"
-                    "1️⃣ Register: https://broker-qx.pro/sign-up/?lid=996329\n"
+                    f"1️⃣ Register: {self.tenant.REFERRAL_LINK}\n"
                     "2️⃣ Send your Quotex User ID\n\n"
                     "💬 Type /help for more information."
                 )
@@ -217,7 +377,7 @@ class QuotexVIPBot:
             await update.message.reply_text(
                 "❓ I didn't understand that.\n\n"
                 "📝 **To get VIP access:**\n"
-                "1️⃣ Register: https://broker-qx.pro/sign-up/?lid=996329\n"
+                f"1️⃣ Register: {self.tenant.REFERRAL_LINK}\n"
                 "2️⃣ Send your Quotex User ID (numbers only)\n\n"
                 "💬 Type /help for more information."
             )
@@ -239,97 +399,314 @@ class QuotexVIPBot:
         if not update.message:
             return
 
+        if not self.accepting_verifications:
+            # Shutting down: keep the request for the next start instead of starting it
+            self._queue_verification(update.message.from_user.id, quotex_user_id, reason='shutdown')
+            await update.message.reply_text(self.tenant.VERIFICATION_INTERRUPTED)
+            return
+
+        task = asyncio.current_task()
+        self._verification_tasks.add(task)
+        VERIFICATIONS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            with tracer.trace(), tracer.span('total'):
+                await self._run_verification(update, quotex_user_id)
+        finally:
+            self._verification_tasks.discard(task)
+            VERIFICATIONS_IN_FLIGHT.dec()
+            VERIFICATION_LATENCY.observe(time.perf_counter() - start)
+
+    async def _run_verification(self, update: Update, quotex_user_id: str):
+        """Verification pipeline; each stage is timed as a tracing span"""
         user = update.message.from_user
         telegram_id = user.id
 
-        logger.info(f"Processing verification for {telegram_id} with Quotex ID: {quotex_user_id}")
+        with tracer.span('abuse_check'):
+            blocked = self.abuse.check(telegram_id, quotex_user_id)
+        if blocked:
+            VERIFICATIONS_TOTAL.labels('blocked').inc()
+            await update.message.reply_text(
+                self.tenant.TOO_MANY_IDS if blocked == ENUMERATION else self.tenant.QUOTEX_ID_IN_USE
+            )
+            return
+        self.abuse.record(telegram_id, quotex_user_id)
+
+        log_event(logger, 'verification_started',
+                  f"Processing verification for {telegram_id} with Quotex ID: {quotex_user_id}",
+                  telegram_id=telegram_id, quotex_user_id=quotex_user_id)
 
         # Send processing message
-        processing_msg = await update.message.reply_text(
-            "🔍 Verifying your Quotex registration with our partner bot...\n"
-            "⏳ This may take a few moments, please wait..."
-        )
+        with tracer.span('telegram_reply'):
+            processing_msg = await update.message.reply_text(
+                "🔍 Verifying your Quotex registration with our partner bot...\n"
+                "⏳ This may take a few moments, please wait..."
+            )
 
         try:
             # Verify with external service (this may take a few seconds)
-            is_verified = self.verification_service.verify_quotex_user(quotex_user_id)
-
-            # Log the verification attempt
-            self.db.log_verification_attempt(telegram_id, quotex_user_id, is_verified)
+            with tracer.span('verification_service'):
+                self._awaiting_backend.add(asyncio.current_task())
+                try:
+                    reply = await self.scheduler.check(quotex_user_id)
+                except CircuitOpenError:
+                    reply = ClassifiedReply(UNKNOWN)
+                except asyncio.CancelledError:
+                    if not self.accepting_verifications:
+                        # Cut off by the shutdown drain; resumed after the restart
+                        self._queue_verification(telegram_id, quotex_user_id, reason='shutdown')
+                        await self._edit_quietly(processing_msg, self.tenant.VERIFICATION_INTERRUPTED)
+                    raise
+                finally:
+                    self._awaiting_backend.discard(asyncio.current_task())
+
+            if not reply.conclusive:
+                # The backend did not answer; never tell the user they are not registered
+                self._queue_verification(telegram_id, quotex_user_id)
+                with tracer.span('telegram_edit'):
+                    await processing_msg.edit_text(self.tenant.VERIFICATION_UNAVAILABLE)
+                return
 
-            if is_verified:
-                # Get an unused VIP link
-                vip_link_data = self.db.get_unused_vip_link()
+            result_message = await self._complete_verification(telegram_id, quotex_user_id, reply)
+            with tracer.span('telegram_edit'):
+                await processing_msg.edit_text(result_message)
 
-                if not vip_link_data:
-                    await processing_msg.edit_text(Config.NO_LINKS_AVAILABLE)
-                    return
+        except Exception as e:
+            log_event(logger, 'verification_error', f"Error during verification process: {e}",
+                      level=logging.ERROR, telegram_id=telegram_id, quotex_user_id=quotex_user_id)
+            VERIFICATIONS_TOTAL.labels('error').inc()
+            await processing_msg.edit_text("❌ An error occurred during verification. Please try again later.")
 
-                link_id, vip_link = vip_link_data
+    async def _complete_verification(self, telegram_id: int, quotex_user_id: str, reply: ClassifiedReply) -> str:
+        """Record a conclusive partner bot answer and return the message for the user"""
+        is_verified = reply.registered
+
+        # Log the verification attempt, keeping the trader card fields
+        # so admins can look them up without asking the partner bot again
+        with tracer.span('db_log_attempt'):
+            self.db.log_verification_attempt(telegram_id, quotex_user_id, is_verified,
+                                             reply.deposits_sum, reply.country)
+
+        if not is_verified:
+            log_event(logger, 'verification_failed',
+                      f"Verification failed for user {telegram_id} with Quotex ID: {quotex_user_id}",
+                      telegram_id=telegram_id, quotex_user_id=quotex_user_id)
+            VERIFICATIONS_TOTAL.labels('failed').inc()
+            return self.tenant.VERIFICATION_FAILED
+
+        # Another account may have verified this ID while the lookup ran
+        if self.abuse.id_in_use(telegram_id, quotex_user_id):
+            VERIFICATIONS_TOTAL.labels('blocked').inc()
+            return self.tenant.QUOTEX_ID_IN_USE
+
+        # Claim an unused VIP link and add the user in one transaction
+        with tracer.span('link_claim'):
+            vip_link_data = self.db.claim_vip_link(telegram_id, quotex_user_id,
+                                                   reply.deposits_sum, reply.country)
+
+        if not vip_link_data:
+            log_event(logger, 'vip_links_exhausted',
+                      f"No VIP link available for verified user {telegram_id}",
+                      level=logging.WARNING, telegram_id=telegram_id, quotex_user_id=quotex_user_id)
+            VERIFICATIONS_TOTAL.labels('no_links').inc()
+            self.link_generator.wake()
+            return self.tenant.NO_LINKS_AVAILABLE
+
+        link_id, vip_link = vip_link_data
+        # Tops the pool up if this claim took it below the low-water mark
+        self.link_generator.wake()
+        log_event(logger, 'verification_succeeded',
+                  f"User {telegram_id} successfully verified and received VIP link",
+                  telegram_id=telegram_id, quotex_user_id=quotex_user_id, link_id=link_id)
+        VERIFICATIONS_TOTAL.labels('success').inc()
+
+        # Success message with the VIP link
+        return self._vip_link_message(vip_link)
+
+    def _vip_link_message(self, vip_link: str) -> str:
+        return (
+            f"{self.tenant.VERIFICATION_SUCCESS}\n\n"
+            f"🔗 {vip_link}\n\n"
+            f"⚠️ This link is unique to you and can only be used once. "
+            f"Don't share it with others!"
+        )
 
-                # Mark link as used and add user to database
-                if self.db.mark_link_as_used(link_id, telegram_id):
-                    self.db.add_user(telegram_id, quotex_user_id, link_id)
+    async def _reply_already_verified(self, update: Update, telegram_id: int):
+        """Answer a verified user, with a new link if theirs was revoked for never being used"""
+        if not self.db.needs_new_link(telegram_id):
+            await update.message.reply_text(self.tenant.ALREADY_VERIFIED)
+            return
 
-                    # Send success message with VIP link
-                    success_message = (
-                        f"{Config.VERIFICATION_SUCCESS}\n\n"
-                        f"🔗 {vip_link}\n\n"
-                        f"⚠️ This link is unique to you and can only be used once. "
-                        f"Don't share it with others!"
-                    )
+        vip_link_data = self.db.reissue_vip_link(telegram_id)
+        self.link_generator.wake()
+        if not vip_link_data:
+            VERIFICATIONS_TOTAL.labels('no_links').inc()
+            await update.message.reply_text(self.tenant.NO_LINKS_AVAILABLE)
+            return
 
-                    await processing_msg.edit_text(success_message)
+        link_id, vip_link = vip_link_data
+        log_event(logger, 'vip_link_reissued', f"User {telegram_id} received a new VIP link",
+                  telegram_id=telegram_id, link_id=link_id)
+        await update.message.reply_text(self._vip_link_message(vip_link))
 
-                    logger.info(f"User {telegram_id} successfully verified and received VIP link")
-                else:
-                    await processing_msg.edit_text("❌ Error processing your verification. Please try again.")
-            else:
-                await processing_msg.edit_text(Config.VERIFICATION_FAILED)
-                logger.info(f"Verification failed for user {telegram_id} with Quotex ID: {quotex_user_id}")
+    async def handle_chat_member(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Record joins to the VIP channel against the link that was used"""
+        change = update.chat_member
+        if not change or not is_vip_channel(change.chat, self.tenant):
+            return
+        joined = (change.old_chat_member.status not in MEMBER_STATUSES
+                  and change.new_chat_member.status in MEMBER_STATUSES)
+        if not joined:
+            return
 
+        telegram_id = change.new_chat_member.user.id
+        invite_link = change.invite_link.invite_link if change.invite_link else None
+        matched = self.db.record_link_join(telegram_id, invite_link)
+        CHANNEL_JOINS_TOTAL.labels('yes' if matched else 'no').inc()
+        log_event(logger, 'vip_channel_joined', f"User {telegram_id} joined the VIP channel",
+                  telegram_id=telegram_id, matched=matched)
+
+    def _queue_verification(self, telegram_id: int, quotex_user_id: str, reason: str = 'backend_unavailable'):
+        """Keep a verification that could not be answered now, to retry later (or after a restart)"""
+        self.db.queue_pending_verification(telegram_id, quotex_user_id)
+        log_event(logger, 'verification_queued',
+                  f"Verification queued ({reason}) for {telegram_id} with Quotex ID: {quotex_user_id}",
+                  level=logging.WARNING, telegram_id=telegram_id, quotex_user_id=quotex_user_id, reason=reason)
+        VERIFICATIONS_TOTAL.labels('queued').inc()
+        self._pending_wakeup.set()
+
+    async def _edit_quietly(self, message, text: str):
+        """Edit a message, logging instead of raising if Telegram refuses"""
+        try:
+            await message.edit_text(text)
         except Exception as e:
-            logger.error(f"Error during verification process: {e}")
-            await processing_msg.edit_text("❌ An error occurred during verification. Please try again later.")
+            logger.warning(f"Could not edit message {message.message_id}: {e}")
 
-    def run(self):
-        """Start the bot"""
-        try:
-            # Test verification service connection
-            logger.info("Testing verification connection...")
-            if not self.verification_service.test_connection():
-                logger.error("Failed to connect to verification service")
-                return
+    async def _retry_pending_verifications(self):
+        """Retry queued verifications whenever the backend may be up again; cancel the task to stop"""
+        while True:
+            try:
+                await asyncio.wait_for(self._pending_wakeup.wait(), Config.PENDING_RETRY_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._pending_wakeup.clear()
+            if not self.verification_ready or self.breaker.rejecting():
+                continue
+            try:
+                if await self._drain_pending_verifications():
+                    # A full batch went through; carry on with the next one
+                    self._pending_wakeup.set()
+            except Exception as e:
+                logger.error(f"Error retrying pending verifications: {e}")
+
+    async def _drain_pending_verifications(self) -> bool:
+        """Retry one batch, one lookup at a time so new /verify requests are not held up; True if more may remain"""
+        batch = self.db.get_pending_verifications(Config.PENDING_RETRY_BATCH_SIZE)
+        for pending in batch:
+            telegram_id = pending.telegram_id
+            quotex_user_id = pending.quotex_user_id
+            if self.db.is_user_verified(telegram_id):
+                self.db.remove_pending_verification(telegram_id)
+                continue
 
-            logger.info("Verification service connection successful")
+            try:
+                reply = await self.scheduler.check(quotex_user_id)
+            except CircuitOpenError:
+                return False
+            if not reply.conclusive:
+                # Still down; the breaker decides when the next round may start
+                self.db.record_pending_attempt(telegram_id)
+                return False
+
+            result_message = await self._complete_verification(telegram_id, quotex_user_id, reply)
+            self.db.remove_pending_verification(telegram_id)
+            try:
+                await self.application.bot.send_message(
+                    chat_id=telegram_id,
+                    text=f"🔔 Update on your verification of Quotex ID {quotex_user_id}:\n\n{result_message}"
+                )
+            except Exception as e:
+                logger.warning(f"Could not deliver queued verification result to {telegram_id}: {e}")
+        return len(batch) == Config.PENDING_RETRY_BATCH_SIZE
+
+    def on_breaker_state_change(self, old_state: str, new_state: str):
+        """Called by SharedServices: tell admins when the backend goes down or recovers"""
+        if new_state == OPEN and old_state == CLOSED:
+            self._alert_admins_soon(
+                f"🚨 Verification backend is down: {self.breaker.consecutive_failures} lookups in a row "
+                f"failed or timed out.\n\nUsers are told it is temporarily unavailable and queued; "
+                f"retrying every {self.breaker.reset_timeout:.0f}s."
+            )
+        elif new_state == CLOSED:
+            self._alert_admins_soon(
+                f"✅ Verification backend recovered. "
+                f"{self.db.count_pending_verifications()} queued verification(s) will be processed now."
+            )
+            self._pending_wakeup.set()
 
-            logger.info("Starting bot polling...")
+    def _alert_admins_soon(self, text: str):
+        """Send an alert in the background, holding the task until it is done"""
+        task = self._create_task(self._alert_admins(text))
+        self._alert_tasks.add(task)
+        task.add_done_callback(self._alert_tasks.discard)
 
-            # Start the bot
-            self.application.run_polling(
-                allowed_updates=['message', 'callback_query'],
-                drop_pending_updates=True
-            )
+    async def _alert_admins(self, text: str):
+        for admin_id in self.tenant.ADMIN_USER_IDS:
+            try:
+                await self.application.bot.send_message(chat_id=admin_id, text=text)
+            except Exception as e:
+                logger.warning(f"Could not alert admin {admin_id}: {e}")
 
+    def run(self):
+        """Start the bot, as the only one in the process"""
+        try:
+            # The verification connection is tested in the background (see
+            # SharedServices.start) so /start and /help are served immediately
+            logger.info("Starting bot polling...")
+            BotHost(self.shared, [self]).run()
         except Exception as e:
             logger.error(f"Error running bot: {e}")
             raise
 
     async def broadcast_to_users(self, message: str) -> int:
         """Broadcast message to all verified users"""
-        users = self.db.get_recent_users(limit=1000)
-        sent_count = 0
+        # Streamed from the database a batch at a time; BULK_SEND_CONCURRENCY
+        # senders take the next user from the shared iterator as they finish
+        users = self.db.iter_users()
+        counts = {'sent': 0, 'total': 0}
+
+        async def send(telegram_id: int) -> bool:
+            for attempt in range(2):
+                try:
+                    await self.bulk_bot.send_message(chat_id=telegram_id, text=message, parse_mode='HTML')
+                    BROADCAST_MESSAGES_TOTAL.labels('sent').inc()
+                    return True
+                except RetryAfter as e:
+                    # Flood control: wait as told, then try once more
+                    if attempt:
+                        error = e
+                        break
+                    await asyncio.sleep(e.retry_after)
+                except Exception as e:
+                    error = e
+                    break
+            BROADCAST_MESSAGES_TOTAL.labels('failed').inc()
+            logger.warning(f"Failed to send broadcast to user {telegram_id}: {error}")
+            return False
+
+        async def sender():
+            for user in users:
+                counts['total'] += 1
+                if await send(user.telegram_id):
+                    counts['sent'] += 1
+
+        await asyncio.gather(*(sender() for _ in range(Config.BULK_SEND_CONCURRENCY)))
+
+        logger.info(f"Broadcast sent to {counts['sent']}/{counts['total']} users")
+        return counts['sent']
 
-        for user in users:
-            try:
-                await self.application.bot.send_message(
-                    chat_id=user['telegram_id'],
-                    text=message,
-                    parse_mode='HTML'
-                )
-                sent_count += 1
-            except Exception as e:
-                logger.warning(f"Failed to send broadcast to user {user['telegram_id']}: {e}")
 
-        logger.info(f"Broadcast sent to {sent_count}/{len(users)} users")
-        return sent_count
\ No newline at end of file
+def build_host(tenants: List[Tenant], verification_service=None) -> BotHost:
+    """One bot per tenant, sharing the verification backend, HTTP pools and event loop"""
+    shared = SharedServices(verification_service, bots=len(tenants))
+    return BotHost(shared, [QuotexVIPBot(tenant=tenant, shared=shared) for tenant in tenants])
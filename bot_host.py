@@ -0,0 +1,245 @@
+"""
+Process-wide services and the host that runs tenant bots on one event loop
+
+SharedServices holds what every bot in the process uses (tenants.py):
+  - the partner bot backend: one VerificationService (one Telethon account),
+    the scheduler whose workers run its lookups, and the circuit breaker;
+  - one HTTP request object (connection pool) each for replies, long polls
+    and bulk sends (http_requests.py);
+  - the metrics endpoint, the event loop monitor and the config file watcher.
+Each QuotexVIPBot keeps its own Application, database, link pool and
+background jobs, and registers with SharedServices to hear when the backend
+is ready, goes down or recovers.
+
+BotHost starts the shared services and then every bot, and on SIGTERM/SIGINT
+drains in-flight verifications of all bots before stopping them; a second
+signal stops at once. A bot that fails to start (e.g. a rejected token) is
+logged and left out, unless no bot starts at all.
+"""
+
+import asyncio
+import logging
+import platform
+import signal
+import time
+from typing import List
+
+from circuit_breaker import CLOSED, OPEN, STATES, CircuitBreaker
+from config import Config
+from config_reload import config_reloader
+from http_requests import build_request
+from logging_setup import log_event
+from loop_monitor import loop_monitor
+from metrics import (REGISTRY, LINK_POOL_REMAINING, PENDING_VERIFICATIONS, VERIFICATION_BREAKER_STATE,
+                     BREAKER_TRANSITIONS_TOTAL, MetricsServer)
+from tracing import tracer
+from verification_scheduler import VerificationScheduler
+from verification_simple import VerificationService
+
+logger = logging.getLogger(__name__)
+
+
+class SharedServices:
+    def __init__(self, verification_service=None, bots: int = 1):
+        """bots: how many bots will share the services (sizes the long poll pool)"""
+        self.verification_service = verification_service or VerificationService()
+        # Fails lookups fast while the backend is down, instead of timing out each one
+        self.breaker = CircuitBreaker(
+            failure_threshold=Config.BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=Config.BREAKER_RESET_SECONDS,
+            on_state_change=self._on_breaker_state_change,
+        )
+        # All partner bot lookups share one account; the scheduler puts /verify
+        # ahead of background re-verification
+        self.scheduler = VerificationScheduler(
+            self.verification_service,
+            concurrency=Config.PARTNER_BOT_CONCURRENCY,
+            background_budget=Config.REVERIFY_BUDGET,
+            budget_window=Config.REVERIFY_BUDGET_WINDOW,
+            breaker=self.breaker,
+        )
+        self.replies_request = build_request('replies')
+        self.updates_request = build_request('updates', bots)
+        self.bulk_request = build_request('bulk')
+
+        # Bots notified of backend changes (QuotexVIPBot registers itself)
+        self.bots = []
+        # Set once the verification backend has passed its connection test
+        self.verification_ready = False
+        self.metrics_server = None
+        self._warmup_task = None
+        self._config_watch_task = None
+        self._gauge_task = None
+        # Settings the breaker and scheduler copied at construction
+        config_reloader.on_reload(self._apply_reloaded_config)
+
+    def register(self, bot):
+        self.bots.append(bot)
+
+    def unregister(self, bot):
+        """Stop notifying a bot, e.g. one that failed to start"""
+        if bot in self.bots:
+            self.bots.remove(bot)
+
+    async def start(self):
+        if Config.METRICS_PORT:
+            self.metrics_server = MetricsServer(REGISTRY, Config.METRICS_HOST, Config.METRICS_PORT)
+            await self.metrics_server.start()
+
+        loop_monitor.start()
+        await self.scheduler.start()
+        self._config_watch_task = asyncio.create_task(config_reloader.watch())
+        self._gauge_task = asyncio.create_task(self._refresh_gauges())
+        # Warm up the verification backend without delaying polling
+        self._warmup_task = asyncio.create_task(self._warm_up_verification())
+
+    async def stop(self):
+        for task in (self._warmup_task, self._config_watch_task, self._gauge_task):
+            if task:
+                task.cancel()
+        await self.scheduler.stop()
+        # Disconnects the Telethon client and writes its session back to disk
+        close = getattr(self.verification_service, 'close', None)
+        if close:
+            await asyncio.to_thread(close)
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        loop_monitor.stop()
+
+    def _apply_reloaded_config(self):
+        """Push reloaded settings into components that copied them at startup"""
+        self.breaker.failure_threshold = max(1, Config.BREAKER_FAILURE_THRESHOLD)
+        self.breaker.reset_timeout = Config.BREAKER_RESET_SECONDS
+        self.scheduler.background_budget = Config.REVERIFY_BUDGET
+        self.scheduler.budget_window = Config.REVERIFY_BUDGET_WINDOW
+
+    def _count_backlog(self) -> tuple:
+        """(unused VIP links, pending verifications) over every bot's database"""
+        bots = list(self.bots)
+        return (sum(bot.db.count_unused_links() for bot in bots),
+                sum(bot.db.count_pending_verifications() for bot in bots))
+
+    async def _refresh_gauges(self):
+        """Recount the database-backed gauges in a worker thread, so scrapes never query SQLite"""
+        while True:
+            try:
+                links, pending = await asyncio.to_thread(self._count_backlog)
+                LINK_POOL_REMAINING.set(links)
+                PENDING_VERIFICATIONS.set(pending)
+            except Exception as e:
+                logger.error(f"Gauge refresh failed: {e}")
+            await asyncio.sleep(Config.METRICS_REFRESH_SECONDS)
+
+    async def _warm_up_verification(self):
+        """Test the verification connection in a worker thread, retrying until it succeeds"""
+        started = time.perf_counter()
+        while not self.verification_ready:
+            logger.info("Testing verification connection...")
+            try:
+                ready = await asyncio.to_thread(self.verification_service.test_connection)
+            except Exception as e:
+                logger.error(f"Verification connection test error: {e}")
+                ready = False
+
+            if ready:
+                self.verification_ready = True
+                tracer.record('verification_warmup', time.perf_counter() - started)
+                logger.info("Verification service connection successful")
+                for bot in self.bots:
+                    bot.on_verification_ready()
+                return
+
+            logger.error(
+                f"Failed to connect to verification service, "
+                f"retrying in {Config.VERIFICATION_WARMUP_RETRY_SECONDS}s"
+            )
+            await asyncio.sleep(Config.VERIFICATION_WARMUP_RETRY_SECONDS)
+
+    def _on_breaker_state_change(self, old_state: str, new_state: str):
+        """Export the breaker state, and let every bot react (alert its admins, retry its queue)"""
+        VERIFICATION_BREAKER_STATE.set(STATES.index(new_state))
+        BREAKER_TRANSITIONS_TOTAL.labels(new_state).inc()
+        if new_state == OPEN:
+            log_event(logger, 'verification_breaker_open',
+                      f"Verification backend marked down after {self.breaker.consecutive_failures} failed lookups",
+                      level=logging.ERROR, failures=self.breaker.consecutive_failures)
+        elif new_state == CLOSED:
+            log_event(logger, 'verification_breaker_closed', "Verification backend recovered")
+        for bot in self.bots:
+            bot.on_breaker_state_change(old_state, new_state)
+
+
+class BotHost:
+    def __init__(self, shared: SharedServices, bots: List):
+        self.shared = shared
+        self.bots = bots
+        self._stop_event = None
+        self._shutdown_task = None
+
+    def run(self):
+        """Serve every bot until a stop signal"""
+        asyncio.run(self._serve())
+
+    async def _serve(self):
+        self._stop_event = asyncio.Event()
+        await self.shared.start()
+        self._install_signal_handlers()
+        try:
+            results = await asyncio.gather(*(self._in_tenant(bot, bot.start()) for bot in self.bots),
+                                           return_exceptions=True)
+            failed = [bot for bot, result in zip(self.bots, results) if isinstance(result, BaseException)]
+            for bot, result in zip(self.bots, results):
+                if bot in failed:
+                    log_event(logger, 'tenant_start_failed', f"Bot {bot.tenant.tenant_id} failed to start: {result}",
+                              level=logging.ERROR, tenant=bot.tenant.tenant_id)
+            await self._discard(failed)
+            if not self.bots:
+                raise results[0]
+            log_event(logger, 'host_started', f"Serving {len(self.bots)} of {len(self.bots) + len(failed)} bot(s)",
+                      bots=len(self.bots), failed=len(failed))
+            await self._stop_event.wait()
+        finally:
+            await asyncio.gather(*(self._in_tenant(bot, bot.stop()) for bot in self.bots), return_exceptions=True)
+            await self.shared.stop()
+            log_event(logger, 'shutdown_complete', "Bot shut down")
+
+    async def _discard(self, bots: List):
+        """
+        Take bots that failed to start out of service: no more backend
+        notifications (re-verification, alerts), and whatever they started
+        (background jobs, request pool references) is stopped
+        """
+        for bot in bots:
+            self.shared.unregister(bot)
+        self.bots = [bot for bot in self.bots if bot not in bots]
+        results = await asyncio.gather(*(self._in_tenant(bot, bot.stop()) for bot in bots), return_exceptions=True)
+        for bot, result in zip(bots, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error stopping bot {bot.tenant.tenant_id} after its failed start: {result}")
+
+    @staticmethod
+    def _in_tenant(bot, coroutine):
+        """Run a bot's coroutine as a task in its tenant's context, so it and its tasks log the tenant"""
+        return asyncio.create_task(coroutine, context=bot.tenant.context.copy())
+
+    def _install_signal_handlers(self):
+        """Route SIGTERM/SIGINT to the draining shutdown"""
+        if platform.system() == 'Windows':
+            return
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self._request_shutdown, sig)
+
+    def _request_shutdown(self, sig: int):
+        if self._shutdown_task:
+            # A second signal skips whatever is left of the drain
+            logger.warning(f"Received {signal.Signals(sig).name} again, stopping now")
+            self._stop_event.set()
+            return
+        logger.info(f"Received {signal.Signals(sig).name}, draining verifications before stopping")
+        self._shutdown_task = asyncio.create_task(self._graceful_shutdown())
+
+    async def _graceful_shutdown(self):
+        """Drain every bot at once (see QuotexVIPBot.drain), then stop them all"""
+        await asyncio.gather(*(self._in_tenant(bot, bot.drain()) for bot in self.bots), return_exceptions=True)
+        self._stop_event.set()
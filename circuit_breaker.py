@@ -0,0 +1,90 @@
+"""
+Circuit breaker for the verification backend
+
+When the Telethon session is deauthorized or @QuotexPartnerBot stops
+answering, every lookup runs into its timeout. The breaker counts consecutive
+failed lookups (errors, timeouts and replies that say nothing about the ID)
+and, after FAILURE_THRESHOLD of them, opens: lookups are refused at once
+instead of waiting on a backend that is down. After RESET_SECONDS one lookup
+is let through as a probe (half-open); if it gets a conclusive answer the
+breaker closes, otherwise it opens again for another RESET_SECONDS.
+
+The breaker is driven from the event loop thread only.
+"""
+
+import logging
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+STATES = (CLOSED, HALF_OPEN, OPEN)
+
+
+class CircuitOpenError(Exception):
+    """The verification backend is considered down; the lookup was not attempted"""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0,
+                 on_state_change: Optional[Callable[[str, str], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        on_state_change: called with (old_state, new_state) on every transition
+        clock: monotonic time source (replaceable for simulations)
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.on_state_change = on_state_change
+        self.clock = clock
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def rejecting(self) -> bool:
+        """True if a lookup made now would be refused (does not consume the probe)"""
+        if self.state == OPEN:
+            return self.clock() - self.opened_at < self.reset_timeout
+        if self.state == HALF_OPEN:
+            return self._probe_in_flight
+        return False
+
+    def allow(self) -> bool:
+        """Whether a lookup may run now; in half-open state only one probe at a time is allowed"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if self.clock() - self.opened_at < self.reset_timeout:
+                return False
+            self._transition(HALF_OPEN)
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        if self.state != CLOSED:
+            self._transition(CLOSED)
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+            self.opened_at = self.clock()
+            self._transition(OPEN)
+
+    def _transition(self, state: str):
+        old_state, self.state = self.state, state
+        logger.info(f"Verification circuit breaker {old_state} -> {state}")
+        if self.on_state_change:
+            try:
+                self.on_state_change(old_state, state)
+            except Exception as e:
+                logger.error(f"Circuit breaker state change callback failed: {e}")
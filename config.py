@@ -7,18 +7,124 @@ import os
 class Config:
     # Bot configuration
     BOT_TOKEN = os.getenv('BOT_TOKEN', '8164851203:AAFk7NK11SkXOR8rPVIWWfCxBOpyzjAxEuQ')
+    # Override the Bot API endpoint (e.g. a local fake API for load tests)
+    BOT_API_BASE_URL = os.getenv('BOT_API_BASE_URL', '')
+    # Outbound Bot API connection pools (see http_requests.py). httpcore scans
+    # every pooled connection per request, so large pools cost more CPU than
+    # they save in waiting: 32 sustained ~3x the throughput of 256 in bench_http.py
+    BOT_API_POOL_SIZE = int(os.getenv('BOT_API_POOL_SIZE', '32'))
+    BOT_API_KEEPALIVE_EXPIRY = float(os.getenv('BOT_API_KEEPALIVE_EXPIRY', '60'))
+    BOT_API_CONNECT_TIMEOUT = float(os.getenv('BOT_API_CONNECT_TIMEOUT', '5'))
+    BOT_API_READ_TIMEOUT = float(os.getenv('BOT_API_READ_TIMEOUT', '10'))
+    BOT_API_WRITE_TIMEOUT = float(os.getenv('BOT_API_WRITE_TIMEOUT', '10'))
+    # Seconds a call may wait for a free pooled connection
+    BOT_API_POOL_TIMEOUT = float(os.getenv('BOT_API_POOL_TIMEOUT', '10'))
+    # Requires python-telegram-bot[http2]
+    BOT_API_HTTP2 = os.getenv('BOT_API_HTTP2', 'false').lower() in ('1', 'true', 'yes')
+    # Broadcasts: separate pool, and messages in flight at once
+    BULK_SEND_POOL_SIZE = int(os.getenv('BULK_SEND_POOL_SIZE', '25'))
+    BULK_SEND_CONCURRENCY = int(os.getenv('BULK_SEND_CONCURRENCY', '25'))
     
     # Telegram API configuration for user account verification
     TELEGRAM_API_ID = os.getenv('TELEGRAM_API_ID', '26649092')
     TELEGRAM_API_HASH = os.getenv('TELEGRAM_API_HASH', '798c30bdd5f430a78dea56dc8a09b1b3')
     TELEGRAM_PHONE_NUMBER = os.getenv('TELEGRAM_PHONE_NUMBER', '+916392645473')
     
+    # Referral link users must register through; messages refer to it as {referral_link}
+    REFERRAL_LINK = os.getenv('REFERRAL_LINK', 'https://broker-qx.pro/sign-up/?lid=996329')
+
+    # JSON file of setting overrides, watched and applied at runtime (see config_reload.py)
+    CONFIG_FILE = os.getenv('CONFIG_FILE', 'config_overrides.json')
+    # Seconds between checks of CONFIG_FILE for changes (0 disables watching; /admin_reload still works)
+    CONFIG_WATCH_SECONDS = float(os.getenv('CONFIG_WATCH_SECONDS', '5'))
+    # JSON file of bots (tenants) to serve from this one process, each with its own token,
+    # referral link, channel and database (see tenants.py); empty serves one bot from these settings
+    TENANTS_FILE = os.getenv('TENANTS_FILE', '')
+    
     # Admin configuration
     ADMIN_USER_IDS = [int(x.strip()) for x in os.getenv('ADMIN_USER_IDS', '').split(',') if x.strip()]
     
     # Database configuration
-    DATABASE_PATH = 'quotex_bot.db'
-    
+    DATABASE_PATH = os.getenv('DATABASE_PATH', 'quotex_bot.db')
+
+    # Set when several bot processes share one database (enables WAL journaling)
+    DB_MULTI_PROCESS = os.getenv('DB_MULTI_PROCESS', 'false').lower() in ('1', 'true', 'yes')
+    # Seconds to wait for another process's write lock before giving up
+    DB_BUSY_TIMEOUT = float(os.getenv('DB_BUSY_TIMEOUT', '10'))
+    # Seconds a link handed out by get_unused_vip_link stays reserved for this process
+    LINK_LEASE_SECONDS = int(os.getenv('LINK_LEASE_SECONDS', '120'))
+
+    # Invite link generation for the VIP channel (disabled when VIP_CHANNEL_ID is empty;
+    # the bot must be a channel admin allowed to invite users)
+    VIP_CHANNEL_ID = os.getenv('VIP_CHANNEL_ID', '')
+    # Generate LINK_BATCH_SIZE links when fewer than LINK_POOL_LOW_WATER are unused
+    LINK_POOL_LOW_WATER = int(os.getenv('LINK_POOL_LOW_WATER', '20'))
+    LINK_BATCH_SIZE = int(os.getenv('LINK_BATCH_SIZE', '50'))
+    # createChatInviteLink calls per second, and link lifetime in hours (0 = no expiry)
+    LINK_CREATE_PER_SECOND = float(os.getenv('LINK_CREATE_PER_SECOND', '2'))
+    LINK_EXPIRY_HOURS = float(os.getenv('LINK_EXPIRY_HOURS', '0'))
+    # Seconds between pool checks
+    LINK_CHECK_SECONDS = int(os.getenv('LINK_CHECK_SECONDS', '60'))
+    # Links nobody joined the channel through within this many hours are revoked
+    # and replaced (0 disables; needs VIP_CHANNEL_ID)
+    LINK_JOIN_GRACE_HOURS = float(os.getenv('LINK_JOIN_GRACE_HOURS', '48'))
+    # Seconds between reclaim sweeps, and links looked at per sweep
+    LINK_RECLAIM_SECONDS = int(os.getenv('LINK_RECLAIM_SECONDS', '900'))
+    LINK_RECLAIM_BATCH_SIZE = int(os.getenv('LINK_RECLAIM_BATCH_SIZE', '50'))
+
+    # Online backups: snapshot directory, hours between scheduled snapshots (0 = only
+    # on /admin_backup), snapshots kept, and pages copied per step with a pause
+    # between steps so writers are not held up
+    BACKUP_DIR = os.getenv('BACKUP_DIR', 'backups')
+    BACKUP_INTERVAL_HOURS = float(os.getenv('BACKUP_INTERVAL_HOURS', '24'))
+    BACKUP_KEEP = int(os.getenv('BACKUP_KEEP', '7'))
+    BACKUP_PAGES_PER_STEP = int(os.getenv('BACKUP_PAGES_PER_STEP', '256'))
+    BACKUP_STEP_SLEEP = float(os.getenv('BACKUP_STEP_SLEEP', '0.01'))
+    # Restarts caused by concurrent writes before the rest is copied in one step
+    BACKUP_MAX_RESTARTS = int(os.getenv('BACKUP_MAX_RESTARTS', '3'))
+
+    # Logging configuration
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    LOG_FILE = os.getenv('LOG_FILE', 'bot.log')
+    LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+    LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+    # e.g. 'midnight' for daily rotation; empty means rotate by size
+    LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN', '')
+    # Log one in N successful getUpdates requests (0 suppresses them entirely)
+    LOG_POLLING_SAMPLE_RATE = int(os.getenv('LOG_POLLING_SAMPLE_RATE', '0'))
+
+    # Latency tracing: samples kept per stage, and optional JSONL file for span records
+    TRACE_MAX_SAMPLES = int(os.getenv('TRACE_MAX_SAMPLES', '1000'))
+    TRACE_FILE = os.getenv('TRACE_FILE', '')
+
+    # Shutdown: seconds in-flight verifications get to finish after SIGTERM before
+    # the rest are saved as pending verifications for the next start
+    SHUTDOWN_DRAIN_SECONDS = float(os.getenv('SHUTDOWN_DRAIN_SECONDS', '20'))
+    # Discard updates sent while the bot was not running (lost across restarts)
+    DROP_PENDING_UPDATES = os.getenv('DROP_PENDING_UPDATES', 'false').lower() in ('1', 'true', 'yes')
+
+    # Event loop monitor: heartbeat interval (0 disables), seconds the loop may be
+    # stuck before the blocking stack is logged, and before the watchdog exits the
+    # process (status 70) for the supervisor to restart it (0 disables the watchdog)
+    LOOP_LAG_INTERVAL = float(os.getenv('LOOP_LAG_INTERVAL', '0.1'))
+    LOOP_LAG_THRESHOLD = float(os.getenv('LOOP_LAG_THRESHOLD', '0.5'))
+    LOOP_WATCHDOG_SECONDS = float(os.getenv('LOOP_WATCHDOG_SECONDS', '0'))
+
+    # Prometheus metrics endpoint (disabled when METRICS_PORT is 0)
+    METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+    METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+    # How often the link pool and pending queue gauges are recounted from the databases
+    METRICS_REFRESH_SECONDS = float(os.getenv('METRICS_REFRESH_SECONDS', '15'))
+
+    # On-demand profiling (/admin_profile_start)
+    PROFILE_MAX_SECONDS = int(os.getenv('PROFILE_MAX_SECONDS', '300'))
+    PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.005'))
+    PROFILE_TRACEMALLOC_FRAMES = int(os.getenv('PROFILE_TRACEMALLOC_FRAMES', '1'))
+    PROFILE_TOP_N = int(os.getenv('PROFILE_TOP_N', '30'))
+
+    # /admin_export: largest compressed file to upload (Telegram bots may send up to 50 MB)
+    EXPORT_MAX_BYTES = int(os.getenv('EXPORT_MAX_BYTES', str(50 * 1024 * 1024)))
+
     # Bot messages
     WELCOME_MESSAGE = """
     👋 Hello, Trader 🤍
@@ -41,7 +147,7 @@ class Config:
 📝 **How to get VIP access:**
 
 1️⃣ Register on Quotex using our link:
-https://broker-qx.pro/sign-up/?lid=996329
+{referral_link}
 
 2️⃣ Find your User ID in your account settings
 
@@ -51,8 +157,19 @@ Example: /verify 12345678
 
 🛠️ Admin Commands:
 🔹 /admin_add_links - Add VIP channel links
+🔹 /admin_generate_links [count] - Create single-use invite links for the VIP channel
 🔹 /admin_stats - Show bot statistics
 🔹 /admin_users - List verified users
+🔹 /admin_deposits <amount> - Users with deposits of at least <amount>
+🔹 /admin_trader <quotex_id> - Stored partner bot data for a Quotex ID
+🔹 /admin_abuse [hours] - Show blocked ID enumeration and shared Quotex IDs
+🔹 /admin_backup [list] - Take and verify a database snapshot, or list snapshots
+🔹 /admin_export <users|links|attempts> [csv|jsonl] [from] [to] - Export a table as a compressed file
+🔹 /admin_latency - Show verification latency per stage
+🔹 /admin_loop [reset] - Show event loop lag and what blocked it
+🔹 /admin_profile_start [seconds] - Start CPU/memory profiling
+🔹 /admin_profile_stop - Stop profiling and get the report
+🔹 /admin_reload - Reload settings from the config file
     """
     
     VERIFICATION_SUCCESS = "🎉 Verification successful! Welcome to our VIP community! Here's your exclusive VIP channel link:"
@@ -62,10 +179,13 @@ It appears that your account is not registered using my link. ❌
 
 Create your Quotex account with this secure link:
 
-🔗 https://broker-qx.pro/sign-up/?lid=996329
+🔗 {referral_link}
 
 Note: If you already have an account before but not linked with me then delete the existing id and create new with the link above to get entry in the YASHODA VIP Channel"""
     ALREADY_VERIFIED = "✅ You're already a verified VIP member! Check your previous messages for your VIP link."
+    VIP_LINK_REVOKED = "⌛ Your VIP link expired because it wasn't used to join the channel. Send /verify to get a new one."
+    TOO_MANY_IDS = "⛔ Too many different User IDs were tried from this account. Please try again later."
+    QUOTEX_ID_IN_USE = "⛔ This Quotex User ID is already linked to another Telegram account. Please contact support if it is yours."
     NO_LINKS_AVAILABLE = "❌ VIP links are temporarily unavailable. Our team has been notified and will resolve this shortly."
     INVALID_USER_ID = """❌ Please provide a valid Quotex User ID.
 
@@ -74,5 +194,67 @@ Note: If you already have an account before but not linked with me then delete t
 
 💡 Find your User ID in your Quotex account settings."""
     
+    VERIFICATION_WARMING_UP = """⏳ Our verification service is starting up.
+
+Please try again in a minute — send yes again or repeat your /verify command."""
+    
+    VERIFICATION_UNAVAILABLE = """⏳ Our verification service is temporarily unavailable.
+
+You're in the queue: we'll check your ID automatically as soon as it's back and message you the result here. No need to send it again."""
+    
+    VERIFICATION_INTERRUPTED = """🔄 The bot is restarting for maintenance.
+
+Your ID is saved: we'll check it automatically in a moment and message you the result here. No need to send it again."""
+    
     # Verification timeout (seconds)
-    VERIFICATION_TIMEOUT = 30
+    VERIFICATION_TIMEOUT = float(os.getenv('VERIFICATION_TIMEOUT', '30'))
+    # Seconds between verification connection tests while warming up
+    VERIFICATION_WARMUP_RETRY_SECONDS = int(os.getenv('VERIFICATION_WARMUP_RETRY_SECONDS', '30'))
+    # How partner bot lookups reach Telegram: 'telethon' keeps one client with the
+    # session held in memory; 'subprocess' runs an isolated client per check
+    VERIFICATION_TRANSPORT = os.getenv('VERIFICATION_TRANSPORT', 'telethon').lower()
+    # Session file created by setup_auth.py (without the .session extension)
+    TELETHON_SESSION = os.getenv('TELETHON_SESSION', 'verification_session')
+    # Seconds between writes of the in-memory session back to its file
+    SESSION_SNAPSHOT_SECONDS = int(os.getenv('SESSION_SNAPSHOT_SECONDS', '300'))
+    # Circuit breaker: consecutive failed lookups before the backend is treated as
+    # down, and seconds before a probe lookup may close it again
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+    BREAKER_RESET_SECONDS = int(os.getenv('BREAKER_RESET_SECONDS', '60'))
+    # Verifications queued during an outage: seconds between retries, and how many per round
+    PENDING_RETRY_SECONDS = int(os.getenv('PENDING_RETRY_SECONDS', '60'))
+    PENDING_RETRY_BATCH_SIZE = int(os.getenv('PENDING_RETRY_BATCH_SIZE', '20'))
+    # Partner bot lookups run at once over the Telethon account
+    PARTNER_BOT_CONCURRENCY = int(os.getenv('PARTNER_BOT_CONCURRENCY', '1'))
+    
+    # Abuse detection (a limit of 0 disables that check): different Quotex IDs one
+    # account may submit per window, other accounts that may submit the same
+    # Quotex ID per window, and other verified accounts a Quotex ID may be on
+    ABUSE_WINDOW_SECONDS = int(os.getenv('ABUSE_WINDOW_SECONDS', '3600'))
+    ABUSE_MAX_IDS_PER_USER = int(os.getenv('ABUSE_MAX_IDS_PER_USER', '5'))
+    ABUSE_MAX_SUBMITTERS_PER_ID = int(os.getenv('ABUSE_MAX_SUBMITTERS_PER_ID', '3'))
+    ABUSE_MAX_ACCOUNTS_PER_ID = int(os.getenv('ABUSE_MAX_ACCOUNTS_PER_ID', '1'))
+
+    # Background re-verification of verified users (disabled when REVERIFY_BUDGET is 0)
+    REVERIFY_BUDGET = int(os.getenv('REVERIFY_BUDGET', '20'))  # lookups per window
+    REVERIFY_BUDGET_WINDOW = int(os.getenv('REVERIFY_BUDGET_WINDOW', '3600'))
+    REVERIFY_BATCH_SIZE = int(os.getenv('REVERIFY_BATCH_SIZE', '50'))
+    # Users whose data was refreshed more recently than this are skipped
+    REVERIFY_MIN_AGE_HOURS = float(os.getenv('REVERIFY_MIN_AGE_HOURS', '24'))
+    # Pause after a full pass over the users table
+    REVERIFY_IDLE_SECONDS = int(os.getenv('REVERIFY_IDLE_SECONDS', '3600'))
+
+
+# Raw message templates that mention {referral_link}; config_reload re-renders
+# them when the link or a template changes
+TEMPLATES = {name: value for name, value in vars(Config).items()
+             if name.isupper() and isinstance(value, str) and '{referral_link}' in value}
+
+
+def render_templates(templates: dict):
+    """Set each templated message to its text with the current REFERRAL_LINK filled in"""
+    for name, template in templates.items():
+        setattr(Config, name, template.replace('{referral_link}', Config.REFERRAL_LINK))
+
+
+render_templates(TEMPLATES)
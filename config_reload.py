@@ -0,0 +1,180 @@
+"""
+Runtime reloading of Config from CONFIG_FILE
+
+CONFIG_FILE is a JSON object of setting overrides, e.g.
+    {"ADMIN_USER_IDS": [12345], "VERIFICATION_TIMEOUT": 45,
+     "REVERIFY_BUDGET": 10, "WELCOME_MESSAGE": "..."}
+Values from the environment and config.py are the baseline; a setting removed
+from the file goes back to its baseline value.
+
+The file is validated as a whole (known setting names, the baseline value's
+type, no negative numbers, no empty strings) and applied in one step on the
+event loop thread, so a bad edit changes nothing. Settings that are read once
+at startup (RESTART_REQUIRED) are applied from the file when the process
+starts and reported as waiting for a restart when they change later.
+
+The bot checks the file's modification time every CONFIG_WATCH_SECONDS;
+/admin_reload forces a reload. Components that copy settings at startup
+register on_reload() callbacks to pick up new values.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Callable, Dict, List, Optional
+
+from config import TEMPLATES, Config, render_templates
+
+logger = logging.getLogger(__name__)
+
+# Read when clients, pools, files and workers are created
+RESTART_REQUIRED = frozenset({
+    'BOT_TOKEN', 'BOT_API_BASE_URL', 'BOT_API_POOL_SIZE', 'BOT_API_KEEPALIVE_EXPIRY', 'BOT_API_CONNECT_TIMEOUT',
+    'BOT_API_READ_TIMEOUT', 'BOT_API_WRITE_TIMEOUT', 'BOT_API_POOL_TIMEOUT', 'BOT_API_HTTP2', 'BULK_SEND_POOL_SIZE',
+    'TELEGRAM_API_ID', 'TELEGRAM_API_HASH', 'TELEGRAM_PHONE_NUMBER', 'CONFIG_FILE', 'TENANTS_FILE',
+    'DATABASE_PATH', 'DB_MULTI_PROCESS', 'LINK_LEASE_SECONDS',
+    'LOG_LEVEL', 'LOG_FILE', 'LOG_MAX_BYTES', 'LOG_BACKUP_COUNT', 'LOG_ROTATE_WHEN', 'LOG_POLLING_SAMPLE_RATE',
+    'TRACE_MAX_SAMPLES', 'TRACE_FILE', 'METRICS_HOST', 'METRICS_PORT',
+    'VERIFICATION_TRANSPORT', 'TELETHON_SESSION', 'SESSION_SNAPSHOT_SECONDS', 'PARTNER_BOT_CONCURRENCY',
+    'DROP_PENDING_UPDATES', 'VIP_CHANNEL_ID',
+})
+CHOICES = {
+    'VERIFICATION_TRANSPORT': ('telethon', 'subprocess'),
+    'LOG_LEVEL': ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'),
+}
+
+
+class ConfigError(ValueError):
+    """The config file is unreadable or has an invalid setting"""
+
+
+def _settings() -> Dict[str, object]:
+    """Current setting values, with templated messages in their raw form"""
+    values = {name: value for name, value in vars(Config).items()
+              if name.isupper() and not callable(value)}
+    values.update(TEMPLATES)
+    return values
+
+
+def validate(overrides: dict, baseline: Dict[str, object]) -> Dict[str, object]:
+    """Check overrides against the baseline settings; returns them with numbers coerced"""
+    if not isinstance(overrides, dict):
+        raise ConfigError("the file must contain a JSON object")
+
+    validated = {}
+    for name, value in overrides.items():
+        if name not in baseline:
+            raise ConfigError(f"unknown setting {name}")
+        default = baseline[name]
+        if isinstance(default, bool):
+            ok = isinstance(value, bool)
+        elif isinstance(default, int):
+            ok = isinstance(value, int) and not isinstance(value, bool)
+        elif isinstance(default, float):
+            ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+            value = float(value) if ok else value
+        elif isinstance(default, list):
+            ok = isinstance(value, list) and all(isinstance(item, int) and not isinstance(item, bool)
+                                                 for item in value)
+        else:
+            ok = isinstance(value, str)
+        if not ok:
+            expected = 'a list of integers' if isinstance(default, list) else type(default).__name__
+            raise ConfigError(f"{name} must be {expected}, got {json.dumps(value)[:50]}")
+
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value < 0:
+            raise ConfigError(f"{name} must not be negative")
+        if isinstance(value, str) and not value.strip() and default:
+            raise ConfigError(f"{name} must not be empty")
+        if name in CHOICES and value not in CHOICES[name]:
+            raise ConfigError(f"{name} must be one of {', '.join(CHOICES[name])}")
+        validated[name] = value
+    return validated
+
+
+class ConfigReloader:
+    def __init__(self, path: str):
+        self.path = path
+        self.baseline = _settings()
+        self._signature = None
+        self._callbacks: List[Callable[[], None]] = []
+
+    def on_reload(self, callback: Callable[[], None]):
+        """Call callback (on the event loop thread) after each reload that changed something"""
+        self._callbacks.append(callback)
+
+    def _file_signature(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_overrides(self) -> dict:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            raise ConfigError(f"cannot read {self.path}: {e}") from e
+
+    def load(self, startup: bool = False) -> dict:
+        """
+        Read, validate and apply the config file; raises ConfigError and
+        changes nothing if it is invalid. Returns {'changed': [...],
+        'restart_required': [...]} with the setting names affected.
+        """
+        self._signature = self._file_signature()
+        overrides = validate(self._read_overrides(), self.baseline)
+        wanted = dict(self.baseline, **overrides)
+        current = _settings()
+
+        changed, restart_required = [], []
+        for name, value in wanted.items():
+            if current.get(name) == value:
+                continue
+            if name in RESTART_REQUIRED and not startup:
+                restart_required.append(name)
+                continue
+            changed.append(name)
+
+        # Everything is validated; apply in one go with no awaits in between
+        for name in changed:
+            value = wanted[name]
+            if name in TEMPLATES or (isinstance(value, str) and '{referral_link}' in value):
+                TEMPLATES[name] = value
+            else:
+                setattr(Config, name, value)
+        # Messages may gain or lose {referral_link} or see a new link
+        render_templates(TEMPLATES)
+
+        if changed:
+            logger.info(f"Configuration reloaded from {self.path}: {', '.join(sorted(changed))}")
+            for callback in self._callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"Config reload callback failed: {e}")
+        if restart_required:
+            logger.warning(f"Settings changed in {self.path} that apply after a restart: "
+                           f"{', '.join(sorted(restart_required))}")
+        return {'changed': sorted(changed), 'restart_required': sorted(restart_required)}
+
+    def changed_on_disk(self) -> bool:
+        return self._file_signature() != self._signature
+
+    async def watch(self):
+        """Reload whenever the file changes; cancel the task to stop"""
+        while True:
+            await asyncio.sleep(Config.CONFIG_WATCH_SECONDS or 60)
+            if not Config.CONFIG_WATCH_SECONDS or not self.changed_on_disk():
+                continue
+            try:
+                self.load()
+            except ConfigError as e:
+                logger.error(f"Ignoring invalid config file: {e}")
+
+
+config_reloader = ConfigReloader(Config.CONFIG_FILE)
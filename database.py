@@ -2,22 +2,150 @@
 Database operations for the Quotex VIP Channel Bot
 """
 
+import os
+import socket
 import sqlite3
 import logging
+import threading
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+from config import Config
+from metrics import DB_LATENCY, timed
 
 logger = logging.getLogger(__name__)
 
+# Exportable tables: (columns, timestamp column used for date filters)
+EXPORT_TABLES = {
+    'users': (('user_id', 'telegram_id', 'quotex_user_id', 'verified_at', 'vip_link_id',
+               'deposits_sum', 'country', 'profile_checked_at'), 'verified_at'),
+    'vip_links': (('id', 'link', 'is_used', 'used_by', 'created_at', 'used_at', 'joined_at', 'joined_by',
+                   'reclaim_state'), 'created_at'),
+    'verification_attempts': (('id', 'telegram_id', 'quotex_user_id', 'success', 'attempted_at',
+                               'deposits_sum', 'country'), 'attempted_at'),
+}
+
+# A link that can be handed out: not used, not under a live lease, not expired
+AVAILABLE_LINK = '''is_used = FALSE
+    AND (lease_expires_at IS NULL OR lease_expires_at < CURRENT_TIMESTAMP)
+    AND (expires_at IS NULL OR expires_at > CURRENT_TIMESTAMP)'''
+
+
+# Row records. Field names are the table's column names, and rows are built
+# straight from SQLite's tuples: each costs one tuple rather than a dict per
+# row, and unpacks like the plain rows it replaces.
+
+class UserRecord(NamedTuple):
+    user_id: int
+    telegram_id: int
+    quotex_user_id: str
+    verified_at: str
+    deposits_sum: Optional[float]
+    country: Optional[str]
+
+
+class LinkRecord(NamedTuple):
+    id: int
+    link: str
+    used_by: Optional[int]
+    used_at: Optional[str]
+
+
+class AttemptRecord(NamedTuple):
+    telegram_id: int
+    quotex_user_id: str
+    attempted_at: str
+
+
+class PendingVerification(NamedTuple):
+    telegram_id: int
+    quotex_user_id: str
+    queued_at: str
+    attempts: int
+
+
+class AbuseFlag(NamedTuple):
+    kind: str
+    telegram_id: int
+    quotex_user_id: Optional[str]
+    detail: str
+    flagged_at: str
+
+
+class TraderProfile(NamedTuple):
+    quotex_user_id: str
+    telegram_id: int
+    deposits_sum: Optional[float]
+    country: Optional[str]
+    checked_at: str
+    verified: bool
+
+
+def _columns(record_type) -> str:
+    """SELECT list for a record type"""
+    return ', '.join(record_type._fields)
+
+
+def _record_cursor(conn: sqlite3.Connection, record_type) -> sqlite3.Cursor:
+    """Cursor whose rows come back as record_type"""
+    cursor = conn.cursor()
+    # tuple.__new__ directly: the fields always match the SELECT list, so _make's length check is not needed
+    new = tuple.__new__
+    cursor.row_factory = lambda _, row: new(record_type, row)
+    return cursor
+
+
 class Database:
     def __init__(self, db_path: str):
         self.db_path = db_path
+        # Identifies this process when it holds a lease on a VIP link
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        # Per-process cache of verified users, invalidated via PRAGMA data_version
+        self._verified_cache = {}
+        self._cache_lock = threading.Lock()
+        self._cache_conn = None
+        self._cache_version = None
+
         self.init_database()
-    
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection, waiting on locks held by other processes"""
+        return sqlite3.connect(self.db_path, timeout=Config.DB_BUSY_TIMEOUT)
+
+    def _ensure_column(self, cursor: sqlite3.Cursor, table: str, column: str, declaration: str):
+        """Add a column to an existing table if it is missing"""
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {declaration}')
+
+    def _cache_is_fresh(self) -> bool:
+        """Drop cached lookups if any connection (in any process) committed a write"""
+        if self._cache_conn is None:
+            self._cache_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        version = self._cache_conn.execute('PRAGMA data_version').fetchone()[0]
+        if version != self._cache_version:
+            self._verified_cache.clear()
+            self._cache_version = version
+            return False
+        return True
+
+    def close(self):
+        """Release the cache connection and fold the WAL back into the database file"""
+        with self._cache_lock:
+            if self._cache_conn is not None:
+                self._cache_conn.close()
+                self._cache_conn = None
+        if Config.DB_MULTI_PROCESS:
+            try:
+                with self._connect() as conn:
+                    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            except sqlite3.Error as e:
+                logger.error(f"Error checkpointing the database: {e}")
+
     def init_database(self):
         """Initialize the database with required tables"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Users table
@@ -55,7 +183,85 @@ class Database:
                         attempted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 ''')
-                
+
+                # Lease columns let several processes share one link pool
+                self._ensure_column(cursor, 'vip_links', 'lease_owner', 'TEXT')
+                self._ensure_column(cursor, 'vip_links', 'lease_expires_at', 'TIMESTAMP')
+                # Generated invite links may expire; expired ones are never handed out
+                self._ensure_column(cursor, 'vip_links', 'expires_at', 'TIMESTAMP')
+                # Channel joins seen through the link, and what the reclaim sweep did
+                # with a link nobody joined through ('revoked' or 'kept')
+                self._ensure_column(cursor, 'vip_links', 'joined_at', 'TIMESTAMP')
+                self._ensure_column(cursor, 'vip_links', 'joined_by', 'INTEGER')
+                self._ensure_column(cursor, 'vip_links', 'reclaim_state', 'TEXT')
+
+                # Trader card fields parsed from the partner bot's reply
+                for table in ('users', 'verification_attempts'):
+                    self._ensure_column(cursor, table, 'deposits_sum', 'REAL')
+                    self._ensure_column(cursor, table, 'country', 'TEXT')
+                # When the partner bot was last asked about a verified user
+                self._ensure_column(cursor, 'users', 'profile_checked_at', 'TIMESTAMP')
+
+                # Resumable positions of incremental background jobs
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS job_cursors (
+                        name TEXT PRIMARY KEY,
+                        position INTEGER NOT NULL,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+
+                # Verifications the backend could not answer, retried once it recovers
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS pending_verifications (
+                        telegram_id INTEGER PRIMARY KEY,
+                        quotex_user_id TEXT NOT NULL,
+                        queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        attempts INTEGER NOT NULL DEFAULT 0
+                    )
+                ''')
+
+                # Suspected abuse (ID enumeration, one Quotex ID on several accounts)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS abuse_flags (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        kind TEXT NOT NULL,
+                        telegram_id INTEGER NOT NULL,
+                        quotex_user_id TEXT,
+                        detail TEXT,
+                        flagged_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+
+                # Indexes for the hot queries (see bench_database.py for the plans)
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_vip_links_available
+                    ON vip_links (created_at, id) WHERE is_used = FALSE
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_vip_links_unjoined
+                    ON vip_links (used_at) WHERE is_used = TRUE AND joined_at IS NULL AND reclaim_state IS NULL
+                ''')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_verified_at ON users (verified_at)')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_verification_attempts_success
+                    ON verification_attempts (success)
+                ''')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_deposits_sum ON users (deposits_sum)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_quotex_user ON users (quotex_user_id, verified_at)')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_verification_attempts_quotex_user
+                    ON verification_attempts (quotex_user_id, attempted_at)
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_verification_attempts_telegram
+                    ON verification_attempts (telegram_id, attempted_at)
+                ''')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_abuse_flags_flagged_at ON abuse_flags (flagged_at)')
+
+                if Config.DB_MULTI_PROCESS:
+                    cursor.execute('PRAGMA journal_mode = WAL')
+
                 conn.commit()
                 logger.info("Database initialized successfully")
                 
@@ -63,15 +269,17 @@ class Database:
             logger.error(f"Database initialization error: {e}")
             raise
     
-    def add_user(self, telegram_id: int, quotex_user_id: str, vip_link_id: int) -> bool:
+    @timed(DB_LATENCY, 'add_user')
+    def add_user(self, telegram_id: int, quotex_user_id: str, vip_link_id: int,
+                 deposits_sum: Optional[float] = None, country: Optional[str] = None) -> bool:
         """Add a verified user to the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    INSERT OR REPLACE INTO users (telegram_id, quotex_user_id, vip_link_id)
-                    VALUES (?, ?, ?)
-                ''', (telegram_id, quotex_user_id, vip_link_id))
+                    INSERT OR REPLACE INTO users (telegram_id, quotex_user_id, vip_link_id, deposits_sum, country)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (telegram_id, quotex_user_id, vip_link_id, deposits_sum, country))
                 conn.commit()
                 logger.info(f"User {telegram_id} added successfully")
                 return True
@@ -79,26 +287,33 @@ class Database:
             logger.error(f"Error adding user: {e}")
             return False
     
+    @timed(DB_LATENCY, 'is_user_verified')
     def is_user_verified(self, telegram_id: int) -> bool:
         """Check if a user is already verified"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT 1 FROM users WHERE telegram_id = ?', (telegram_id,))
-                return cursor.fetchone() is not None
+            with self._cache_lock:
+                if self._cache_is_fresh() and telegram_id in self._verified_cache:
+                    return self._verified_cache[telegram_id]
+
+                cursor = self._cache_conn.execute('SELECT 1 FROM users WHERE telegram_id = ?', (telegram_id,))
+                verified = cursor.fetchone() is not None
+                self._verified_cache[telegram_id] = verified
+                return verified
         except sqlite3.Error as e:
             logger.error(f"Error checking user verification: {e}")
             return False
     
-    def add_vip_links(self, links: List[str]) -> int:
-        """Add multiple VIP links to the database"""
+    @timed(DB_LATENCY, 'add_vip_links')
+    def add_vip_links(self, links: List[str], expires_at: Optional[str] = None) -> int:
+        """Add multiple VIP links to the database, optionally expiring at a UTC 'YYYY-MM-DD HH:MM:SS'"""
         added_count = 0
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 for link in links:
                     try:
-                        cursor.execute('INSERT INTO vip_links (link) VALUES (?)', (link.strip(),))
+                        cursor.execute('INSERT INTO vip_links (link, expires_at) VALUES (?, ?)',
+                                       (link.strip(), expires_at))
                         added_count += 1
                     except sqlite3.IntegrityError:
                         logger.warning(f"Link already exists: {link}")
@@ -109,56 +324,274 @@ class Database:
             logger.error(f"Error adding VIP links: {e}")
         return added_count
     
+    @timed(DB_LATENCY, 'get_unused_vip_link')
     def get_unused_vip_link(self) -> Optional[Tuple[int, str]]:
-        """Get an unused VIP link"""
+        """Get an unused VIP link and lease it to this process"""
+        conn = None
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            conn = self._connect()
+            conn.isolation_level = None
+            cursor = conn.cursor()
+            # BEGIN IMMEDIATE takes the write lock up front, so no other process
+            # can select the same link between our SELECT and UPDATE
+            cursor.execute('BEGIN IMMEDIATE')
+            result = self._select_available_link(cursor)
+            if result:
                 cursor.execute('''
-                    SELECT id, link FROM vip_links 
-                    WHERE is_used = FALSE 
-                    ORDER BY created_at ASC 
-                    LIMIT 1
-                ''')
-                result = cursor.fetchone()
-                return result if result else None
+                    UPDATE vip_links
+                    SET lease_owner = ?, lease_expires_at = datetime('now', ?)
+                    WHERE id = ?
+                ''', (self.owner_id, f'+{Config.LINK_LEASE_SECONDS} seconds', result[0]))
+            cursor.execute('COMMIT')
+            return result if result else None
         except sqlite3.Error as e:
             logger.error(f"Error getting unused VIP link: {e}")
+            if conn is not None and conn.in_transaction:
+                conn.rollback()
             return None
+        finally:
+            if conn is not None:
+                conn.close()
     
+    @timed(DB_LATENCY, 'mark_link_as_used')
     def mark_link_as_used(self, link_id: int, telegram_id: int) -> bool:
-        """Mark a VIP link as used"""
+        """Mark a VIP link as used, provided nobody else used or leased it meanwhile"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     UPDATE vip_links 
-                    SET is_used = TRUE, used_by = ?, used_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                ''', (telegram_id, link_id))
+                    SET is_used = TRUE, used_by = ?, used_at = CURRENT_TIMESTAMP,
+                        lease_owner = NULL, lease_expires_at = NULL
+                    WHERE id = ? AND is_used = FALSE
+                      AND (lease_owner IS NULL OR lease_owner = ?
+                           OR lease_expires_at < CURRENT_TIMESTAMP)
+                ''', (telegram_id, link_id, self.owner_id))
                 conn.commit()
                 return cursor.rowcount > 0
         except sqlite3.Error as e:
             logger.error(f"Error marking link as used: {e}")
             return False
     
-    def log_verification_attempt(self, telegram_id: int, quotex_user_id: str, success: bool):
-        """Log a verification attempt"""
+    def _select_available_link(self, cursor: sqlite3.Cursor) -> Optional[Tuple[int, str]]:
+        """Select the oldest link that is neither used, expired nor under a live lease"""
+        cursor.execute(f'''
+            SELECT id, link FROM vip_links
+            WHERE {AVAILABLE_LINK}
+            ORDER BY created_at ASC, id ASC
+            LIMIT 1
+        ''')
+        return cursor.fetchone()
+    
+    @timed(DB_LATENCY, 'claim_vip_link')
+    def claim_vip_link(self, telegram_id: int, quotex_user_id: str, deposits_sum: Optional[float] = None,
+                       country: Optional[str] = None) -> Optional[Tuple[int, str]]:
+        """
+        Atomically hand a VIP link to a verified user.
+        Runs as a single BEGIN IMMEDIATE transaction so concurrent processes can
+        neither hand out the same link twice nor insert the same user twice.
+        A user who already holds a link gets that same link back, and their
+        stored deposits sum and country are refreshed.
+        """
+        conn = None
+        try:
+            conn = self._connect()
+            conn.isolation_level = None
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+
+            cursor.execute('''
+                SELECT vip_links.id, vip_links.link FROM users
+                JOIN vip_links ON vip_links.id = users.vip_link_id
+                WHERE users.telegram_id = ?
+            ''', (telegram_id,))
+            existing = cursor.fetchone()
+            if existing:
+                cursor.execute('''
+                    UPDATE users
+                    SET deposits_sum = COALESCE(?, deposits_sum), country = COALESCE(?, country),
+                        profile_checked_at = CURRENT_TIMESTAMP
+                    WHERE telegram_id = ?
+                ''', (deposits_sum, country, telegram_id))
+                cursor.execute('COMMIT')
+                return existing
+
+            result = self._select_available_link(cursor)
+            if not result:
+                cursor.execute('COMMIT')
+                return None
+
+            link_id = result[0]
+            cursor.execute('''
+                UPDATE vip_links
+                SET is_used = TRUE, used_by = ?, used_at = CURRENT_TIMESTAMP,
+                    lease_owner = NULL, lease_expires_at = NULL
+                WHERE id = ?
+            ''', (telegram_id, link_id))
+            cursor.execute('''
+                INSERT OR REPLACE INTO users (telegram_id, quotex_user_id, vip_link_id, deposits_sum, country)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (telegram_id, quotex_user_id, link_id, deposits_sum, country))
+            cursor.execute('COMMIT')
+
+            with self._cache_lock:
+                self._verified_cache[telegram_id] = True
+            logger.info(f"Link {link_id} claimed by user {telegram_id}")
+            return result
+        except sqlite3.Error as e:
+            logger.error(f"Error claiming VIP link: {e}")
+            if conn is not None and conn.in_transaction:
+                conn.rollback()
+            return None
+        finally:
+            if conn is not None:
+                conn.close()
+    
+    @timed(DB_LATENCY, 'record_link_join')
+    def record_link_join(self, telegram_id: int, invite_link: Optional[str] = None) -> bool:
+        """
+        Record that a user joined the VIP channel. The link is found by its URL
+        (unique index) when Telegram reports it in full, otherwise through the
+        joining user's users row; returns False if neither matches a link
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                updated = 0
+                if invite_link:
+                    cursor.execute('''
+                        UPDATE vip_links SET joined_at = CURRENT_TIMESTAMP, joined_by = ?
+                        WHERE link = ? AND joined_at IS NULL
+                    ''', (telegram_id, invite_link))
+                    updated = cursor.rowcount
+                if not updated:
+                    cursor.execute('''
+                        UPDATE vip_links SET joined_at = CURRENT_TIMESTAMP, joined_by = ?
+                        WHERE id = (SELECT vip_link_id FROM users WHERE telegram_id = ?) AND joined_at IS NULL
+                    ''', (telegram_id, telegram_id))
+                    updated = cursor.rowcount
+                conn.commit()
+                return updated > 0
+        except sqlite3.Error as e:
+            logger.error(f"Error recording channel join: {e}")
+            return False
+    
+    @timed(DB_LATENCY, 'get_unjoined_links')
+    def get_unjoined_links(self, grace_hours: float, limit: int = 50) -> List[LinkRecord]:
+        """Links handed out more than grace_hours ago that nobody joined through, oldest first"""
+        try:
+            with self._connect() as conn:
+                cursor = _record_cursor(conn, LinkRecord)
+                cursor.execute(f'''
+                    SELECT {_columns(LinkRecord)} FROM vip_links
+                    WHERE is_used = TRUE AND joined_at IS NULL AND reclaim_state IS NULL
+                      AND used_at < datetime('now', ?)
+                    ORDER BY used_at
+                    LIMIT ?
+                ''', (f'-{grace_hours} hours', limit))
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error getting unjoined links: {e}")
+            return []
+    
+    @timed(DB_LATENCY, 'mark_link_reclaimed')
+    def mark_link_reclaimed(self, link_id: int, revoked: bool) -> bool:
+        """
+        Close out an unjoined link. A revoked link is taken away from its user,
+        who can then get a new one with reissue_vip_link; a link that could not
+        be revoked stays with its user and is not looked at again
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    UPDATE vip_links SET reclaim_state = ?
+                    WHERE id = ? AND joined_at IS NULL AND reclaim_state IS NULL
+                ''', ('revoked' if revoked else 'kept', link_id))
+                if not cursor.rowcount:
+                    return False
+                if revoked:
+                    cursor.execute('UPDATE users SET vip_link_id = NULL WHERE vip_link_id = ?', (link_id,))
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            logger.error(f"Error marking link {link_id} as reclaimed: {e}")
+            return False
+    
+    @timed(DB_LATENCY, 'needs_new_link')
+    def needs_new_link(self, telegram_id: int) -> bool:
+        """Whether a verified user's link was revoked because they never joined"""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT 1 FROM users WHERE telegram_id = ? AND vip_link_id IS NULL', (telegram_id,))
+                return cursor.fetchone() is not None
+        except sqlite3.Error as e:
+            logger.error(f"Error checking user link: {e}")
+            return False
+    
+    @timed(DB_LATENCY, 'reissue_vip_link')
+    def reissue_vip_link(self, telegram_id: int) -> Optional[Tuple[int, str]]:
+        """Hand a new link to a verified user whose link was revoked; None if none is available"""
+        conn = None
+        try:
+            conn = self._connect()
+            conn.isolation_level = None
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('SELECT 1 FROM users WHERE telegram_id = ? AND vip_link_id IS NULL', (telegram_id,))
+            result = self._select_available_link(cursor) if cursor.fetchone() else None
+            if result:
+                cursor.execute('''
+                    UPDATE vip_links
+                    SET is_used = TRUE, used_by = ?, used_at = CURRENT_TIMESTAMP,
+                        lease_owner = NULL, lease_expires_at = NULL
+                    WHERE id = ?
+                ''', (telegram_id, result[0]))
+                cursor.execute('UPDATE users SET vip_link_id = ? WHERE telegram_id = ?', (result[0], telegram_id))
+            cursor.execute('COMMIT')
+            return result
+        except sqlite3.Error as e:
+            logger.error(f"Error reissuing VIP link: {e}")
+            if conn is not None and conn.in_transaction:
+                conn.rollback()
+            return None
+        finally:
+            if conn is not None:
+                conn.close()
+    
+    @timed(DB_LATENCY, 'count_unused_links')
+    def count_unused_links(self) -> int:
+        """Count links that are neither used, expired nor leased"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'SELECT COUNT(*) FROM vip_links WHERE {AVAILABLE_LINK}')
+                return cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Error counting unused VIP links: {e}")
+            return 0
+    
+    @timed(DB_LATENCY, 'log_verification_attempt')
+    def log_verification_attempt(self, telegram_id: int, quotex_user_id: str, success: bool,
+                                 deposits_sum: Optional[float] = None, country: Optional[str] = None):
+        """Log a verification attempt, with whatever the partner bot told us about the trader"""
+        try:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    INSERT INTO verification_attempts (telegram_id, quotex_user_id, success)
-                    VALUES (?, ?, ?)
-                ''', (telegram_id, quotex_user_id, success))
+                    INSERT INTO verification_attempts (telegram_id, quotex_user_id, success, deposits_sum, country)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (telegram_id, quotex_user_id, success, deposits_sum, country))
                 conn.commit()
         except sqlite3.Error as e:
             logger.error(f"Error logging verification attempt: {e}")
     
+    @timed(DB_LATENCY, 'get_stats')
     def get_stats(self) -> dict:
         """Get bot statistics"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Total users
@@ -169,12 +602,23 @@ class Database:
                 cursor.execute('SELECT COUNT(*) FROM vip_links')
                 total_links = cursor.fetchone()[0]
                 
+                # Available links, as count_unused_links counts them
+                cursor.execute(f'SELECT COUNT(*) FROM vip_links WHERE {AVAILABLE_LINK}')
+                available_links = cursor.fetchone()[0]
+                
                 # Used links
                 cursor.execute('SELECT COUNT(*) FROM vip_links WHERE is_used = TRUE')
                 used_links = cursor.fetchone()[0]
                 
-                # Available links
-                available_links = total_links - used_links
+                # Unused links held by a live lease, and unused links past their expiry
+                cursor.execute('''
+                    SELECT COUNT(*) FROM vip_links
+                    WHERE is_used = FALSE AND lease_expires_at >= CURRENT_TIMESTAMP
+                      AND (expires_at IS NULL OR expires_at > CURRENT_TIMESTAMP)
+                ''')
+                leased_links = cursor.fetchone()[0]
+                cursor.execute('SELECT COUNT(*) FROM vip_links WHERE is_used = FALSE AND expires_at <= CURRENT_TIMESTAMP')
+                expired_links = cursor.fetchone()[0]
                 
                 # Total verification attempts
                 cursor.execute('SELECT COUNT(*) FROM verification_attempts')
@@ -184,38 +628,378 @@ class Database:
                 cursor.execute('SELECT COUNT(*) FROM verification_attempts WHERE success = TRUE')
                 successful_verifications = cursor.fetchone()[0]
                 
+                # Verifications waiting for the backend to recover
+                cursor.execute('SELECT COUNT(*) FROM pending_verifications')
+                pending_verifications = cursor.fetchone()[0]
+                
                 return {
                     'total_users': total_users,
                     'total_links': total_links,
                     'used_links': used_links,
                     'available_links': available_links,
+                    'leased_links': leased_links,
+                    'expired_links': expired_links,
                     'total_attempts': total_attempts,
-                    'successful_verifications': successful_verifications
+                    'successful_verifications': successful_verifications,
+                    'pending_verifications': pending_verifications
                 }
         except sqlite3.Error as e:
             logger.error(f"Error getting stats: {e}")
             return {}
     
-    def get_recent_users(self, limit: int = 20) -> List[dict]:
+    @timed(DB_LATENCY, 'get_recent_users')
+    def get_recent_users(self, limit: int = 20) -> List[UserRecord]:
         """Get recent verified users"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT telegram_id, quotex_user_id, verified_at
+            with self._connect() as conn:
+                cursor = _record_cursor(conn, UserRecord)
+                cursor.execute(f'''
+                    SELECT {_columns(UserRecord)}
                     FROM users 
                     ORDER BY verified_at DESC 
                     LIMIT ?
                 ''', (limit,))
-                
-                users = []
-                for row in cursor.fetchall():
-                    users.append({
-                        'telegram_id': row[0],
-                        'quotex_user_id': row[1],
-                        'verified_at': row[2]
-                    })
-                return users
+                return cursor.fetchall()
         except sqlite3.Error as e:
             logger.error(f"Error getting recent users: {e}")
             return []
+    
+    def iter_users(self, batch_size: int = 1000) -> Iterator[UserRecord]:
+        """
+        Every verified user in user_id order, read batch_size at a time so
+        memory use does not grow with the user base. Each batch is its own
+        short query after a user_id cursor, so no read transaction stays
+        open while the caller works through the users (e.g. a broadcast).
+        """
+        after = 0
+        while True:
+            try:
+                with self._connect() as conn:
+                    cursor = _record_cursor(conn, UserRecord)
+                    cursor.execute(f'''
+                        SELECT {_columns(UserRecord)} FROM users
+                        WHERE user_id > ?
+                        ORDER BY user_id
+                        LIMIT ?
+                    ''', (after, batch_size))
+                    users = cursor.fetchall()
+            except sqlite3.Error as e:
+                logger.error(f"Error iterating users: {e}")
+                return
+            yield from users
+            if len(users) < batch_size:
+                return
+            after = users[-1].user_id
+    
+    @timed(DB_LATENCY, 'count_users')
+    def count_users(self) -> int:
+        """Number of verified users"""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT COUNT(*) FROM users')
+                return cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Error counting users: {e}")
+            return 0
+    
+    @timed(DB_LATENCY, 'get_users_by_deposits')
+    def get_users_by_deposits(self, min_deposits: float, limit: int = 20) -> List[UserRecord]:
+        """Get verified users whose last known deposits sum is at least min_deposits, largest first"""
+        try:
+            with self._connect() as conn:
+                cursor = _record_cursor(conn, UserRecord)
+                cursor.execute(f'''
+                    SELECT {_columns(UserRecord)}
+                    FROM users
+                    WHERE deposits_sum >= ?
+                    ORDER BY deposits_sum DESC
+                    LIMIT ?
+                ''', (min_deposits, limit))
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error getting users by deposits: {e}")
+            return []
+    
+    @timed(DB_LATENCY, 'get_trader_profile')
+    def get_trader_profile(self, quotex_user_id: str) -> Optional[TraderProfile]:
+        """
+        Last known partner bot data for a Quotex ID: from the verified user if
+        there is one, otherwise from the latest attempt that returned any fields
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT telegram_id, deposits_sum, country, verified_at
+                    FROM users WHERE quotex_user_id = ?
+                    ORDER BY verified_at DESC LIMIT 1
+                ''', (quotex_user_id,))
+                row = cursor.fetchone()
+                verified = row is not None
+                if row is None:
+                    cursor.execute('''
+                        SELECT telegram_id, deposits_sum, country, attempted_at
+                        FROM verification_attempts
+                        WHERE quotex_user_id = ? AND (deposits_sum IS NOT NULL OR country IS NOT NULL)
+                        ORDER BY attempted_at DESC LIMIT 1
+                    ''', (quotex_user_id,))
+                    row = cursor.fetchone()
+                if row is None:
+                    return None
+                return TraderProfile(quotex_user_id, *row, verified)
+        except sqlite3.Error as e:
+            logger.error(f"Error getting trader profile: {e}")
+            return None
+    
+    @timed(DB_LATENCY, 'get_users_for_reverification')
+    def get_users_for_reverification(self, after_user_id: int, limit: int,
+                                     min_age_hours: float) -> List[UserRecord]:
+        """
+        Next batch of verified users after a user_id cursor whose partner bot
+        data was last refreshed more than min_age_hours ago
+        """
+        try:
+            with self._connect() as conn:
+                cursor = _record_cursor(conn, UserRecord)
+                cursor.execute(f'''
+                    SELECT {_columns(UserRecord)}
+                    FROM users
+                    WHERE user_id > ?
+                      AND COALESCE(profile_checked_at, verified_at) < datetime('now', ?)
+                    ORDER BY user_id
+                    LIMIT ?
+                ''', (after_user_id, f'-{min_age_hours} hours', limit))
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error getting users for re-verification: {e}")
+            return []
+    
+    @timed(DB_LATENCY, 'update_trader_profile')
+    def update_trader_profile(self, telegram_id: int, deposits_sum: Optional[float], country: Optional[str]) -> bool:
+        """Refresh a verified user's partner bot data; None keeps the stored value"""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    UPDATE users
+                    SET deposits_sum = COALESCE(?, deposits_sum), country = COALESCE(?, country),
+                        profile_checked_at = CURRENT_TIMESTAMP
+                    WHERE telegram_id = ?
+                ''', (deposits_sum, country, telegram_id))
+                conn.commit()
+                return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(f"Error updating trader profile: {e}")
+            return False
+    
+    def get_job_cursor(self, name: str) -> int:
+        """Saved position of an incremental job (0 if it never ran)"""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT position FROM job_cursors WHERE name = ?', (name,))
+                row = cursor.fetchone()
+                return row[0] if row else 0
+        except sqlite3.Error as e:
+            logger.error(f"Error reading job cursor {name}: {e}")
+            return 0
+    
+    def set_job_cursor(self, name: str, position: int):
+        """Save the position of an incremental job"""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO job_cursors (name, position) VALUES (?, ?)
+                    ON CONFLICT (name) DO UPDATE SET position = excluded.position, updated_at = CURRENT_TIMESTAMP
+                ''', (name, position))
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error saving job cursor {name}: {e}")
+    
+    def queue_pending_verification(self, telegram_id: int, quotex_user_id: str) -> bool:
+        """Remember a verification to retry later; a user has at most one, the latest ID wins"""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO pending_verifications (telegram_id, quotex_user_id) VALUES (?, ?)
+                    ON CONFLICT (telegram_id) DO UPDATE SET quotex_user_id = excluded.quotex_user_id
+                ''', (telegram_id, quotex_user_id))
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            logger.error(f"Error queueing pending verification: {e}")
+            return False
+    
+    def get_pending_verifications(self, limit: int = 50) -> List[PendingVerification]:
+        """Oldest pending verifications first"""
+        try:
+            with self._connect() as conn:
+                cursor = _record_cursor(conn, PendingVerification)
+                cursor.execute(f'''
+                    SELECT {_columns(PendingVerification)}
+                    FROM pending_verifications
+                    ORDER BY queued_at, telegram_id
+                    LIMIT ?
+                ''', (limit,))
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error getting pending verifications: {e}")
+            return []
+    
+    def record_pending_attempt(self, telegram_id: int):
+        """Count a retry that the backend still could not answer"""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    UPDATE pending_verifications SET attempts = attempts + 1 WHERE telegram_id = ?
+                ''', (telegram_id,))
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error updating pending verification: {e}")
+    
+    def remove_pending_verification(self, telegram_id: int):
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('DELETE FROM pending_verifications WHERE telegram_id = ?', (telegram_id,))
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error removing pending verification: {e}")
+    
+    def count_pending_verifications(self) -> int:
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT COUNT(*) FROM pending_verifications')
+                return cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Error counting pending verifications: {e}")
+            return 0
+    
+    @timed(DB_LATENCY, 'get_recent_attempts_by_user')
+    def get_recent_attempts_by_user(self, telegram_id: int, seconds: int) -> List[AttemptRecord]:
+        """A user's attempts in the last `seconds`"""
+        try:
+            with self._connect() as conn:
+                cursor = _record_cursor(conn, AttemptRecord)
+                cursor.execute(f'''
+                    SELECT {_columns(AttemptRecord)} FROM verification_attempts
+                    WHERE telegram_id = ? AND attempted_at >= datetime('now', ?)
+                ''', (telegram_id, f'-{seconds} seconds'))
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error getting recent attempts by user: {e}")
+            return []
+    
+    @timed(DB_LATENCY, 'get_recent_attempts_by_quotex_id')
+    def get_recent_attempts_by_quotex_id(self, quotex_user_id: str, seconds: int) -> List[AttemptRecord]:
+        """Attempts with a Quotex ID in the last `seconds`"""
+        try:
+            with self._connect() as conn:
+                cursor = _record_cursor(conn, AttemptRecord)
+                cursor.execute(f'''
+                    SELECT {_columns(AttemptRecord)} FROM verification_attempts
+                    WHERE quotex_user_id = ? AND attempted_at >= datetime('now', ?)
+                ''', (quotex_user_id, f'-{seconds} seconds'))
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error getting recent attempts by Quotex ID: {e}")
+            return []
+    
+    @timed(DB_LATENCY, 'count_other_accounts')
+    def count_other_accounts(self, quotex_user_id: str, telegram_id: int) -> int:
+        """Verified Telegram accounts other than telegram_id that use a Quotex ID"""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT COUNT(*) FROM users WHERE quotex_user_id = ? AND telegram_id != ?
+                ''', (quotex_user_id, telegram_id))
+                return cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Error counting accounts for Quotex ID: {e}")
+            return 0
+    
+    def add_abuse_flag(self, kind: str, telegram_id: int, quotex_user_id: Optional[str], detail: str = ''):
+        """Record suspected abuse for the admin report"""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO abuse_flags (kind, telegram_id, quotex_user_id, detail) VALUES (?, ?, ?, ?)
+                ''', (kind, telegram_id, quotex_user_id, detail))
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error recording abuse flag: {e}")
+    
+    @timed(DB_LATENCY, 'get_abuse_flags')
+    def get_abuse_flags(self, hours: float, limit: int = 20) -> List[AbuseFlag]:
+        """Abuse flags raised in the last `hours`, newest first"""
+        try:
+            with self._connect() as conn:
+                cursor = _record_cursor(conn, AbuseFlag)
+                cursor.execute(f'''
+                    SELECT {_columns(AbuseFlag)} FROM abuse_flags
+                    WHERE flagged_at >= datetime('now', ?)
+                    ORDER BY flagged_at DESC
+                    LIMIT ?
+                ''', (f'-{hours} hours', limit))
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error getting abuse flags: {e}")
+            return []
+    
+    @timed(DB_LATENCY, 'get_shared_quotex_ids')
+    def get_shared_quotex_ids(self, limit: int = 20) -> List[Tuple[str, int]]:
+        """(quotex_user_id, accounts) for Quotex IDs verified on more than one Telegram account"""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                # Grouped in idx_users_quotex_user order, so no sort is needed
+                cursor.execute('''
+                    SELECT quotex_user_id, COUNT(*) FROM users
+                    GROUP BY quotex_user_id
+                    HAVING COUNT(*) > 1
+                    LIMIT ?
+                ''', (limit,))
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error getting shared Quotex IDs: {e}")
+            return []
+    
+    def iter_export_rows(self, table: str, since: Optional[str] = None, until: Optional[str] = None,
+                         batch_size: int = 1000) -> Iterator[tuple]:
+        """
+        Stream every row of an EXPORT_TABLES table in primary key order,
+        optionally limited to timestamps in [since, until). Rows are stepped
+        out of SQLite batch_size at a time, so memory use does not grow with
+        the table; the connection stays open until the iterator is exhausted
+        or closed.
+        """
+        columns, date_column = EXPORT_TABLES[table]
+        conditions, params = [], []
+        if since:
+            conditions.append(f'{date_column} >= ?')
+            params.append(since)
+        if until:
+            conditions.append(f'{date_column} < ?')
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        conn = self._connect()
+        try:
+            cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {table} {where} ORDER BY rowid", params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        except sqlite3.Error as e:
+            logger.error(f"Error exporting {table}: {e}")
+            raise
+        finally:
+            conn.close()
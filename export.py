@@ -0,0 +1,72 @@
+"""
+Streaming table exports for admins
+
+/admin_export writes users, vip_links or verification_attempts as
+gzip-compressed CSV or JSONL into an anonymous temporary file, row by row
+from Database.iter_export_rows, so memory use stays flat however large the
+table is. Only the compressed file is uploaded; python-telegram-bot reads it
+into memory to send it, which Telegram's 50 MB document limit keeps bounded.
+"""
+
+import csv
+import gzip
+import io
+import json
+import tempfile
+from datetime import datetime, timedelta
+from typing import IO, Optional, Tuple
+
+from database import EXPORT_TABLES, Database
+
+FORMATS = ('csv', 'jsonl')
+# Names accepted by /admin_export
+TABLE_ALIASES = {
+    'users': 'users',
+    'links': 'vip_links',
+    'vip_links': 'vip_links',
+    'attempts': 'verification_attempts',
+    'verification_attempts': 'verification_attempts',
+}
+
+
+def date_bounds(from_date: Optional[str], to_date: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """[since, until) timestamp bounds for inclusive YYYY-MM-DD dates; raises ValueError on bad dates"""
+    since = datetime.strptime(from_date, '%Y-%m-%d').strftime('%Y-%m-%d') if from_date else None
+    until = None
+    if to_date:
+        until = (datetime.strptime(to_date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    return since, until
+
+
+def write_export(db: Database, table: str, fmt: str, fileobj: IO[bytes],
+                 since: Optional[str] = None, until: Optional[str] = None) -> int:
+    """Write a table to fileobj as gzip-compressed CSV (with a header) or JSONL; returns the row count"""
+    columns, _ = EXPORT_TABLES[table]
+    rows = 0
+    with gzip.GzipFile(fileobj=fileobj, mode='wb', compresslevel=6) as compressed:
+        with io.TextIOWrapper(compressed, encoding='utf-8', newline='') as out:
+            if fmt == 'csv':
+                writer = csv.writer(out)
+                writer.writerow(columns)
+                for row in db.iter_export_rows(table, since, until):
+                    writer.writerow(row)
+                    rows += 1
+            else:
+                for row in db.iter_export_rows(table, since, until):
+                    out.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                    out.write('\n')
+                    rows += 1
+    return rows
+
+
+def export_to_tempfile(db: Database, table: str, fmt: str, since: Optional[str] = None,
+                       until: Optional[str] = None) -> Tuple[IO[bytes], int]:
+    """Export into a temporary file rewound for reading; the caller closes it"""
+    fileobj = tempfile.TemporaryFile()
+    try:
+        rows = write_export(db, table, fmt, fileobj, since, until)
+    except Exception:
+        fileobj.close()
+        raise
+    fileobj.seek(0)
+    return fileobj, rows
@@ -0,0 +1,323 @@
+"""
+Local stand-in for the Telegram Bot API, used by the load-test harness
+
+Speaks enough of the Bot API over plain HTTP/1.1 (with keep-alive) for
+python-telegram-bot to initialize, long-poll getUpdates and send or edit
+messages. Tests inject user messages with push_message() and read what the
+bot sent back from per-chat outboxes. Invite links created with
+createChatInviteLink are kept in invite_links; invite_link_rate_limit makes
+the method answer 429 like Telegram's flood control. push_chat_member()
+simulates a user joining a channel, which getChatMember then reports.
+"""
+
+import asyncio
+import email.parser
+import email.policy
+import itertools
+import json
+import logging
+import secrets
+import time
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl
+
+logger = logging.getLogger(__name__)
+
+BOT_USER = {
+    'id': 100000001,
+    'is_bot': True,
+    'first_name': 'Fake VIP Bot',
+    'username': 'fake_vip_bot',
+    'can_join_groups': True,
+    'can_read_all_group_messages': False,
+    'supports_inline_queries': False,
+}
+
+
+class FloodWait(Exception):
+    """Raised by a method handler to answer 429 Too Many Requests"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Too Many Requests: retry after {retry_after}")
+        self.retry_after = retry_after
+
+
+class OutgoingMessage:
+    """A message the bot sent or edited, as seen by the fake API"""
+    __slots__ = ('method', 'chat_id', 'message_id', 'text', 'params', 'received_at')
+
+    def __init__(self, method: str, chat_id: int, message_id: int, text: str, params: dict):
+        self.method = method
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.text = text
+        self.params = params
+        self.received_at = time.perf_counter()
+
+
+class FakeBotAPI:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0):
+        self.host = host
+        self.port = port
+        # Artificial per-request delay, to emulate the round trip to api.telegram.org
+        self.latency = latency
+        self.requests: Dict[str, int] = defaultdict(int)
+        # TCP connections accepted, to see how well clients reuse keep-alive connections
+        self.connections = 0
+        self.polling_started = asyncio.Event()
+        # Invite links by URL, and createChatInviteLink calls allowed per second (None: unlimited)
+        self.invite_links: Dict[str, dict] = {}
+        self.invite_link_rate_limit: Optional[int] = None
+        self.flood_waits = 0
+        # (chat_id, user_id) pairs of channel members, for getChatMember
+        self.chat_members = set()
+
+        self._server = None
+        self._invite_link_calls = deque()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._pending_updates: List[dict] = []
+        self._updates_available = asyncio.Event()
+        self._outboxes: Dict[int, asyncio.Queue] = defaultdict(asyncio.Queue)
+        self._methods = {
+            'getMe': self._get_me,
+            'deleteWebhook': self._true,
+            'getUpdates': self._get_updates,
+            'sendMessage': self._send_message,
+            'editMessageText': self._edit_message_text,
+            'sendDocument': self._send_document,
+            'createChatInviteLink': self._create_chat_invite_link,
+            'revokeChatInviteLink': self._revoke_chat_invite_link,
+            'getChatMember': self._get_chat_member,
+        }
+
+    @property
+    def base_url(self) -> str:
+        """Value for Application.builder().base_url()"""
+        return f'http://{self.host}:{self.port}/bot'
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Fake Bot API listening on {self.base_url}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def register_method(self, name: str, handler):
+        """Add or override a Bot API method; handler(params) returns the `result` value"""
+        self._methods[name] = handler
+
+    # Injecting updates and observing replies
+
+    def push_message(self, telegram_id: int, text: str, first_name: str = 'Load', username: Optional[str] = None) -> int:
+        """Queue a private text message from a user; returns its update_id"""
+        update_id = next(self._update_ids)
+        message = {
+            'message_id': next(self._message_ids),
+            'date': int(time.time()),
+            'chat': {'id': telegram_id, 'type': 'private', 'first_name': first_name},
+            'from': {'id': telegram_id, 'is_bot': False, 'first_name': first_name, 'username': username},
+            'text': text,
+        }
+        if text.startswith('/'):
+            command_length = len(text.split()[0])
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': command_length}]
+        self.push_update({'update_id': update_id, 'message': message})
+        return update_id
+
+    def push_chat_member(self, chat_id: int, telegram_id: int, invite_link: Optional[str] = None,
+                         joined: bool = True) -> int:
+        """Queue a chat_member update for a user joining (or leaving) a channel; returns its update_id"""
+        update_id = next(self._update_ids)
+        user = {'id': telegram_id, 'is_bot': False, 'first_name': 'Load'}
+        old_status, new_status = ('left', 'member') if joined else ('member', 'left')
+        change = {
+            'chat': {'id': chat_id, 'type': 'channel', 'title': 'VIP'},
+            'from': user,
+            'date': int(time.time()),
+            'old_chat_member': {'user': user, 'status': old_status},
+            'new_chat_member': {'user': user, 'status': new_status},
+        }
+        if invite_link:
+            change['invite_link'] = {key: value for key, value in self.invite_links[invite_link].items()
+                                     if key != 'chat_id'}
+        if joined:
+            self.chat_members.add((str(chat_id), telegram_id))
+        else:
+            self.chat_members.discard((str(chat_id), telegram_id))
+        self.push_update({'update_id': update_id, 'chat_member': change})
+        return update_id
+
+    def push_update(self, update: dict):
+        """Queue a raw update dict for the next getUpdates call"""
+        self._pending_updates.append(update)
+        self._updates_available.set()
+
+    async def next_outgoing(self, chat_id: int, timeout: float = 60) -> OutgoingMessage:
+        """Wait for the next message the bot sends to (or edits in) a chat"""
+        return await asyncio.wait_for(self._outboxes[chat_id].get(), timeout)
+
+    # HTTP handling
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', '0') or 0))
+
+                method_name = request_line.decode('latin-1').split()[1].rstrip('/').rsplit('/', 1)[-1]
+                status, payload = await self._dispatch(method_name, self._parse_body(headers, body))
+                data = json.dumps(payload).encode('utf-8')
+                writer.write(
+                    f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\n'
+                    f'Content-Length: {len(data)}\r\n\r\n'.encode('latin-1') + data
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # Pending long polls are cancelled when the event loop shuts down
+            pass
+        finally:
+            writer.close()
+
+    def _parse_body(self, headers: dict, body: bytes) -> dict:
+        content_type = headers.get('content-type', '')
+        if not body:
+            return {}
+        if content_type.startswith('application/json'):
+            return json.loads(body)
+        if content_type.startswith('multipart/form-data'):
+            message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+                f'Content-Type: {content_type}\r\n\r\n'.encode('latin-1') + body
+            )
+            params = {}
+            for part in message.iter_parts():
+                name = part.get_param('name', header='content-disposition')
+                if part.get_filename():
+                    params[name] = part.get_content()
+                else:
+                    params[name] = part.get_content().strip()
+            return params
+        return dict(parse_qsl(body.decode('utf-8'), keep_blank_values=True))
+
+    async def _dispatch(self, method_name: str, params: dict):
+        self.requests[method_name] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        handler = self._methods.get(method_name, self._true)
+        try:
+            result = handler(params)
+            if asyncio.iscoroutine(result):
+                result = await result
+        except FloodWait as e:
+            self.flood_waits += 1
+            return '429 Too Many Requests', {'ok': False, 'error_code': 429, 'description': str(e),
+                                             'parameters': {'retry_after': e.retry_after}}
+        except Exception as e:
+            logger.exception(f"Fake Bot API method {method_name} failed")
+            return '400 Bad Request', {'ok': False, 'error_code': 400, 'description': str(e)}
+        return '200 OK', {'ok': True, 'result': result}
+
+    # Bot API methods
+
+    def _true(self, params: dict):
+        return True
+
+    def _get_me(self, params: dict):
+        return BOT_USER
+
+    async def _get_updates(self, params: dict):
+        self.polling_started.set()
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+
+        self._pending_updates = [u for u in self._pending_updates if u['update_id'] >= offset]
+        if not self._pending_updates and timeout > 0:
+            self._updates_available.clear()
+            try:
+                await asyncio.wait_for(self._updates_available.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._pending_updates[:limit]
+
+    def _message(self, chat_id: int, message_id: int, text: str) -> dict:
+        return {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': BOT_USER,
+            'text': text,
+        }
+
+    def _send_message(self, params: dict):
+        chat_id = int(params['chat_id'])
+        message_id = next(self._message_ids)
+        self._outboxes[chat_id].put_nowait(OutgoingMessage('sendMessage', chat_id, message_id, params.get('text', ''), params))
+        return self._message(chat_id, message_id, params.get('text', ''))
+
+    def _edit_message_text(self, params: dict):
+        chat_id = int(params['chat_id'])
+        message_id = int(params['message_id'])
+        self._outboxes[chat_id].put_nowait(OutgoingMessage('editMessageText', chat_id, message_id, params.get('text', ''), params))
+        return self._message(chat_id, message_id, params.get('text', ''))
+
+    def _send_document(self, params: dict):
+        chat_id = int(params['chat_id'])
+        message_id = next(self._message_ids)
+        self._outboxes[chat_id].put_nowait(OutgoingMessage('sendDocument', chat_id, message_id, params.get('caption', ''), params))
+        message = self._message(chat_id, message_id, '')
+        message['document'] = {'file_id': f'doc{message_id}', 'file_unique_id': f'doc{message_id}'}
+        return message
+
+    def _create_chat_invite_link(self, params: dict):
+        if self.invite_link_rate_limit is not None:
+            now = time.monotonic()
+            while self._invite_link_calls and self._invite_link_calls[0] <= now - 1:
+                self._invite_link_calls.popleft()
+            if len(self._invite_link_calls) >= self.invite_link_rate_limit:
+                raise FloodWait(1)
+            self._invite_link_calls.append(now)
+
+        invite_link = {
+            'invite_link': f'https://t.me/+{secrets.token_urlsafe(12)}',
+            'creator': BOT_USER,
+            'creates_join_request': False,
+            'is_primary': False,
+            'is_revoked': False,
+        }
+        for name in ('member_limit', 'expire_date'):
+            if params.get(name) not in (None, ''):
+                invite_link[name] = int(params[name])
+        if params.get('name'):
+            invite_link['name'] = params['name']
+        self.invite_links[invite_link['invite_link']] = dict(invite_link, chat_id=params.get('chat_id'))
+        return invite_link
+
+    def _revoke_chat_invite_link(self, params: dict):
+        invite_link = self.invite_links.get(params.get('invite_link'))
+        if invite_link is None or str(invite_link['chat_id']) != str(params.get('chat_id')):
+            raise ValueError("Bad Request: INVITE_HASH_INVALID")
+        invite_link['is_revoked'] = True
+        return {key: value for key, value in invite_link.items() if key != 'chat_id'}
+
+    def _get_chat_member(self, params: dict):
+        user_id = int(params['user_id'])
+        status = 'member' if (str(params.get('chat_id')), user_id) in self.chat_members else 'left'
+        return {'user': {'id': user_id, 'is_bot': False, 'first_name': 'Load'}, 'status': status}
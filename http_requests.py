@@ -0,0 +1,89 @@
+"""
+Outbound HTTP request objects for Bot API calls
+
+python-telegram-bot sends every Bot API call through an HTTPXRequest. The bot
+uses three, each with its own connection pool so one kind of traffic cannot
+exhaust the others:
+  - 'replies': replies and edits made while handling updates
+  - 'updates': the getUpdates long poll
+  - 'bulk': broadcasts, sent through a separate Bot instance
+Pool size, keep-alive, timeouts and HTTP/2 are configured per pool via the
+BOT_API_* and BULK_SEND_* settings. When one process serves several bots
+(tenants.py), they all share one request object per pool: the token is part
+of each request's URL, not of the connection.
+"""
+
+import logging
+from typing import Optional
+
+import httpx
+from telegram.request import HTTPXRequest
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class TunedHTTPXRequest(HTTPXRequest):
+    """HTTPXRequest whose keep-alive pool can be sized and aged independently"""
+
+    def __init__(self, connection_pool_size: int = 1, keepalive_connections: Optional[int] = None,
+                 keepalive_expiry: Optional[float] = 5.0, **kwargs):
+        super().__init__(connection_pool_size=connection_pool_size, **kwargs)
+        self._client_kwargs['limits'] = httpx.Limits(
+            max_connections=connection_pool_size,
+            max_keepalive_connections=keepalive_connections or connection_pool_size,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # Rebuild with the new limits; the client built by HTTPXRequest has not opened any connection
+        self._client = self._build_client()
+        # Bots initialized with this request and not shut down yet
+        self._users = 0
+
+    async def initialize(self):
+        self._users += 1
+        await super().initialize()
+
+    async def shutdown(self):
+        # Shared by several bots: the pool is closed when the last of them shuts down
+        self._users = max(0, self._users - 1)
+        if not self._users:
+            await super().shutdown()
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_request(pool: str, bots: int = 1) -> TunedHTTPXRequest:
+    """Request object for the 'replies', 'updates' or 'bulk' pool of `bots` bots, from Config"""
+    if pool == 'bulk':
+        pool_size = Config.BULK_SEND_POOL_SIZE
+    elif pool == 'updates':
+        # Each bot's long poll holds one connection
+        pool_size = bots
+    else:
+        pool_size = Config.BOT_API_POOL_SIZE
+
+    http_version = '1.1'
+    if Config.BOT_API_HTTP2:
+        if http2_available():
+            http_version = '2'
+        else:
+            logger.warning("BOT_API_HTTP2 is set but the h2 package is missing; using HTTP/1.1 "
+                           "(install python-telegram-bot[http2])")
+
+    # The long poll holds its request open for the poll timeout; PTB adds that to read_timeout
+    return TunedHTTPXRequest(
+        connection_pool_size=pool_size,
+        keepalive_expiry=Config.BOT_API_KEEPALIVE_EXPIRY,
+        connect_timeout=Config.BOT_API_CONNECT_TIMEOUT,
+        read_timeout=Config.BOT_API_READ_TIMEOUT,
+        write_timeout=Config.BOT_API_WRITE_TIMEOUT,
+        pool_timeout=Config.BOT_API_POOL_TIMEOUT,
+        http_version=http_version,
+    )
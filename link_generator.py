@@ -0,0 +1,131 @@
+"""
+Pre-generation of single-use VIP channel invite links
+
+The bot must be an administrator of VIP_CHANNEL_ID with the right to invite
+users. Whenever the pool of unused links drops below LINK_POOL_LOW_WATER, a
+batch of LINK_BATCH_SIZE invite links (member limit 1, expiring after
+LINK_EXPIRY_HOURS if set) is created through createChatInviteLink, at most
+LINK_CREATE_PER_SECOND per second, and added with Database.add_vip_links as
+it goes. Flood-control answers (RetryAfter) are waited out.
+
+The pool is checked every LINK_CHECK_SECONDS and whenever wake() is called,
+e.g. after a link was handed out. Settings are read on each run, so they can
+be reloaded.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from telegram.error import RetryAfter, TelegramError
+
+from config import Config
+from database import Database
+from logging_setup import log_event
+from metrics import INVITE_LINKS_CREATED_TOTAL
+from tenants import DEFAULT_TENANT, Tenant
+
+logger = logging.getLogger(__name__)
+
+# Links are written to the pool in chunks, so a long batch helps before it ends
+INSERT_CHUNK = 10
+# Consecutive flood-control answers before a batch is abandoned
+MAX_FLOOD_RETRIES = 5
+
+
+class InviteLinkGenerator:
+    def __init__(self, bot, db: Database, tenant: Optional[Tenant] = None):
+        """bot: telegram.Bot with invite rights on the tenant's VIP_CHANNEL_ID"""
+        self.bot = bot
+        self.db = db
+        self.tenant = tenant or DEFAULT_TENANT
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._next_call_at = 0.0
+
+    def wake(self):
+        """Check the pool now instead of at the next interval"""
+        self._wakeup.set()
+
+    async def run(self):
+        """Keep the pool topped up; cancel the task to stop"""
+        logger.info(f"Invite link generator started for chat {self.tenant.VIP_CHANNEL_ID}")
+        while True:
+            try:
+                await self.top_up()
+            except Exception as e:
+                logger.error(f"Invite link top-up failed: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), Config.LINK_CHECK_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def top_up(self) -> int:
+        """Generate a batch if the pool is below the low-water mark; returns links added"""
+        if self.db.count_unused_links() >= Config.LINK_POOL_LOW_WATER:
+            return 0
+        return await self.generate(Config.LINK_BATCH_SIZE)
+
+    async def generate(self, count: int) -> int:
+        """Create up to count invite links and add them to the pool; returns links added"""
+        async with self._lock:
+            expire_date = None
+            expires_at = None
+            if Config.LINK_EXPIRY_HOURS:
+                expire_date = datetime.now(timezone.utc) + timedelta(hours=Config.LINK_EXPIRY_HOURS)
+                expires_at = expire_date.strftime('%Y-%m-%d %H:%M:%S')
+
+            added = 0
+            chunk = []
+            try:
+                for _ in range(count):
+                    link = await self._create_link(expire_date)
+                    if link is None:
+                        break
+                    chunk.append(link)
+                    if len(chunk) == INSERT_CHUNK:
+                        added += self.db.add_vip_links(chunk, expires_at)
+                        chunk = []
+            finally:
+                # Links created before a failure or cancellation are still valid
+                if chunk:
+                    added += self.db.add_vip_links(chunk, expires_at)
+
+            log_event(logger, 'invite_links_generated',
+                      f"Generated {added} of {count} requested invite links",
+                      requested=count, added=added)
+            return added
+
+    async def _create_link(self, expire_date: Optional[datetime]) -> Optional[str]:
+        """One single-use invite link, paced and retried on flood control; None if it cannot be made"""
+        for _ in range(MAX_FLOOD_RETRIES):
+            delay = self._next_call_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_call_at = time.monotonic() + 1 / max(Config.LINK_CREATE_PER_SECOND, 0.01)
+
+            try:
+                invite = await self.bot.create_chat_invite_link(
+                    chat_id=self.tenant.VIP_CHANNEL_ID,
+                    member_limit=1,
+                    expire_date=expire_date,
+                )
+            except RetryAfter as e:
+                INVITE_LINKS_CREATED_TOTAL.labels('rate_limited').inc()
+                retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, 'total_seconds') else e.retry_after
+                logger.warning(f"Invite link creation rate limited; retrying in {retry_after}s")
+                self._next_call_at = time.monotonic() + retry_after
+                continue
+            except TelegramError as e:
+                INVITE_LINKS_CREATED_TOTAL.labels('failed').inc()
+                logger.error(f"Could not create an invite link for chat {self.tenant.VIP_CHANNEL_ID}: {e}")
+                return None
+
+            INVITE_LINKS_CREATED_TOTAL.labels('created').inc()
+            return invite.invite_link
+
+        logger.error("Invite link creation still rate limited; giving up on this batch")
+        return None
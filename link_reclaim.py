@@ -0,0 +1,132 @@
+"""
+Reclaiming VIP links that were handed out but never used to join
+
+Joins to VIP_CHANNEL_ID arrive as chat_member updates and are recorded with
+Database.record_link_join. Every LINK_RECLAIM_SECONDS, links handed out more
+than LINK_JOIN_GRACE_HOURS ago that nobody joined through are swept:
+  - if the user is in the channel after all (e.g. the join happened while
+    the bot was down), the join is recorded;
+  - otherwise the link is revoked with revokeChatInviteLink, taken away from
+    the user (who is told to send /verify for a new one) and the link
+    generator is woken to replace it;
+  - links the bot cannot revoke (ones added by hand with /admin_add_links)
+    are left with their user and not looked at again.
+"""
+
+import asyncio
+import logging
+from typing import Callable, Optional
+
+from telegram.constants import ChatMemberStatus
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+
+from config import Config
+from database import Database, LinkRecord
+from logging_setup import log_event
+from metrics import LINK_RECLAIMS_TOTAL
+from tenants import DEFAULT_TENANT, Tenant
+
+logger = logging.getLogger(__name__)
+
+# Statuses of users who are in the channel
+MEMBER_STATUSES = frozenset({
+    ChatMemberStatus.MEMBER, ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER, ChatMemberStatus.RESTRICTED,
+})
+
+
+def is_vip_channel(chat, tenant: Tenant = DEFAULT_TENANT) -> bool:
+    """Whether a chat is the tenant's VIP_CHANNEL_ID (numeric ID or @username)"""
+    channel = tenant.VIP_CHANNEL_ID
+    if not channel:
+        return False
+    return str(chat.id) == channel or (chat.username is not None and f'@{chat.username}' == channel)
+
+
+class LinkReclaimer:
+    def __init__(self, bot, db: Database, on_revoked: Optional[Callable[[], None]] = None,
+                 tenant: Optional[Tenant] = None):
+        """
+        bot: telegram.Bot with invite rights on the tenant's VIP_CHANNEL_ID
+        on_revoked: called after a sweep that revoked links (to replace them)
+        """
+        self.bot = bot
+        self.db = db
+        self.on_revoked = on_revoked
+        self.tenant = tenant or DEFAULT_TENANT
+
+    async def run(self):
+        """Sweep periodically; cancel the task to stop"""
+        while True:
+            await asyncio.sleep(Config.LINK_RECLAIM_SECONDS)
+            if not Config.LINK_JOIN_GRACE_HOURS:
+                continue
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"VIP link reclaim sweep failed: {e}")
+
+    async def sweep(self) -> dict:
+        """Process one batch of unjoined links; returns the count per outcome"""
+        outcomes = {'joined': 0, 'revoked': 0, 'kept': 0, 'failed': 0}
+        for link in self.db.get_unjoined_links(Config.LINK_JOIN_GRACE_HOURS, Config.LINK_RECLAIM_BATCH_SIZE):
+            try:
+                outcome = await self._reclaim(link)
+            except RetryAfter as e:
+                # Flood control: leave the rest for the next sweep
+                logger.warning(f"VIP link reclaim rate limited; stopping this sweep ({e})")
+                break
+            outcomes[outcome] += 1
+            LINK_RECLAIMS_TOTAL.labels(outcome).inc()
+
+        if any(outcomes.values()):
+            log_event(logger, 'vip_links_reclaimed',
+                      f"Reclaim sweep: {outcomes['revoked']} revoked, {outcomes['joined']} joined late, "
+                      f"{outcomes['kept']} kept, {outcomes['failed']} failed", **outcomes)
+        if outcomes['revoked'] and self.on_revoked:
+            self.on_revoked()
+        return outcomes
+
+    async def _reclaim(self, link: LinkRecord) -> str:
+        telegram_id = link.used_by
+        channel = self.tenant.VIP_CHANNEL_ID
+
+        if telegram_id is not None:
+            try:
+                member = await self.bot.get_chat_member(chat_id=channel, user_id=telegram_id)
+            except BadRequest:
+                member = None  # never been in the channel
+            except RetryAfter:
+                raise
+            except TelegramError as e:
+                logger.error(f"Could not look up user {telegram_id} in the VIP channel: {e}")
+                return 'failed'
+            if member is not None and member.status in MEMBER_STATUSES:
+                self.db.record_link_join(telegram_id)
+                return 'joined'
+
+        try:
+            await self.bot.revoke_chat_invite_link(chat_id=channel, invite_link=link.link)
+        except BadRequest as e:
+            # Not a link this bot created
+            logger.warning(f"VIP link {link.id} cannot be revoked and stays with user {telegram_id}: {e}")
+            self.db.mark_link_reclaimed(link.id, revoked=False)
+            return 'kept'
+        except RetryAfter:
+            raise
+        except TelegramError as e:
+            logger.error(f"Could not revoke VIP link {link.id}: {e}")
+            return 'failed'
+
+        if not self.db.mark_link_reclaimed(link.id, revoked=True):
+            return 'failed'
+        log_event(logger, 'vip_link_revoked', f"Revoked VIP link {link.id} unused by user {telegram_id}",
+                  link_id=link.id, telegram_id=telegram_id)
+
+        if telegram_id is not None:
+            try:
+                await self.bot.send_message(chat_id=telegram_id, text=self.tenant.VIP_LINK_REVOKED)
+            except Forbidden:
+                pass  # the user blocked the bot
+            except TelegramError as e:
+                logger.warning(f"Could not tell user {telegram_id} about their revoked link: {e}")
+        return 'revoked'
@@ -0,0 +1,170 @@
+"""
+Logging pipeline for the Quotex VIP Channel Bot
+
+Loggers on the event loop thread only enqueue records; a QueueListener thread
+does the formatting and the disk writes. httpx polling chatter is sampled,
+records are tagged with their tenant (see tenants.py), and secrets are
+redacted from the formatted text, tracebacks included, before they ever
+reach the queue.
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import re
+from datetime import datetime, timezone
+from config import Config
+from tenants import current_tenant
+
+TEXT_FORMAT = '%(asctime)s - %(tenant)s - %(name)s - %(levelname)s - %(message)s'
+# Shown for records logged outside any tenant's bot (startup, shared services)
+NO_TENANT = '-'
+
+# Matches the token part of Bot API URLs such as /bot123456:AAF.../getUpdates
+BOT_TOKEN_PATTERN = re.compile(r'bot\d+:[A-Za-z0-9_-]{20,}')
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+
+
+class RedactingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueue records with bot tokens and API hashes replaced. The fully
+    formatted text is redacted (prepare() merges in any traceback and stack,
+    e.g. from logger.exception or PTB's error logging), and so are string
+    values passed through `extra`.
+    """
+
+    def __init__(self, queue, secrets=None):
+        super().__init__(queue)
+        self.secrets = [s for s in (secrets or []) if s and len(s) >= 8]
+
+    def redact(self, text: str) -> str:
+        text = BOT_TOKEN_PATTERN.sub('bot<redacted>', text)
+        for secret in self.secrets:
+            text = text.replace(secret, '<redacted>')
+        return text
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The base class works on a copy, so other handlers still see the original
+        record = super().prepare(record)
+        record.msg = record.message = self.redact(record.msg)
+        for key, value in list(vars(record).items()):
+            if key not in _RECORD_ATTRS and isinstance(value, str):
+                setattr(record, key, self.redact(value))
+        return record
+
+
+class PollingNoiseFilter(logging.Filter):
+    """Keep only one in `sample_rate` successful getUpdates request lines (0 drops all)"""
+
+    def __init__(self, sample_rate: int):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self._seen = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not record.name.startswith('httpx') or record.levelno > logging.INFO:
+            return True
+
+        message = record.getMessage()
+        if 'getUpdates' not in message or '200 OK' not in message:
+            return True
+
+        if self.sample_rate <= 0:
+            return False
+        self._seen += 1
+        return (self._seen - 1) % self.sample_rate == 0
+
+
+class TenantFilter(logging.Filter):
+    """Tag records with the tenant whose bot logged them, for both text lines and structured events"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        tenant = current_tenant.get()
+        if tenant is not None and not hasattr(record, 'tenant'):
+            record.tenant = tenant
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    """Render records carrying an `event` as JSON lines, everything else as text"""
+
+    def __init__(self, fmt: str = TEXT_FORMAT):
+        super().__init__(fmt, defaults={'tenant': NO_TENANT})
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, 'event'):
+            return super().format(record)
+
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.event,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key != 'event':
+                payload[key] = value
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+def log_event(logger: logging.Logger, event: str, message: str, level: int = logging.INFO, **fields):
+    """Log a structured event; `fields` become top-level JSON keys"""
+    logger.log(level, message, extra={'event': event, **fields})
+
+
+def _file_handler() -> logging.Handler:
+    """Build the rotating file handler (time-based if LOG_ROTATE_WHEN is set)"""
+    if Config.LOG_ROTATE_WHEN:
+        return logging.handlers.TimedRotatingFileHandler(
+            Config.LOG_FILE,
+            when=Config.LOG_ROTATE_WHEN,
+            backupCount=Config.LOG_BACKUP_COUNT,
+            encoding='utf-8'
+        )
+    return logging.handlers.RotatingFileHandler(
+        Config.LOG_FILE,
+        maxBytes=Config.LOG_MAX_BYTES,
+        backupCount=Config.LOG_BACKUP_COUNT,
+        encoding='utf-8'
+    )
+
+
+def setup_logging(secrets=()):
+    """Route all logging through a queue drained by a background listener thread; secrets are redacted too"""
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = StructuredFormatter()
+    file_handler = _file_handler()
+    stream_handler = logging.StreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = RedactingQueueHandler(log_queue, [Config.BOT_TOKEN, Config.TELEGRAM_API_HASH, *secrets])
+    queue_handler.addFilter(PollingNoiseFilter(Config.LOG_POLLING_SAMPLE_RATE))
+    queue_handler.addFilter(TenantFilter())
+
+    root = logging.getLogger()
+    root.setLevel(Config.LOG_LEVEL)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records to disk and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,140 @@
+"""
+Event loop lag monitor and watchdog
+
+A heartbeat task sleeps LOOP_LAG_INTERVAL seconds at a time and records how
+late it wakes up: that lag is how long any callback (a handler, a reply)
+waited for the loop. A watcher thread checks the heartbeat; once the loop has
+been stuck for LOOP_LAG_THRESHOLD seconds, it captures the loop thread's
+stack, so the synchronous call holding it (subprocess.run, a sqlite3 query,
+...) is logged and kept for /admin_loop while it is still running.
+
+If LOOP_WATCHDOG_SECONDS is set and the loop stays stuck that long, the
+watcher logs the stack and ends the process with WATCHDOG_EXIT_CODE, for the
+process supervisor (systemd, Docker, ...) to restart it.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Optional
+
+from config import Config
+from logging_setup import log_event, shutdown_logging
+from metrics import LOOP_LAG, LOOP_STALLS_TOTAL
+from tracing import StageStats
+
+logger = logging.getLogger(__name__)
+
+# EX_SOFTWARE; tells the supervisor the process was wedged, not stopped
+WATCHDOG_EXIT_CODE = 70
+# Stalls kept for /admin_loop, and innermost stack frames kept per stall
+STALLS_KEPT = 10
+STACK_FRAMES = 15
+
+
+class LoopMonitor:
+    def __init__(self):
+        self.lag = StageStats(Config.TRACE_MAX_SAMPLES)
+        # Most recent stalls: {'at': wall time, 'blocked': seconds, 'stack': text}
+        self.stalls = deque(maxlen=STALLS_KEPT)
+        self._stalls_lock = threading.Lock()
+        self._beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        """Start monitoring the running event loop (call from the loop thread)"""
+        if self.running or not Config.LOOP_LAG_INTERVAL:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._thread.start()
+        logger.info(f"Event loop monitor started (stall threshold {Config.LOOP_LAG_THRESHOLD}s, "
+                    f"watchdog {Config.LOOP_WATCHDOG_SECONDS or 'off'})")
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def reset(self):
+        self.lag = StageStats(Config.TRACE_MAX_SAMPLES)
+        with self._stalls_lock:
+            self.stalls.clear()
+
+    def summary(self) -> dict:
+        """Lag percentiles (seconds) over recent heartbeats"""
+        return self.lag.summary()
+
+    def recent_stalls(self) -> list:
+        """Copies of the kept stalls, oldest first"""
+        with self._stalls_lock:
+            return [dict(stall) for stall in self.stalls]
+
+    async def _heartbeat(self):
+        while True:
+            interval = Config.LOOP_LAG_INTERVAL or 1.0
+            self._beat = time.monotonic()
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.monotonic() - self._beat - interval)
+            self.lag.add(lag)
+            LOOP_LAG.observe(lag)
+            if lag >= Config.LOOP_LAG_THRESHOLD:
+                LOOP_STALLS_TOTAL.inc()
+
+    def _watch(self):
+        """Watcher thread: capture the stack of a stuck loop, and end the process if it stays stuck"""
+        reported_beat = None
+        while not self._stop_event.wait(max(Config.LOOP_LAG_THRESHOLD / 4, 0.01)):
+            beat = self._beat
+            blocked = time.monotonic() - beat - (Config.LOOP_LAG_INTERVAL or 1.0)
+            if blocked < Config.LOOP_LAG_THRESHOLD:
+                continue
+
+            if beat != reported_beat:
+                reported_beat = beat
+                stall = {'at': time.time(), 'blocked': blocked, 'stack': self._loop_stack()}
+                with self._stalls_lock:
+                    self.stalls.append(stall)
+                log_event(logger, 'event_loop_blocked',
+                          f"Event loop blocked for {blocked:.2f}s in:\n{stall['stack']}",
+                          level=logging.WARNING, blocked_seconds=round(blocked, 3))
+            else:
+                # Still the same stall; keep its duration current
+                with self._stalls_lock:
+                    stall['blocked'] = blocked
+
+            if Config.LOOP_WATCHDOG_SECONDS and blocked >= Config.LOOP_WATCHDOG_SECONDS:
+                log_event(logger, 'watchdog_exit',
+                          f"Event loop blocked for {blocked:.1f}s; exiting with status {WATCHDOG_EXIT_CODE} "
+                          f"for the supervisor to restart the bot. Stuck in:\n{self._loop_stack()}",
+                          level=logging.CRITICAL, blocked_seconds=round(blocked, 3))
+                shutdown_logging()
+                os._exit(WATCHDOG_EXIT_CODE)
+
+    def _loop_stack(self) -> str:
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return '(loop thread not found)'
+        return ''.join(traceback.format_stack(frame)[-STACK_FRAMES:]).rstrip()
+
+
+loop_monitor = LoopMonitor()
@@ -5,30 +5,38 @@ Main entry point for the Quotex VIP Channel Bot
 
 import logging
 import os
-from bot import QuotexVIPBot
-
-# Configure logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
+from config_reload import config_reloader
+from logging_setup import setup_logging, shutdown_logging
+from tenants import load_tenants
+
+# Apply CONFIG_FILE overrides, including startup-only settings such as logging
+config_reloader.load(startup=True)
+
+# The bots to serve (one unless TENANTS_FILE lists several); their tokens are redacted from logs
+tenants = load_tenants()
+
+# Configure logging before the bot modules start emitting records
+setup_logging(secrets=[tenant.BOT_TOKEN for tenant in tenants])
+
+from bot import build_host
+from tracing import tracer
 
 logger = logging.getLogger(__name__)
 
 def main():
     """Main function to start the bot"""
     try:
-        # Initialize and start the bot
-        bot = QuotexVIPBot()
-        logger.info("Starting Quotex VIP Channel Bot...")
-        bot.run()
+        # Initialize and start the bots
+        host = build_host(tenants)
+        logger.info(f"Starting Quotex VIP Channel Bot ({len(tenants)} bot(s): "
+                    f"{', '.join(tenant.tenant_id for tenant in tenants)})...")
+        host.run()
     except Exception as e:
         logger.error(f"Failed to start bot: {e}")
         raise
+    finally:
+        tracer.close()
+        shutdown_logging()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,324 @@
+"""
+Prometheus-style metrics for the Quotex VIP Channel Bot
+
+Metrics are plain in-process counters, gauges and fixed-bucket histograms.
+Recording a value is a dict lookup plus an addition under an uncontended lock;
+formatting only happens when the optional HTTP endpoint is scraped.
+"""
+
+import abc
+import asyncio
+import functools
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value: float):
+        self.value = value
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            if index < len(self.counts):
+                self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class _Metric(abc.ABC):
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """A new child holding the value for one set of label values"""
+
+    def labels(self, *values):
+        """Return the child for a set of label values, creating it on first use"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _samples(self):
+        for values, child in list(self._children.items()):
+            yield tuple(str(v) for v in values), child
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._render_samples())
+        return '\n'.join(lines)
+
+    def _render_samples(self):
+        for values, child in self._samples():
+            yield f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}'
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable[[], float]] = None
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1):
+        self.labels().dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        """Compute the (unlabelled) value at scrape time instead of on the hot path"""
+        self._function = function
+
+    def _render_samples(self):
+        if self._function is not None:
+            try:
+                yield f'{self.name} {_format_value(self._function())}'
+            except Exception as e:
+                logger.warning(f"Could not evaluate gauge {self.name}: {e}")
+            return
+        yield from super()._render_samples()
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _render_samples(self):
+        for values, child in self._samples():
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.labelnames, values, 'le="+Inf"')
+            yield f'{self.name}_bucket{labels} {count}'
+            yield f'{self.name}_sum{_format_labels(self.labelnames, values)} {_format_value(total)}'
+            yield f'{self.name}_count{_format_labels(self.labelnames, values)} {count}'
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+
+REGISTRY = Registry()
+
+UPDATES_TOTAL = REGISTRY.counter(
+    'quotex_bot_updates_total', 'Updates dispatched, by handler', ['handler'])
+VERIFICATIONS_TOTAL = REGISTRY.counter(
+    'quotex_bot_verifications_total', 'Verification outcomes', ['outcome'])
+VERIFICATION_LATENCY = REGISTRY.histogram(
+    'quotex_bot_verification_seconds', 'End-to-end verification latency')
+VERIFICATIONS_IN_FLIGHT = REGISTRY.gauge(
+    'quotex_bot_verifications_in_flight', 'Verifications currently being processed')
+DB_LATENCY = REGISTRY.histogram(
+    'quotex_bot_db_operation_seconds', 'Database method latency', ['method'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+LINK_POOL_REMAINING = REGISTRY.gauge(
+    'quotex_bot_vip_links_available', 'Unused VIP links left in the pool')
+BROADCAST_MESSAGES_TOTAL = REGISTRY.counter(
+    'quotex_bot_broadcast_messages_total', 'Broadcast messages, by result', ['result'])
+PARTNER_QUERIES_TOTAL = REGISTRY.counter(
+    'quotex_bot_partner_queries_total', 'Partner bot lookups dispatched, by scheduler lane', ['lane'])
+PARTNER_QUEUE_DEPTH = REGISTRY.gauge(
+    'quotex_bot_partner_queue_depth', 'Partner bot lookups waiting, by scheduler lane', ['lane'])
+PARTNER_QUEUE_WAIT = REGISTRY.histogram(
+    'quotex_bot_partner_queue_wait_seconds', 'Time partner bot lookups spent queued, by lane', ['lane'])
+REVERIFICATIONS_TOTAL = REGISTRY.counter(
+    'quotex_bot_reverifications_total', 'Background re-verification outcomes', ['outcome'])
+VERIFICATION_BREAKER_STATE = REGISTRY.gauge(
+    'quotex_bot_verification_breaker_state', 'Verification circuit breaker: 0 closed, 1 half-open, 2 open')
+BREAKER_TRANSITIONS_TOTAL = REGISTRY.counter(
+    'quotex_bot_verification_breaker_transitions_total', 'Circuit breaker transitions, by new state', ['state'])
+PENDING_VERIFICATIONS = REGISTRY.gauge(
+    'quotex_bot_pending_verifications', 'Verifications queued while the backend was unavailable')
+INVITE_LINKS_CREATED_TOTAL = REGISTRY.counter(
+    'quotex_bot_invite_links_created_total', 'createChatInviteLink calls, by result', ['result'])
+CHANNEL_JOINS_TOTAL = REGISTRY.counter(
+    'quotex_bot_vip_channel_joins_total', 'VIP channel joins, by whether they matched a handed-out link', ['matched'])
+ABUSE_BLOCKS_TOTAL = REGISTRY.counter(
+    'quotex_bot_abuse_blocks_total', 'Verifications refused by abuse detection, by reason', ['reason'])
+BACKUPS_TOTAL = REGISTRY.counter(
+    'quotex_bot_backups_total', 'Database snapshots, by result', ['result'])
+LAST_BACKUP_TIMESTAMP = REGISTRY.gauge(
+    'quotex_bot_last_backup_timestamp_seconds', 'Unix time of the last successful snapshot')
+LOOP_LAG = REGISTRY.histogram(
+    'quotex_bot_event_loop_lag_seconds', 'How late the event loop heartbeat woke up',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+LOOP_STALLS_TOTAL = REGISTRY.counter(
+    'quotex_bot_event_loop_stalls_total', 'Heartbeats late by at least LOOP_LAG_THRESHOLD')
+LINK_RECLAIMS_TOTAL = REGISTRY.counter(
+    'quotex_bot_vip_link_reclaims_total', 'Unjoined VIP links processed by the reclaim sweep, by outcome', ['outcome'])
+
+
+def timed(histogram: Histogram, label: str):
+    """Decorator observing a function's duration under the given label"""
+    def decorator(func):
+        child = histogram.labels(label)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+class MetricsServer:
+    """Minimal asyncio HTTP server answering GET /metrics"""
+
+    def __init__(self, registry: Registry, host: str, port: int):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Metrics endpoint listening on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Drain the request headers
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b'\r\n', b'\n', b''):
+                pass
+
+            parts = request_line.decode('latin-1').split()
+            if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] == '/metrics':
+                status, body = '200 OK', self.registry.render().encode('utf-8')
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            else:
+                status, body, content_type = '404 Not Found', b'Not Found\n', 'text/plain'
+
+            writer.write(
+                f'HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n'
+                f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode('latin-1') + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            logger.debug(f"Metrics request aborted: {e}")
+        finally:
+            writer.close()
@@ -0,0 +1,201 @@
+"""
+Local stand-in for @QuotexPartnerBot, used for offline verification tests
+
+PartnerBotSimulator answers "/<trader id>" commands the way the partner bot
+does: a trader card with the deposits sum for IDs registered through our
+referral link, and a "was not found" notice otherwise. Replies land in a single
+chat history, shared by every query, just as they do on the real account.
+
+Faults can be injected to reproduce what the live bot does on a bad day:
+  - reply_delay/jitter: slow replies, which may miss the transport's wait window
+  - out_of_order_rate: a reply is held back and arrives after the next query's
+  - flood_rate: unrelated messages arrive right after a reply and push it out
+    of the fetched history
+  - malformed_rate: truncated, empty or garbled replies
+  - error_rate: the query itself fails (seen as TransportError)
+
+SimulatorTransport plugs the simulator into VerificationService in place of
+the Telethon subprocess. With a SimulatedClock, runs are deterministic and
+take no wall time.
+"""
+
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from verification_simple import TransportError
+
+COMMAND_PATTERN = re.compile(r'^/(\w+)$')
+
+FLOOD_MESSAGES = [
+    "🔥 Weekly partner contest: the top 10 affiliates share $50,000!",
+    "Reminder: payouts are processed every Tuesday.",
+    "New promo materials are available in your partner account.",
+    "📈 Your conversion report for yesterday is ready.",
+    "Tip: use sub-IDs to track your traffic sources.",
+]
+
+
+class SimulatedClock:
+    """Manual clock: sleep() advances time instantly instead of blocking"""
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+        self._lock = threading.Lock()
+
+    def now(self) -> float:
+        with self._lock:
+            return self._now
+
+    def sleep(self, seconds: float):
+        with self._lock:
+            self._now += max(0.0, seconds)
+
+
+class TraderProfile:
+    """What the partner bot knows about a trader registered through our link"""
+    __slots__ = ('trader_id', 'country', 'deposits_sum', 'registered_at')
+
+    def __init__(self, trader_id: str, country: str = 'IN', deposits_sum: float = 0.0,
+                 registered_at: str = '2025-01-01'):
+        self.trader_id = trader_id
+        self.country = country
+        self.deposits_sum = deposits_sum
+        self.registered_at = registered_at
+
+
+class PartnerBotSimulator:
+    def __init__(self, traders: Optional[Dict[str, TraderProfile]] = None, reply_delay: float = 0.5,
+                 jitter: float = 0.0, out_of_order_rate: float = 0.0, flood_rate: float = 0.0,
+                 flood_size: int = 6, malformed_rate: float = 0.0, error_rate: float = 0.0,
+                 seed: Optional[int] = None, clock: Callable[[], float] = time.monotonic):
+        self.traders = dict(traders or {})
+        self.reply_delay = reply_delay
+        self.jitter = jitter
+        self.out_of_order_rate = out_of_order_rate
+        self.flood_rate = flood_rate
+        self.flood_size = flood_size
+        self.malformed_rate = malformed_rate
+        self.error_rate = error_rate
+        self.clock = clock
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # (visible_at, sequence, text); the chat as the account would see it
+        self._history: List[Tuple[float, int, str]] = []
+        self._sequence = 0
+        self._held: Optional[str] = None
+        self.queries = 0
+        self.injected = {'out_of_order': 0, 'flood': 0, 'malformed': 0, 'error': 0}
+
+    def add_trader(self, trader_id: str, **profile):
+        self.traders[trader_id] = TraderProfile(trader_id, **profile)
+
+    # Reply formats
+
+    def format_registered(self, profile: TraderProfile) -> str:
+        return (
+            f"Trader ID: {profile.trader_id}\n"
+            f"Country: {profile.country}\n"
+            f"Registration date: {profile.registered_at}\n"
+            f"Deposits sum: ${profile.deposits_sum:,.2f}\n"
+            f"Balance: ${profile.deposits_sum:,.2f}"
+        )
+
+    def format_not_found(self, trader_id: str) -> str:
+        return f"Trader with ID = {trader_id} was not found"
+
+    def format_malformed(self, text: str, trader_id: str) -> str:
+        kind = self._random.randrange(4)
+        if kind == 0:
+            return text[:max(1, len(text) // 3)]
+        if kind == 1:
+            return ''
+        if kind == 2:
+            return text.replace(trader_id, '<unknown>')
+        return f"<b>{trader_id}</b> ⚠️ {{{{ template_error }}}}"
+
+    # Chat protocol
+
+    def send(self, text: str):
+        """A message from our account to the partner bot"""
+        match = COMMAND_PATTERN.match(text.strip())
+        with self._lock:
+            self.queries += 1
+            now = self.clock()
+            if not match:
+                self._post(now + self._delay(), "Unknown command. Send /<trader id> to check a trader.")
+                return
+            trader_id = match.group(1)
+            profile = self.traders.get(trader_id)
+            reply = self.format_registered(profile) if profile else self.format_not_found(trader_id)
+
+            if self.malformed_rate and self._random.random() < self.malformed_rate:
+                self.injected['malformed'] += 1
+                reply = self.format_malformed(reply, trader_id)
+
+            visible_at = now + self._delay()
+            # A previously held reply is released right after this one
+            held, self._held = self._held, None
+            if self.out_of_order_rate and self._random.random() < self.out_of_order_rate:
+                self.injected['out_of_order'] += 1
+                self._held = reply
+            else:
+                self._post(visible_at, reply)
+            if held is not None:
+                self._post(visible_at, held)
+
+            if self.flood_rate and self._random.random() < self.flood_rate:
+                self.injected['flood'] += 1
+                for _ in range(self.flood_size):
+                    self._post(visible_at, self._random.choice(FLOOD_MESSAGES))
+
+    def get_messages(self, limit: int) -> List[str]:
+        """Texts of the `limit` newest visible messages, newest first"""
+        with self._lock:
+            now = self.clock()
+            visible = [entry for entry in self._history if entry[0] <= now]
+            # Keep the history bounded; older messages are never fetched again
+            self._history = visible[-limit:] + [entry for entry in self._history if entry[0] > now]
+            return [text for _, _, text in reversed(visible[-limit:])]
+
+    def fail_next(self) -> bool:
+        """Whether the current query should fail at the transport level"""
+        with self._lock:
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.injected['error'] += 1
+                return True
+            return False
+
+    def _delay(self) -> float:
+        if not self.jitter:
+            return self.reply_delay
+        return max(0.0, self._random.gauss(self.reply_delay, self.jitter))
+
+    def _post(self, visible_at: float, text: str):
+        self._sequence += 1
+        self._history.append((visible_at, self._sequence, text))
+        self._history.sort()
+
+
+class SimulatorTransport:
+    """VerificationService transport backed by a PartnerBotSimulator"""
+
+    def __init__(self, simulator: PartnerBotSimulator, wait: float = 3.0, history_limit: int = 5,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.simulator = simulator
+        self.wait = wait
+        self.history_limit = history_limit
+        self.sleep = sleep
+
+    def query(self, quotex_user_id: str) -> List[str]:
+        if self.simulator.fail_next():
+            raise TransportError("Simulated connection failure")
+        self.simulator.send(f"/{quotex_user_id}")
+        self.sleep(self.wait)
+        return self.simulator.get_messages(self.history_limit)
+
+    def test_connection(self) -> bool:
+        return True
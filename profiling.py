@@ -0,0 +1,156 @@
+"""
+On-demand profiling for the Quotex VIP Channel Bot
+
+A sampling CPU profiler (a background thread reading the event loop thread's
+stack) and tracemalloc snapshotting, both switched on only for a bounded window.
+Nothing is installed while profiling is off.
+"""
+
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Optional
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """Periodically sample one thread's stack and count the functions seen"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.self_counts = Counter()
+        self.total_counts = Counter()
+        self.samples = 0
+        self._target_thread = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self, target_thread: int):
+        self._target_thread = target_thread
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self._target_thread)
+            if frame is None:
+                continue
+            self.samples += 1
+            self.self_counts[self._key(frame)] += 1
+            seen = set()
+            while frame is not None:
+                key = self._key(frame)
+                if key not in seen:
+                    seen.add(key)
+                    self.total_counts[key] += 1
+                frame = frame.f_back
+
+    @staticmethod
+    def _key(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+    def report(self, top: int) -> str:
+        lines = [f"CPU samples: {self.samples} (every {self.interval * 1000:.1f} ms)", ""]
+        for title, counts in (("Top functions (self)", self.self_counts),
+                              ("Top functions (cumulative)", self.total_counts)):
+            lines.append(title)
+            for key, count in counts.most_common(top):
+                share = count / self.samples * 100 if self.samples else 0.0
+                lines.append(f"  {share:5.1f}%  {count:6d}  {key}")
+            lines.append("")
+        return "\n".join(lines)
+
+
+class Profiler:
+    """One bounded profiling session at a time, started and stopped by admins"""
+
+    def __init__(self):
+        self.started_at: Optional[float] = None
+        self.duration: Optional[float] = None
+        self._sampler: Optional[SamplingProfiler] = None
+        self._baseline = None
+        self._started_tracemalloc = False
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.started_at is not None
+
+    def start(self, duration: float) -> bool:
+        """Start sampling the calling thread; False if a session is already running"""
+        with self._lock:
+            if self.active:
+                return False
+            self.started_at = time.time()
+            self.duration = duration
+
+            self._sampler = SamplingProfiler(Config.PROFILE_SAMPLE_INTERVAL)
+            self._sampler.start(threading.get_ident())
+
+            self._started_tracemalloc = not tracemalloc.is_tracing()
+            if self._started_tracemalloc:
+                tracemalloc.start(Config.PROFILE_TRACEMALLOC_FRAMES)
+            self._baseline = tracemalloc.take_snapshot()
+
+        logger.info(f"Profiling started for up to {duration:.0f}s")
+        return True
+
+    def stop(self) -> Optional[str]:
+        """Stop the running session and return its report, or None if none was running"""
+        with self._lock:
+            if not self.active:
+                return None
+            elapsed = time.time() - self.started_at
+            self._sampler.stop()
+
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+            report = self._render(elapsed, snapshot, current, peak)
+            self.started_at = None
+            self.duration = None
+            self._sampler = None
+            self._baseline = None
+
+        logger.info(f"Profiling stopped after {elapsed:.1f}s")
+        return report
+
+    def _render(self, elapsed: float, snapshot, current: int, peak: int) -> str:
+        top = Config.PROFILE_TOP_N
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+        lines = [
+            f"Profile window: {elapsed:.1f}s",
+            "",
+            self._sampler.report(top),
+            f"Traced memory: current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB",
+            "",
+            "Top allocation sites (growth during window)",
+        ]
+        for stat in snapshot.compare_to(self._baseline, 'lineno')[:top]:
+            lines.append(f"  {stat.size_diff / 1024:+10.1f} KiB  {stat.count_diff:+8d} blocks  {stat.traceback}")
+        lines.append("")
+        lines.append("Top allocation sites (live at end)")
+        for stat in snapshot.statistics('lineno')[:top]:
+            lines.append(f"  {stat.size / 1024:10.1f} KiB  {stat.count:8d} blocks  {stat.traceback}")
+        return "\n".join(lines) + "\n"
+
+
+profiler = Profiler()
@@ -0,0 +1,87 @@
+"""
+Classifier for @QuotexPartnerBot replies
+
+One compiled regex scans a reply once, left to right, and picks up both the
+verdict keywords and the trader card fields (deposits sum, country). Keywords
+match whole words only, so "invalid" no longer counts as "valid".
+
+Precedence, unchanged from the keyword lists it replaces: any negative keyword
+means not found; otherwise a deposits sum or a positive keyword means
+registered; otherwise the reply is unknown.
+"""
+
+import re
+from typing import Optional
+
+REGISTERED = 'registered'
+NOT_FOUND = 'not_found'
+UNKNOWN = 'unknown'
+
+# Every alternative starts at a word boundary; the lookahead on the possible
+# first letters lets the scanner skip most positions without trying each branch
+REPLY_PATTERN = re.compile(r"""
+    \b(?=[cdefinrsvwCDEFINRSVW])
+    (?:
+        (?P<negative>
+            (?:was\s+)?not\s+(?:found|registered|valid)\b
+          | invalid\b | error\b | fail(?:ed|ure)?\b
+        )
+      | (?P<deposits>
+            deposits?\s+sum\s*:[ \t]*\$?[ \t]*(?P<amount>\d[\d,]*(?:\.\d+)?)?
+        )
+      | (?P<country>
+            country\s*:[ \t]*(?P<country_value>[^\r\n]*)
+        )
+      | (?P<positive>
+            (?:registered|verified|valid|success(?:ful)?|confirmed)\b
+        )
+    )
+""", re.IGNORECASE | re.VERBOSE)
+
+
+class ClassifiedReply:
+    """Verdict and trader card fields parsed from one partner bot reply"""
+    __slots__ = ('status', 'deposits_sum', 'country')
+
+    def __init__(self, status: str, deposits_sum: Optional[float] = None, country: Optional[str] = None):
+        self.status = status
+        self.deposits_sum = deposits_sum
+        self.country = country
+
+    @property
+    def registered(self) -> bool:
+        return self.status == REGISTERED
+
+    @property
+    def conclusive(self) -> bool:
+        return self.status != UNKNOWN
+
+    def __repr__(self):
+        return f"ClassifiedReply({self.status!r}, deposits_sum={self.deposits_sum!r}, country={self.country!r})"
+
+
+def classify(text: Optional[str]) -> ClassifiedReply:
+    """Classify a partner bot reply in a single pass over its text"""
+    if not text:
+        return ClassifiedReply(UNKNOWN)
+
+    positive = False
+    deposits_sum = None
+    country = None
+    for match in REPLY_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind == 'negative':
+            return ClassifiedReply(NOT_FOUND)
+        if kind == 'deposits':
+            positive = True
+            amount = match.group('amount')
+            if amount is not None and deposits_sum is None:
+                deposits_sum = float(amount.replace(',', ''))
+        elif kind == 'country':
+            country = match.group('country_value').strip() or country
+        else:
+            positive = True
+
+    if positive:
+        return ClassifiedReply(REGISTERED, deposits_sum, country)
+    return ClassifiedReply(UNKNOWN, deposits_sum, country)
@@ -0,0 +1,82 @@
+"""
+Background re-verification of verified users
+
+Walks the users table in user_id order, a batch at a time, and asks the
+partner bot about each user again through the scheduler's background lane, so
+deposits sum and country stay current without competing with /verify. The
+cursor is stored in the database, so a restart resumes where the sweep left
+off; after a full pass the sweep rests for REVERIFY_IDLE_SECONDS.
+"""
+
+import asyncio
+import logging
+
+from circuit_breaker import CircuitOpenError
+from config import Config
+from database import Database
+from logging_setup import log_event
+from metrics import REVERIFICATIONS_TOTAL
+from response_classifier import NOT_FOUND
+from verification_scheduler import BACKGROUND, VerificationScheduler
+
+logger = logging.getLogger(__name__)
+
+CURSOR_NAME = 'reverify_users'
+
+
+class ReverificationJob:
+    def __init__(self, db: Database, scheduler: VerificationScheduler):
+        self.db = db
+        self.scheduler = scheduler
+
+    async def run(self):
+        """Sweep forever; cancel the task to stop"""
+        logger.info("Background re-verification started")
+        while True:
+            if not await self.sweep_batch():
+                await asyncio.sleep(Config.REVERIFY_IDLE_SECONDS)
+
+    async def sweep_batch(self) -> int:
+        """Re-check the next batch of users; returns how many were checked (0 at the end of a pass or while the backend is down)"""
+        position = self.db.get_job_cursor(CURSOR_NAME)
+        users = self.db.get_users_for_reverification(position, Config.REVERIFY_BATCH_SIZE,
+                                                     Config.REVERIFY_MIN_AGE_HOURS)
+        if not users:
+            if position:
+                logger.info("Re-verification pass complete")
+                self.db.set_job_cursor(CURSOR_NAME, 0)
+            return 0
+
+        checked = 0
+        for user in users:
+            if not await self.reverify(user.telegram_id, user.quotex_user_id):
+                # Backend down: keep the cursor here and rest until the next round
+                break
+            self.db.set_job_cursor(CURSOR_NAME, user.user_id)
+            checked += 1
+        return checked
+
+    async def reverify(self, telegram_id: int, quotex_user_id: str) -> bool:
+        """Re-check one user; False if the circuit breaker refused the lookup"""
+        try:
+            reply = await self.scheduler.check(quotex_user_id, BACKGROUND)
+        except CircuitOpenError:
+            REVERIFICATIONS_TOTAL.labels('unavailable').inc()
+            return False
+        except Exception as e:
+            logger.error(f"Re-verification error for user {telegram_id}: {e}")
+            REVERIFICATIONS_TOTAL.labels('error').inc()
+            return True
+
+        if not reply.conclusive:
+            # Leave the user unchecked so the next pass tries again
+            REVERIFICATIONS_TOTAL.labels('unknown').inc()
+            return True
+
+        self.db.update_trader_profile(telegram_id, reply.deposits_sum, reply.country)
+        if reply.status == NOT_FOUND:
+            log_event(logger, 'reverification_not_found',
+                      f"Partner bot no longer finds Quotex ID {quotex_user_id} of verified user {telegram_id}",
+                      level=logging.WARNING, telegram_id=telegram_id, quotex_user_id=quotex_user_id)
+        REVERIFICATIONS_TOTAL.labels(reply.status).inc()
+        return True
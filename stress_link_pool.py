@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Multi-process stress test for the shared VIP link pool
+
+Spawns N worker processes against one SQLite file. Every worker claims links
+for an overlapping range of Telegram IDs, so the same user is racing in several
+processes at once. The run fails if any link is handed out twice or any user
+ends up with more than one row.
+
+Usage: python stress_link_pool.py [--processes 8] [--users 2000] [--links 1500]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Workers must see the multi-process settings before config is imported
+os.environ.setdefault('DB_MULTI_PROCESS', 'true')
+
+from database import Database
+
+
+def claim_worker(db_path: str, telegram_ids: list, queue: multiprocessing.Queue):
+    """Claim a link for every telegram ID and report what was handed out"""
+    db = Database(db_path)
+    handed_out = []
+    for telegram_id in telegram_ids:
+        result = db.claim_vip_link(telegram_id, str(10000000 + telegram_id))
+        if result:
+            handed_out.append((telegram_id, result[0]))
+    queue.put((os.getpid(), handed_out))
+
+
+def lease_worker(db_path: str, telegram_ids: list, queue: multiprocessing.Queue):
+    """Use the two-step lease/mark path instead of the atomic claim"""
+    db = Database(db_path)
+    handed_out = []
+    for telegram_id in telegram_ids:
+        result = db.get_unused_vip_link()
+        if result and db.mark_link_as_used(result[0], telegram_id):
+            handed_out.append((telegram_id, result[0]))
+    queue.put((os.getpid(), handed_out))
+
+
+def run(processes: int, users: int, links: int, mode: str) -> bool:
+    """Run one stress round and return True if no duplicates were found"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'stress.db')
+        db = Database(db_path)
+        db.add_vip_links([f"https://t.me/+stress_{i}" for i in range(links)])
+
+        # Each worker gets the full user range in a different rotation so the
+        # same telegram ID is contended by several processes
+        all_ids = list(range(1, users + 1))
+        step = max(1, users // processes)
+        worker = claim_worker if mode == 'claim' else lease_worker
+        queue = multiprocessing.Queue()
+        workers = []
+        for n in range(processes):
+            ids = all_ids[n * step:] + all_ids[:n * step]
+            workers.append(multiprocessing.Process(target=worker, args=(db_path, ids, queue)))
+
+        started = time.perf_counter()
+        for proc in workers:
+            proc.start()
+        results = [queue.get() for _ in workers]
+        for proc in workers:
+            proc.join()
+        elapsed = time.perf_counter() - started
+
+        link_owners = {}
+        duplicate_links = 0
+        for _, handed_out in results:
+            for telegram_id, link_id in handed_out:
+                owner = link_owners.setdefault(link_id, telegram_id)
+                if owner != telegram_id:
+                    duplicate_links += 1
+
+        with sqlite3.connect(db_path) as conn:
+            used_links = conn.execute('SELECT COUNT(*) FROM vip_links WHERE is_used = TRUE').fetchone()[0]
+            user_rows = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+            distinct_users = conn.execute('SELECT COUNT(DISTINCT telegram_id) FROM users').fetchone()[0]
+            shared_links = conn.execute('''
+                SELECT COUNT(*) FROM (
+                    SELECT vip_link_id FROM users GROUP BY vip_link_id HAVING COUNT(*) > 1
+                )
+            ''').fetchone()[0]
+
+        print(f"mode={mode} processes={processes} users={users} links={links}")
+        print(f"  elapsed:               {elapsed:.2f}s")
+        print(f"  links handed out:      {len(link_owners)} (used in DB: {used_links})")
+        print(f"  duplicate handouts:    {duplicate_links}")
+        if mode == 'claim':
+            print(f"  user rows / distinct:  {user_rows} / {distinct_users}")
+            print(f"  links shared by users: {shared_links}")
+
+        expected = min(users, links)
+        ok = duplicate_links == 0 and len(link_owners) == used_links
+        if mode == 'claim':
+            ok = ok and user_rows == distinct_users and shared_links == 0 and used_links == expected
+        print("  result:                " + ("OK" if ok else "FAILED"))
+        return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--links', type=int, default=1500)
+    parser.add_argument('--mode', choices=['claim', 'lease', 'both'], default='both')
+    args = parser.parse_args()
+
+    modes = ['claim', 'lease'] if args.mode == 'both' else [args.mode]
+    ok = all([run(args.processes, args.users, args.links, mode) for mode in modes])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
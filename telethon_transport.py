@@ -0,0 +1,180 @@
+"""
+Persistent Telethon transport for partner bot lookups
+
+The session file created by setup_auth.py is copied once into an in-memory
+SQLite database, so lookups never contend for the file's lock or re-read it.
+Telethon's entity cache, including the access hash of @QuotexPartnerBot,
+lives in that in-memory copy for the life of the process and is written back
+to disk every SESSION_SNAPSHOT_SECONDS and on close.
+
+One TelegramClient runs on a dedicated thread with its own event loop; query()
+is called from scheduler worker threads and blocks on that loop.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import List
+
+from telethon import TelegramClient
+from telethon.sessions import SQLiteSession
+
+from config import Config
+from tracing import tracer
+from verification_simple import TransportError
+
+logger = logging.getLogger(__name__)
+
+
+class InMemorySession(SQLiteSession):
+    """SQLiteSession backed by an in-memory copy of a session file"""
+
+    def __init__(self, path: str):
+        self.path = path if path.endswith('.session') else path + '.session'
+        self._snapshot_lock = threading.Lock()
+        self._memory = sqlite3.connect(':memory:', check_same_thread=False)
+        if os.path.exists(self.path):
+            source = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+            try:
+                source.backup(self._memory)
+            finally:
+                source.close()
+        # SQLiteSession reads the dc, auth key and version from the copied tables
+        super().__init__()
+
+    def _cursor(self):
+        if self._conn is None:
+            self._conn = self._memory
+        return self._conn.cursor()
+
+    def snapshot(self):
+        """Write the in-memory session back to its file, atomically"""
+        with self._snapshot_lock:
+            self._conn.commit()
+            temp_path = self.path + '.tmp'
+            target = sqlite3.connect(temp_path)
+            try:
+                self._conn.backup(target)
+            finally:
+                target.close()
+            os.replace(temp_path, self.path)
+
+
+class TelethonTransport:
+    """Queries @QuotexPartnerBot through one long-lived Telethon client"""
+
+    def __init__(self, session_path: str = 'verification_session', wait: float = 3.0, history_limit: int = 5,
+                 snapshot_interval: float = 300):
+        self.session_path = session_path
+        self.wait = wait
+        self.history_limit = history_limit
+        self.snapshot_interval = snapshot_interval
+        self.partner_bot = '@QuotexPartnerBot'
+
+        self.session = None
+        self._client = None
+        self._partner = None
+        self._loop = None
+        self._thread = None
+        self._snapshot_task = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        """Start the client thread and connect, once; raises TransportError on failure"""
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            if not Config.TELEGRAM_API_ID or not Config.TELEGRAM_API_HASH:
+                raise TransportError("API credentials not configured")
+
+            self.session = InMemorySession(self.session_path)
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name='telethon', daemon=True)
+            self._thread.start()
+            try:
+                asyncio.run_coroutine_threadsafe(self._connect(), self._loop).result(Config.VERIFICATION_TIMEOUT)
+            except Exception as e:
+                self._stop_loop()
+                if isinstance(e, TransportError):
+                    raise
+                raise TransportError(f"Could not connect: {e}") from e
+
+    async def _connect(self):
+        started = time.perf_counter()
+        self._client = TelegramClient(self.session, int(Config.TELEGRAM_API_ID), Config.TELEGRAM_API_HASH)
+        await self._client.connect()
+        if not await self._client.is_user_authorized():
+            await self._client.disconnect()
+            raise TransportError("Not authorized; run setup_auth.py")
+        tracer.record('telethon_connect', time.perf_counter() - started)
+
+        # Resolved from the session's entity cache when possible; kept for every later lookup
+        self._partner = await self._client.get_input_entity(self.partner_bot)
+        if self.snapshot_interval:
+            self._snapshot_task = asyncio.create_task(self._snapshot_periodically())
+        logger.info(f"Telethon client connected ({self.session.path} loaded into memory)")
+
+    async def _snapshot_periodically(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            try:
+                self.session.snapshot()
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Could not snapshot Telethon session: {e}")
+
+    async def _query(self, quotex_user_id: str) -> List[str]:
+        if not self._client.is_connected():
+            await self._client.connect()
+        await self._client.send_message(self._partner, f"/{quotex_user_id}")
+
+        # Wait for response
+        await asyncio.sleep(self.wait)
+
+        messages = await self._client.get_messages(self._partner, limit=self.history_limit)
+        return [msg.text for msg in messages if msg.text]
+
+    def query(self, quotex_user_id: str) -> List[str]:
+        self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(self._query(quotex_user_id), self._loop)
+        try:
+            with tracer.span('partner_bot_reply'):
+                return future.result(Config.VERIFICATION_TIMEOUT)
+        except Exception as e:
+            future.cancel()
+            raise TransportError(str(e) or type(e).__name__) from e
+
+    def test_connection(self) -> bool:
+        try:
+            self._ensure_started()
+        except TransportError as e:
+            logger.error(f"Connection test failed: {e}")
+            return False
+        logger.info("Connection test successful")
+        return True
+
+    def close(self):
+        """Snapshot the session and disconnect"""
+        with self._start_lock:
+            if self._thread is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._disconnect(), self._loop).result(10)
+            except Exception as e:
+                logger.error(f"Error closing Telethon client: {e}")
+            self._stop_loop()
+
+    async def _disconnect(self):
+        if self._snapshot_task:
+            self._snapshot_task.cancel()
+        self.session.snapshot()
+        await self._client.disconnect()
+
+    def _stop_loop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        self._loop.close()
+        self._loop = None
+        self._thread = None
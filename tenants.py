@@ -0,0 +1,130 @@
+"""
+Several bots (tenants) served from one process
+
+TENANTS_FILE is a JSON object mapping a tenant ID to the settings in which
+that bot differs from Config, e.g.
+    {"billionaire": {"BOT_TOKEN": "...", "REFERRAL_LINK": "https://broker-qx.pro/sign-up/?lid=996329",
+                     "VIP_CHANNEL_ID": "-1001234567890", "ADMIN_USER_IDS": [12345]},
+     "yashoda": {"BOT_TOKEN": "...", "REFERRAL_LINK": "https://broker-qx.pro/sign-up/?lid=123456",
+                 "DATABASE_PATH": "yashoda.db", "WELCOME_MESSAGE": "..."}}
+Only TENANT_SETTINGS can be set per tenant. Everything else (the partner bot
+account and its lookups, HTTP pools, timeouts, limits, logging, metrics)
+comes from Config and is shared by all tenants.
+
+Each tenant keeps its data in its own database: DATABASE_PATH, by default
+the Config one with the tenant ID appended (quotex_bot-billionaire.db), so
+a bot that ran as a separate process can move in with its existing file.
+Messages that mention {referral_link} get the tenant's REFERRAL_LINK.
+
+Without a TENANTS_FILE the process serves one tenant, DEFAULT_TENANT_ID,
+entirely from Config. The file is read at startup.
+"""
+
+import contextvars
+import json
+import os
+import re
+from typing import List, Optional
+
+from config import TEMPLATES, Config
+from config_reload import ConfigError, config_reloader, validate
+
+DEFAULT_TENANT_ID = 'default'
+TENANT_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,32}$')
+
+# Texts users and admins see; any of them can be reworded per tenant
+MESSAGES = (
+    'WELCOME_MESSAGE', 'HELP_MESSAGE', 'VERIFICATION_SUCCESS', 'VERIFICATION_FAILED', 'ALREADY_VERIFIED',
+    'VIP_LINK_REVOKED', 'TOO_MANY_IDS', 'QUOTEX_ID_IN_USE', 'NO_LINKS_AVAILABLE', 'INVALID_USER_ID',
+    'VERIFICATION_WARMING_UP', 'VERIFICATION_UNAVAILABLE', 'VERIFICATION_INTERRUPTED',
+)
+TENANT_SETTINGS = frozenset({
+    'BOT_TOKEN', 'BOT_API_BASE_URL', 'REFERRAL_LINK', 'VIP_CHANNEL_ID', 'ADMIN_USER_IDS', 'DATABASE_PATH',
+    *MESSAGES,
+})
+
+# Tenant whose bot is handling the current update or job; tags log records
+current_tenant = contextvars.ContextVar('current_tenant', default=None)
+
+
+class Tenant:
+    """
+    One bot's settings. Attributes not set for the tenant are read from
+    Config at use time, so reloaded settings apply to every tenant that
+    does not override them.
+    """
+
+    def __init__(self, tenant_id: str, settings: Optional[dict] = None):
+        self.tenant_id = tenant_id
+        self.settings = dict(settings or {})
+        # Copied for each task started on the tenant's behalf, so its log records carry the ID
+        self.context = contextvars.copy_context()
+        self.context.run(current_tenant.set, tenant_id)
+
+    def __getattr__(self, name: str):
+        # Only reached for names that are not instance attributes, i.e. settings
+        settings = self.__dict__.get('settings', {})
+        if name in settings:
+            value = settings[name]
+        elif name in TEMPLATES:
+            value = TEMPLATES[name]
+        else:
+            return getattr(Config, name)
+        if isinstance(value, str) and '{referral_link}' in value:
+            value = value.replace('{referral_link}', self.REFERRAL_LINK)
+        return value
+
+    def __repr__(self) -> str:
+        return f'Tenant({self.tenant_id!r})'
+
+
+DEFAULT_TENANT = Tenant(DEFAULT_TENANT_ID)
+
+
+def tenant_database_path(tenant_id: str) -> str:
+    """Config.DATABASE_PATH with the tenant ID appended to the file name"""
+    root, ext = os.path.splitext(Config.DATABASE_PATH)
+    return f'{root}-{tenant_id}{ext or ".db"}'
+
+
+def load_tenants(path: Optional[str] = None) -> List[Tenant]:
+    """Tenants from TENANTS_FILE (or path), in file order; raises ConfigError if the file is invalid"""
+    path = Config.TENANTS_FILE if path is None else path
+    if not path:
+        return [DEFAULT_TENANT]
+
+    try:
+        with open(path, encoding='utf-8') as f:
+            entries = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ConfigError(f"cannot read {path}: {e}") from e
+    if not isinstance(entries, dict) or not entries:
+        raise ConfigError(f"{path} must contain a JSON object of tenant IDs to settings")
+
+    tenants = []
+    for tenant_id, settings in entries.items():
+        if not TENANT_ID_PATTERN.match(tenant_id):
+            raise ConfigError(f"tenant ID {tenant_id!r} must be 1-32 letters, digits, '_' or '-'")
+        if not isinstance(settings, dict):
+            raise ConfigError(f"tenant {tenant_id}: settings must be a JSON object")
+        shared = sorted(set(settings) - TENANT_SETTINGS)
+        if shared:
+            raise ConfigError(f"tenant {tenant_id}: {', '.join(shared)} cannot be set per tenant")
+        try:
+            settings = validate(settings, config_reloader.baseline)
+        except ConfigError as e:
+            raise ConfigError(f"tenant {tenant_id}: {e}") from e
+        settings.setdefault('DATABASE_PATH', tenant_database_path(tenant_id))
+        tenants.append(Tenant(tenant_id, settings))
+
+    # Two pollers on one token take each other's updates, and a shared file would mix tenants' data
+    for setting in ('BOT_TOKEN', 'DATABASE_PATH'):
+        owners = {}
+        for tenant in tenants:
+            value = getattr(tenant, setting)
+            if setting == 'DATABASE_PATH':
+                value = os.path.abspath(value)
+            if value in owners:
+                raise ConfigError(f"tenants {owners[value]} and {tenant.tenant_id} have the same {setting}")
+            owners[value] = tenant.tenant_id
+    return tenants
@@ -0,0 +1,92 @@
+import asyncio
+import contextlib
+
+import pytest
+
+from config import Config
+from fake_bot_api import FakeBotAPI
+from verification_mock import MockVerificationService
+
+CHANNEL_ID = '-1001234567890'
+
+
+def tenant_token(index: int) -> str:
+    """Fixed, syntactically valid tokens; they never leave localhost"""
+    return f'{123456780 + index}:AAFakeTokenForOfflineTenantTesting{index:04d}'
+
+
+@pytest.fixture
+def serve_bots(tmp_path, monkeypatch):
+    """
+    Factory for an async context manager running real bots in this process,
+    each polling its own FakeBotAPI: `async with serve_bots({...}, {...}) as
+    (shared, bots, apis)`, one bot per dict of tenant settings. Yields once
+    every bot polls and the verification backend is ready.
+    """
+    monkeypatch.setattr(Config, 'METRICS_PORT', 0)
+    monkeypatch.setattr(Config, 'BACKUP_INTERVAL_HOURS', 0)
+
+    @contextlib.asynccontextmanager
+    async def serve(*tenant_settings, service=None):
+        from bot import QuotexVIPBot
+        from bot_host import BotHost, SharedServices
+        from tenants import Tenant
+
+        tenant_settings = tenant_settings or ({},)
+        apis = [FakeBotAPI() for _ in tenant_settings]
+        for api in apis:
+            await api.start()
+        shared = SharedServices(service or MockVerificationService(latency=0, connect_delay=0, registered_ratio=1.0),
+                                bots=len(apis))
+        bots = [
+            QuotexVIPBot(tenant=Tenant(f't{index}', {
+                'BOT_TOKEN': tenant_token(index), 'BOT_API_BASE_URL': api.base_url,
+                'DATABASE_PATH': str(tmp_path / f't{index}.db'), **settings,
+            }), shared=shared)
+            for index, (api, settings) in enumerate(zip(apis, tenant_settings))
+        ]
+        await shared.start()
+        try:
+            await asyncio.gather(*(BotHost._in_tenant(bot, bot.start()) for bot in bots))
+            await asyncio.wait_for(asyncio.gather(*(api.polling_started.wait() for api in apis)), 10)
+            while not shared.verification_ready:
+                await asyncio.sleep(0.01)
+            yield shared, bots, apis
+        finally:
+            await asyncio.gather(*(BotHost._in_tenant(bot, bot.stop()) for bot in bots), return_exceptions=True)
+            await shared.stop()
+            for api in apis:
+                await api.stop()
+
+    return serve
+
+
+@pytest.fixture
+def channel_bot(tmp_path, monkeypatch):
+    """
+    Factory for an async context manager yielding (api, bot, db): a
+    telegram.Bot talking to a FakeBotAPI, and an empty database. The bot may
+    create invite links for Config.VIP_CHANNEL_ID, set to CHANNEL_ID.
+    """
+    from telegram import Bot
+
+    from database import Database
+
+    monkeypatch.setattr(Config, 'VIP_CHANNEL_ID', CHANNEL_ID)
+
+    @contextlib.asynccontextmanager
+    async def serve(invite_link_rate_limit=None):
+        api = FakeBotAPI()
+        api.invite_link_rate_limit = invite_link_rate_limit
+        await api.start()
+        bot = Bot(tenant_token(0), base_url=api.base_url)
+        await bot.initialize()
+        db = Database(str(tmp_path / 'links.db'))
+        try:
+            yield api, bot, db
+        finally:
+            db.close()
+            await bot.shutdown()
+            await api.stop()
+
+    return serve
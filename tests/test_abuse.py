@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+from abuse import ENUMERATION, ID_IN_USE, SHARED_ID, AbuseDetector
+from config import Config
+from database import Database
+
+
+class Clock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'ABUSE_WINDOW_SECONDS', 3600)
+    monkeypatch.setattr(Config, 'ABUSE_MAX_IDS_PER_USER', 3)
+    monkeypatch.setattr(Config, 'ABUSE_MAX_SUBMITTERS_PER_ID', 2)
+    monkeypatch.setattr(Config, 'ABUSE_MAX_ACCOUNTS_PER_ID', 1)
+    db = Database(str(tmp_path / 'abuse.db'))
+    yield db
+    db.close()
+
+
+def enumerate_ids(db: Database, detector: AbuseDetector, telegram_id: int):
+    for quotex_id in ('20000001', '20000002', '20000003'):
+        assert detector.check(telegram_id, quotex_id) is None
+        detector.record(telegram_id, quotex_id)
+        db.log_verification_attempt(telegram_id, quotex_id, False)
+
+
+def test_enumeration_is_blocked_until_the_window_passes(db):
+    clock = Clock()
+    detector = AbuseDetector(db, clock=clock)
+    enumerate_ids(db, detector, 100)
+
+    assert detector.check(100, '20000004') == ENUMERATION
+    assert detector.check(100, '20000005') == ENUMERATION
+    assert detector.check(100, '20000002') is None
+
+    clock.now += 3601
+    assert detector.check(100, '20000004') is None
+
+
+def test_restarted_detector_is_seeded_from_the_attempts(db):
+    clock = Clock()
+    enumerate_ids(db, AbuseDetector(db, clock=clock), 100)
+
+    assert AbuseDetector(db, clock=clock).check(100, '20000004') == ENUMERATION
+
+
+def test_shared_and_verified_ids_are_refused(db):
+    detector = AbuseDetector(db, clock=Clock())
+    for account in (201, 202):
+        assert detector.check(account, '30000000') is None
+        detector.record(account, '30000000')
+    assert detector.check(203, '30000000') == SHARED_ID
+    assert detector.check(201, '30000000') is None
+
+    db.add_vip_links(['https://t.me/+abuse_check'])
+    db.claim_vip_link(301, '40000000')
+    assert detector.check(302, '40000000') == ID_IN_USE
+    assert detector.id_in_use(302, '40000000')
+    assert not detector.id_in_use(301, '40000000')
+
+
+def test_each_block_is_flagged_once_per_window(db):
+    clock = Clock()
+    detector = AbuseDetector(db, clock=clock)
+    enumerate_ids(db, detector, 100)
+    for _ in range(2):
+        detector.check(100, '20000004')
+    for account in (201, 202):
+        detector.record(account, '30000000')
+    for _ in range(2):
+        detector.check(203, '30000000')
+
+    assert sorted(flag.kind for flag in db.get_abuse_flags(24, limit=100)) == [ENUMERATION, SHARED_ID]
+
+    clock.now += 3601
+    detector.prune()
+    assert not detector._by_user and not detector._by_quotex_id and not detector._flagged
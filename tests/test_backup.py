@@ -0,0 +1,91 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from backup import BackupJob, list_backups
+from config import Config
+from database import Database
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def backup_dir(tmp_path, monkeypatch):
+    path = tmp_path / 'backups'
+    path.mkdir()
+    monkeypatch.setattr(Config, 'BACKUP_DIR', str(path))
+    monkeypatch.setattr(Config, 'BACKUP_STEP_SLEEP', 0)
+    return path
+
+
+def make_database(path) -> str:
+    Database(str(path)).add_vip_links([f'https://t.me/+{path.stem}'])
+    return str(path)
+
+
+def touch(directory, name: str) -> str:
+    path = directory / name
+    path.write_bytes(b'')
+    return str(path)
+
+
+def test_list_backups_matches_only_its_own_snapshots(tmp_path, backup_dir):
+    own = [touch(backup_dir, 'quotex_bot-20250102-000000.db.gz'), touch(backup_dir, 'quotex_bot-20250101-120000.db.gz')]
+    for name in ('quotex_bot-billionaire-20250103-000000.db.gz', 'quotex_bot-20250104-000000.db.gz.partial',
+                 'quotex_bot-notes.db.gz', 'quotex_botx-20250105-000000.db.gz', 'quotex_bot-20251399-000000.db.gz'):
+        touch(backup_dir, name)
+
+    assert list_backups(str(backup_dir), str(tmp_path / 'quotex_bot.db')) == sorted(own)
+
+
+def test_prune_keeps_other_tenants_snapshots(tmp_path, backup_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'BACKUP_KEEP', 1)
+    main_db = make_database(tmp_path / 'quotex_bot.db')
+    tenant_db = make_database(tmp_path / 'quotex_bot-billionaire.db')
+
+    tenant_result = asyncio.run(BackupJob(tenant_db).backup(verify=True))
+    main_result = asyncio.run(BackupJob(main_db).backup(verify=True))
+
+    assert main_result['removed'] == []
+    assert os.path.exists(main_result['path']) and os.path.exists(tenant_result['path'])
+    assert list_backups(str(backup_dir), main_db) == [main_result['path']]
+    assert list_backups(str(backup_dir), tenant_db) == [tenant_result['path']]
+
+
+def test_prune_removes_oldest_snapshots_first(tmp_path, backup_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'BACKUP_KEEP', 2)
+    db_path = make_database(tmp_path / 'quotex_bot.db')
+    oldest = touch(backup_dir, 'quotex_bot-20240101-000000.db.gz')
+    older = touch(backup_dir, 'quotex_bot-20240601-000000.db.gz')
+    newer = touch(backup_dir, 'quotex_bot-20250101-000000.db.gz')
+    unrelated = touch(backup_dir, 'quotex_bot-billionaire-20200101-000000.db.gz')
+
+    result = asyncio.run(BackupJob(db_path).backup())
+
+    assert result['removed'] == [oldest, older]
+    assert list_backups(str(backup_dir), db_path) == [newer, result['path']]
+    assert os.path.exists(unrelated)
+
+
+def test_snapshot_passes_the_restore_check_and_restores_from_the_cli(tmp_path, backup_dir):
+    db_path = make_database(tmp_path / 'quotex_bot.db')
+    db = Database(db_path)
+    db.claim_vip_link(1, '12345678')
+    for i in range(50):
+        db.log_verification_attempt(1_000_000 + i, str(10_000_000 + i), False)
+    db.close()
+
+    result = asyncio.run(BackupJob(db_path).backup(verify=True))
+
+    assert result['verified']['integrity'] == 'ok'
+    assert result['verified']['rows']['verification_attempts'] == 50
+    restored = str(tmp_path / 'restored.db')
+    cli = subprocess.run([sys.executable, 'backup.py', 'restore', result['path'], restored],
+                         capture_output=True, text=True, cwd=ROOT)
+    assert cli.returncode == 0, cli.stderr
+    restored_db = Database(restored)
+    assert restored_db.get_stats()['total_users'] == 1
+    restored_db.close()
@@ -0,0 +1,119 @@
+import asyncio
+import socket
+
+import pytest
+from telegram.error import NetworkError
+
+from bot import QuotexVIPBot
+from bot_host import BotHost, SharedServices
+from config import Config
+from database import Database
+from metrics import LINK_POOL_REMAINING, PENDING_VERIFICATIONS
+from tenants import Tenant
+from verification_mock import MockVerificationService
+
+
+class StubShared:
+    def __init__(self):
+        self.bots = []
+        self.stopped = False
+
+    def register(self, bot):
+        self.bots.append(bot)
+
+    def unregister(self, bot):
+        self.bots.remove(bot)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        self.stopped = True
+
+
+class StubBot:
+    def __init__(self, tenant_id: str, shared: StubShared, fail: bool = False):
+        self.tenant = Tenant(tenant_id)
+        self.fail = fail
+        self.stops = 0
+        shared.register(self)
+
+    async def start(self):
+        if self.fail:
+            raise RuntimeError("getMe failed")
+
+    async def stop(self):
+        self.stops += 1
+
+
+def test_bots_that_fail_to_start_are_stopped_and_unregistered():
+    shared = StubShared()
+    good, bad = StubBot('good', shared), StubBot('bad', shared, fail=True)
+    host = BotHost(shared, [good, bad])
+
+    async def started():
+        while host._stop_event is None or bad.stops == 0:
+            await asyncio.sleep(0.01)
+
+    async def serve():
+        task = asyncio.create_task(host._serve())
+        await asyncio.wait_for(started(), 5)
+        assert shared.bots == [good] and host.bots == [good]
+        assert good.stops == 0
+        host._stop_event.set()
+        await task
+
+    asyncio.run(serve())
+    assert bad.stops == 1 and good.stops == 1
+    assert shared.stopped
+
+
+def test_host_raises_when_every_bot_fails():
+    shared = StubShared()
+    bots = [StubBot('a', shared, fail=True), StubBot('b', shared, fail=True)]
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(BotHost(shared, bots)._serve())
+    assert all(bot.stops == 1 for bot in bots)
+    assert shared.bots == [] and shared.stopped
+
+
+def unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_failed_start_releases_shared_request_pools(tmp_path):
+    async def start_and_stop():
+        shared = SharedServices(MockVerificationService(connect_delay=0))
+        tenant = Tenant('down', {'BOT_TOKEN': '123456780:AAFakeTokenForOfflineTenantTesting0000',
+                                 'BOT_API_BASE_URL': f'http://127.0.0.1:{unused_port()}/bot',
+                                 'DATABASE_PATH': str(tmp_path / 'down.db')})
+        bot = QuotexVIPBot(tenant=tenant, shared=shared)
+        with pytest.raises(NetworkError):
+            await bot.start()
+        await bot.stop()
+        return shared
+
+    shared = asyncio.run(start_and_stop())
+    assert [request._users for request in (shared.replies_request, shared.updates_request,
+                                           shared.bulk_request)] == [0, 0, 0]
+
+
+def test_database_gauges_are_refreshed_off_the_scrape_path(serve_bots, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_REFRESH_SECONDS', 0.05)
+    for index, links in enumerate((2, 3)):
+        Database(str(tmp_path / f't{index}.db')).add_vip_links([f'https://t.me/+t{index}_{n}' for n in range(links)])
+
+    async def scenario():
+        async with serve_bots({}, {}) as (shared, bots, _):
+            await asyncio.sleep(0.2)
+            assert LINK_POOL_REMAINING.labels().value == 5
+            bots[0].db.claim_vip_link(1, '12345678')
+            bots[1].db.queue_pending_verification(2, '87654321')
+            await asyncio.sleep(0.2)
+            assert LINK_POOL_REMAINING.labels().value == 4
+            assert PENDING_VERIFICATIONS.labels().value == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,66 @@
+import sqlite3
+
+import pytest
+
+from bench_database import generate
+from database import AttemptRecord, Database, LinkRecord, UserRecord, _columns, _record_cursor
+
+ROWS = 50
+
+
+def test_stats_count_available_links_as_the_pool_does(tmp_path):
+    db = Database(str(tmp_path / 'stats.db'))
+    db.add_vip_links([f'https://t.me/+link{index}' for index in range(5)])
+    db.add_vip_links(['https://t.me/+expired'], expires_at='2000-01-01 00:00:00')
+    db.get_unused_vip_link()
+    db.claim_vip_link(1, '12345678')
+
+    stats = db.get_stats()
+
+    assert stats['available_links'] == db.count_unused_links() == 3
+    assert (stats['used_links'], stats['leased_links'], stats['expired_links']) == (1, 1, 1)
+    assert stats['total_links'] == 6
+
+
+@pytest.fixture
+def generated(tmp_path):
+    db_path = str(tmp_path / 'records.db')
+    db = Database(db_path)
+    generate(db_path, ROWS, ROWS, ROWS, seed=1)
+    yield db_path, db
+    db.close()
+
+
+@pytest.mark.parametrize('table, record_type', [
+    ('users', UserRecord),
+    ('vip_links', LinkRecord),
+    ('verification_attempts', AttemptRecord),
+])
+def test_records_hold_the_row_values(generated, table, record_type):
+    db_path, _ = generated
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(f'SELECT {_columns(record_type)} FROM {table}').fetchall()
+        cursor = _record_cursor(conn, record_type)
+        cursor.execute(f'SELECT {_columns(record_type)} FROM {table}')
+        records = cursor.fetchall()
+
+    assert all(type(record) is record_type for record in records)
+    assert records == rows
+    assert [record._asdict() for record in records] == [dict(zip(record_type._fields, row)) for row in rows]
+
+
+def test_records_unpack_like_row_tuples(generated):
+    _, db = generated
+    user = db.get_recent_users(1)[0]
+    user_id, telegram_id, *_ = user
+
+    assert isinstance(user, UserRecord)
+    assert (user_id, telegram_id) == (user.user_id, user.telegram_id)
+
+
+def test_iter_users_yields_every_user_once_in_order(generated):
+    _, db = generated
+    user_ids = [user.user_id for user in db.iter_users(batch_size=7)]
+
+    assert user_ids == sorted(set(user_ids))
+    assert len(user_ids) == db.count_users() == ROWS
@@ -0,0 +1,46 @@
+import asyncio
+
+from config import Config
+from conftest import CHANNEL_ID
+from link_generator import InviteLinkGenerator
+
+
+def use_batches(monkeypatch, size: int, rate: float):
+    monkeypatch.setattr(Config, 'LINK_BATCH_SIZE', size)
+    monkeypatch.setattr(Config, 'LINK_POOL_LOW_WATER', size // 2)
+    monkeypatch.setattr(Config, 'LINK_CREATE_PER_SECOND', rate)
+    monkeypatch.setattr(Config, 'LINK_EXPIRY_HOURS', 24)
+
+
+def test_top_up_fills_the_pool_with_single_use_links(channel_bot, monkeypatch):
+    use_batches(monkeypatch, 6, rate=100)
+
+    async def scenario():
+        async with channel_bot() as (api, bot, db):
+            generator = InviteLinkGenerator(bot, db)
+
+            assert await generator.top_up() == 6
+            assert db.count_unused_links() == 6
+            assert len(api.invite_links) == 6
+            for link in api.invite_links.values():
+                assert link['member_limit'] == 1
+                assert 'expire_date' in link
+                assert link['chat_id'] == CHANNEL_ID
+
+            claimed = db.claim_vip_link(1, '12345678')
+            assert claimed is not None and claimed[1] in api.invite_links
+            assert await generator.top_up() == 0
+
+    asyncio.run(scenario())
+
+
+def test_top_up_waits_out_flood_control(channel_bot, monkeypatch):
+    use_batches(monkeypatch, 4, rate=100)
+
+    async def scenario():
+        async with channel_bot(invite_link_rate_limit=3) as (api, bot, db):
+            assert await InviteLinkGenerator(bot, db).top_up() == 4
+            assert api.flood_waits > 0
+            assert len(api.invite_links) == db.count_unused_links() == 4
+
+    asyncio.run(scenario())
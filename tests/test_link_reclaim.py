@@ -0,0 +1,53 @@
+import asyncio
+
+from config import Config
+from conftest import CHANNEL_ID
+from link_generator import InviteLinkGenerator
+from link_reclaim import LinkReclaimer
+
+HAND_ADDED = 'https://t.me/+added_by_hand'
+
+
+def test_sweep_records_joins_and_revokes_unused_links(channel_bot, monkeypatch):
+    monkeypatch.setattr(Config, 'LINK_BATCH_SIZE', 6)
+    monkeypatch.setattr(Config, 'LINK_CREATE_PER_SECOND', 100)
+    monkeypatch.setattr(Config, 'LINK_JOIN_GRACE_HOURS', 1)
+    joined, late, absent, manual = 2, 3, 4, 5
+
+    async def scenario():
+        async with channel_bot() as (api, bot, db):
+            await InviteLinkGenerator(bot, db).top_up()
+            links = {telegram_id: db.claim_vip_link(telegram_id, str(10_000_000 + telegram_id))
+                     for telegram_id in (1, joined, late, absent)}
+            db.add_vip_links([HAND_ADDED])
+            with db._connect() as conn:
+                # Hand-added links are older than generated ones, so the next claim takes it
+                conn.execute('UPDATE vip_links SET created_at = ? WHERE link = ?', ('2000-01-01', HAND_ADDED))
+            links[manual] = db.claim_vip_link(manual, '10000005')
+            assert links[manual][1] == HAND_ADDED
+
+            # Joins the bot saw as chat_member updates (with a full or a
+            # truncated invite link), and one it missed
+            assert db.record_link_join(joined, links[joined][1])
+            assert db.record_link_join(1, 'https://t.me/+abc...')
+            assert not db.record_link_join(99, None)
+            api.chat_members.add((CHANNEL_ID, late))
+            with db._connect() as conn:
+                conn.execute("UPDATE vip_links SET used_at = datetime('now', '-2 hours') WHERE is_used = TRUE")
+
+            woken = []
+            outcomes = await LinkReclaimer(bot, db, on_revoked=lambda: woken.append(True)).sweep()
+
+            assert outcomes == {'joined': 1, 'revoked': 1, 'kept': 1, 'failed': 0}
+            assert api.invite_links[links[absent][1]]['is_revoked']
+            assert woken == [True]
+            assert (await api.next_outgoing(absent, timeout=5)).text == Config.VIP_LINK_REVOKED
+            assert db.get_unjoined_links(1) == []
+
+            assert not db.needs_new_link(joined) and not db.needs_new_link(manual)
+            assert db.needs_new_link(absent)
+            reissued = db.reissue_vip_link(absent)
+            assert reissued is not None and reissued[1] != links[absent][1]
+            assert not db.needs_new_link(absent)
+
+    asyncio.run(scenario())
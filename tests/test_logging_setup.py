@@ -0,0 +1,75 @@
+import logging
+import queue
+
+from logging_setup import RedactingQueueHandler, StructuredFormatter, TenantFilter
+from tenants import Tenant
+
+TOKEN = '123456:AAFakeTokenForRedactionTesting0001'
+API_HASH = '0123456789abcdef0123456789abcdef'
+
+
+def make_logger(name, *handlers):
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.handlers = list(handlers)
+    return logger
+
+
+def emit(log_queue, record_call):
+    """Log through a RedactingQueueHandler; returns the line the listener would write"""
+    record_call(make_logger('test_redaction', RedactingQueueHandler(log_queue, [API_HASH])))
+    return StructuredFormatter().format(log_queue.get_nowait())
+
+
+def test_exception_tracebacks_are_redacted():
+    def call(logger):
+        try:
+            raise RuntimeError(f"POST https://api.telegram.org/bot{TOKEN}/sendMessage failed, hash {API_HASH}")
+        except RuntimeError:
+            logger.exception("Unhandled error")
+
+    text = emit(queue.SimpleQueue(), call)
+    assert 'Traceback' in text and 'bot<redacted>/sendMessage' in text
+    assert TOKEN not in text and API_HASH not in text
+
+
+def test_stack_info_is_redacted():
+    text = emit(queue.SimpleQueue(), lambda logger: logger.warning(f"calling bot{TOKEN}", stack_info=True))
+    assert 'Stack (most recent call last)' in text and TOKEN not in text
+
+
+def test_extra_string_values_are_redacted():
+    url = f'https://api.telegram.org/bot{TOKEN}/getMe?hash={API_HASH}'
+    text = emit(queue.SimpleQueue(),
+                lambda logger: logger.info("request", extra={'event': 'http_request', 'url': url, 'status': 200}))
+    assert '"status": 200' in text
+    assert TOKEN not in text and API_HASH not in text
+
+
+def test_other_handlers_see_the_original_record():
+    log_queue = queue.SimpleQueue()
+    seen = []
+
+    class Capture(logging.Handler):
+        def emit(self, record):
+            seen.append(record.getMessage())
+
+    logger = make_logger('test_redaction_original', RedactingQueueHandler(log_queue, [API_HASH]), Capture())
+    logger.info("hash %s", API_HASH)
+    assert seen == [f"hash {API_HASH}"]
+    assert log_queue.get_nowait().getMessage() == "hash <redacted>"
+
+
+def test_text_lines_name_the_tenant():
+    log_queue = queue.SimpleQueue()
+    handler = RedactingQueueHandler(log_queue)
+    handler.addFilter(TenantFilter())
+    logger = make_logger('test_tenant', handler)
+
+    Tenant('billionaire').context.run(logger.info, "from a tenant's bot")
+    logger.info("from shared code")
+
+    formatter = StructuredFormatter()
+    assert ' - billionaire - test_tenant - INFO - ' in formatter.format(log_queue.get_nowait())
+    assert ' - - - test_tenant - INFO - ' in formatter.format(log_queue.get_nowait())
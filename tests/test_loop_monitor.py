@@ -0,0 +1,73 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from config import Config
+from loop_monitor import WATCHDOG_EXIT_CODE, LoopMonitor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Child process: start the monitor with a watchdog and block its loop for good
+WEDGE_SCRIPT = '''
+import asyncio
+import time
+from config import Config
+from loop_monitor import LoopMonitor
+
+async def wedge():
+    Config.LOOP_LAG_INTERVAL = 0.05
+    Config.LOOP_LAG_THRESHOLD = 0.1
+    Config.LOOP_WATCHDOG_SECONDS = 0.5
+    LoopMonitor().start()
+    await asyncio.sleep(0.2)
+    time.sleep(30)
+
+asyncio.run(wedge())
+'''
+
+
+def blocking_partner_call(seconds: float):
+    """Stands in for a synchronous call made on the event loop thread"""
+    time.sleep(seconds)
+
+
+@pytest.fixture
+def fast_heartbeat(monkeypatch):
+    monkeypatch.setattr(Config, 'LOOP_LAG_INTERVAL', 0.02)
+    monkeypatch.setattr(Config, 'LOOP_LAG_THRESHOLD', 0.2)
+    monkeypatch.setattr(Config, 'LOOP_WATCHDOG_SECONDS', 0)
+
+
+def test_stall_is_recorded_with_the_blocking_stack(fast_heartbeat):
+    async def scenario():
+        monitor = LoopMonitor()
+        monitor.start()
+        try:
+            await asyncio.sleep(0.3)
+            assert monitor.summary()['p99'] < Config.LOOP_LAG_THRESHOLD
+            assert not monitor.recent_stalls()
+
+            blocking_partner_call(0.6)
+            await asyncio.sleep(0.1)
+            stalls = monitor.recent_stalls()
+            assert len(stalls) == 1
+            assert 'blocking_partner_call' in stalls[0]['stack']
+            assert stalls[0]['blocked'] >= 0.6 - Config.LOOP_LAG_THRESHOLD
+            assert monitor.summary()['max'] >= 0.55
+        finally:
+            monitor.stop()
+
+    asyncio.run(scenario())
+
+
+def test_watchdog_ends_a_wedged_process():
+    started = time.perf_counter()
+    child = subprocess.run([sys.executable, '-c', WEDGE_SCRIPT], cwd=ROOT, capture_output=True, text=True,
+                           timeout=30)
+
+    assert child.returncode == WATCHDOG_EXIT_CODE, child.stderr[-2000:]
+    assert time.perf_counter() - started < 10
@@ -0,0 +1,52 @@
+import asyncio
+
+from metrics import REGISTRY, MetricsServer
+
+
+async def http_get(port: int, path: str) -> tuple:
+    """(status line, headers, body) of a GET against the metrics server"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode('latin-1'))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, body = response.split(b'\r\n\r\n', 1)
+    status, *header_lines = head.decode('latin-1').split('\r\n')
+    headers = dict(line.split(': ', 1) for line in header_lines)
+    return status, headers, body.decode('utf-8')
+
+
+def test_metrics_endpoint_exposes_a_verification(serve_bots):
+    async def verify_and_scrape():
+        async with serve_bots() as (shared, bots, apis):
+            bots[0].db.add_vip_links(['https://t.me/+metrics_test'])
+            apis[0].push_message(5_000_001, '/verify 12345678')
+            await apis[0].next_outgoing(5_000_001, 10)
+            reply = await apis[0].next_outgoing(5_000_001, 10)
+            assert 'https://t.me/+metrics_test' in reply.text
+
+            server = MetricsServer(REGISTRY, '127.0.0.1', 0)
+            await server.start()
+            try:
+                assert server.port
+                scraped = await http_get(server.port, '/metrics')
+                missing = await http_get(server.port, '/other')
+            finally:
+                await server.stop()
+        return scraped, missing
+
+    (status, headers, body), (missing_status, _, _) = asyncio.run(verify_and_scrape())
+    assert status == 'HTTP/1.1 200 OK'
+    assert headers['Content-Type'] == 'text/plain; version=0.0.4; charset=utf-8'
+    assert int(headers['Content-Length']) == len(body.encode('utf-8'))
+    for sample in (
+        'quotex_bot_updates_total{handler="verify"}',
+        'quotex_bot_verifications_total{outcome="success"}',
+        'quotex_bot_verification_seconds_count',
+        'quotex_bot_verification_seconds_bucket{le="+Inf"}',
+        'quotex_bot_partner_queries_total{lane="interactive"}',
+        'quotex_bot_db_operation_seconds_count{method="claim_vip_link"}',
+    ):
+        assert sample in body, sample
+    assert '# TYPE quotex_bot_verification_seconds histogram' in body
+    assert missing_status == 'HTTP/1.1 404 Not Found'
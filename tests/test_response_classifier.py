@@ -0,0 +1,52 @@
+"""Corpus of partner bot replies and how classify() must read them"""
+
+import pytest
+
+from response_classifier import NOT_FOUND, REGISTERED, UNKNOWN, classify
+
+# (reply text, expected status, expected deposits sum, expected country)
+CORPUS = [
+    # Trader cards, as sent for IDs registered through our link
+    ("Trader ID: 12345678\nCountry: IN\nRegistration date: 2025-01-01\nDeposits sum: $150.00\nBalance: $150.00",
+     REGISTERED, 150.0, 'IN'),
+    ("Trader ID: 12345678\nCountry: BR\nRegistration date: 2025-03-09\nDeposits sum: $1,200.50\nBalance: $80.00",
+     REGISTERED, 1200.5, 'BR'),
+    ("Trader ID: 12345678\nCountry: ID\nDeposits sum: $0.00", REGISTERED, 0.0, 'ID'),
+    ("Trader ID: 12345678\nCountry: Nigeria\nDeposit sum: 75", REGISTERED, 75.0, 'Nigeria'),
+    ("trader id: 12345678\ncountry:  in \ndeposits sum:$10", REGISTERED, 10.0, 'in'),
+    ("Trader ID: 12345678\nDeposits sum: N/A", REGISTERED, None, None),
+    ("User 12345678 is registered via your link", REGISTERED, None, None),
+    ("12345678 verified ✅", REGISTERED, None, None),
+    ("Registration confirmed for 12345678", REGISTERED, None, None),
+    ("12345678: valid referral", REGISTERED, None, None),
+    # Not found and other negative answers
+    ("Trader with ID = 12345678 was not found", NOT_FOUND, None, None),
+    ("Trader 12345678 not found", NOT_FOUND, None, None),
+    ("12345678 is NOT REGISTERED as your referral", NOT_FOUND, None, None),
+    ("Invalid trader ID: 12345678", NOT_FOUND, None, None),
+    ("12345678 is not valid", NOT_FOUND, None, None),
+    ("Error while looking up 12345678", NOT_FOUND, None, None),
+    ("Lookup failed for 12345678", NOT_FOUND, None, None),
+    ("Trader ID: 12345678\nCountry: IN\nStatus: invalid", NOT_FOUND, None, None),
+    # Neither: promos, truncated or garbled replies
+    ("", UNKNOWN, None, None),
+    ("Trader ID: 1234", UNKNOWN, None, None),
+    ("<b>12345678</b> ⚠️ {{ template_error }}", UNKNOWN, None, None),
+    ("Trader ID: 12345678\nCountry: IN\nRegistration date: 2025-01-01", UNKNOWN, None, 'IN'),
+    ("🔥 Weekly partner contest: the top 10 affiliates share $50,000!", UNKNOWN, None, None),
+    ("Unknown command. Send /<trader id> to check a trader.", UNKNOWN, None, None),
+    ("Registration date: 2025-01-01", UNKNOWN, None, None),
+]
+
+
+@pytest.mark.parametrize('text, status, deposits_sum, country', CORPUS, ids=[text[:40] for text, *_ in CORPUS])
+def test_classify(text, status, deposits_sum, country):
+    result = classify(text)
+    assert (result.status, result.deposits_sum, result.country) == (status, deposits_sum, country)
+
+
+@pytest.mark.parametrize('text, status', [(text, status) for text, status, _, _ in CORPUS])
+def test_registered_and_conclusive_follow_status(text, status):
+    result = classify(text)
+    assert result.registered == (status == REGISTERED)
+    assert result.conclusive == (status != UNKNOWN)
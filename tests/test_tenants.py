@@ -0,0 +1,44 @@
+import asyncio
+import sqlite3
+
+from config import Config
+from database import Database
+
+USERS = 3
+
+
+def referral_link(index: int) -> str:
+    return f'https://broker-qx.pro/sign-up/?lid={900000 + index}'
+
+
+async def verify_all(api) -> tuple:
+    """(reply to a bare /verify, links handed to USERS users who verify)"""
+    api.push_message(4_999_999, '/verify')
+    referral = (await api.next_outgoing(4_999_999, 5)).text
+
+    async def verify(user: int) -> str:
+        telegram_id = 5_000_000 + user
+        api.push_message(telegram_id, f'/verify {10_000_000 + user}')
+        await api.next_outgoing(telegram_id, 5)
+        final = (await api.next_outgoing(telegram_id, 5)).text
+        assert final.startswith(Config.VERIFICATION_SUCCESS), final
+        return final.split('🔗 ', 1)[1].split()[0]
+
+    return referral, await asyncio.gather(*(verify(user) for user in range(USERS)))
+
+
+def test_tenants_keep_their_own_links_users_and_referral(serve_bots, tmp_path):
+    for index in range(2):
+        Database(str(tmp_path / f't{index}.db')).add_vip_links([f'https://t.me/+t{index}_{n}' for n in range(USERS)])
+
+    async def scenario():
+        async with serve_bots(*({'REFERRAL_LINK': referral_link(index)} for index in range(2))) as (_, _, apis):
+            return await asyncio.gather(*(verify_all(api) for api in apis))
+
+    for index, (referral, links) in enumerate(asyncio.run(scenario())):
+        assert referral_link(index) in referral
+        assert sorted(links) == [f'https://t.me/+t{index}_{n}' for n in range(USERS)]
+        with sqlite3.connect(tmp_path / f't{index}.db') as conn:
+            assert conn.execute('SELECT COUNT(*) FROM users').fetchone()[0] == USERS
+            links = [row[0] for row in conn.execute('SELECT link FROM vip_links')]
+        assert all(link.startswith(f'https://t.me/+t{index}_') for link in links)
@@ -0,0 +1,25 @@
+import subprocess
+
+from verification_simple import QUERY_SCRIPT, SubprocessTransport
+
+HOSTILE_ID = '1"); import os; os.system("touch pwned"); ("'
+
+
+def test_query_passes_the_id_as_data(monkeypatch):
+    calls = []
+
+    def run(args, **kwargs):
+        calls.append((args, kwargs))
+        return subprocess.CompletedProcess(args, 0, stdout='REPLIES ["ok"]\n', stderr='')
+
+    monkeypatch.setattr(subprocess, 'run', run)
+    transport = SubprocessTransport(wait=0.5, history_limit=2)
+
+    assert transport.query(HOSTILE_ID) == ['ok']
+    assert transport.query('12345678') == ['ok']
+
+    (first, kwargs), (second, _) = calls
+    assert first[1:] == ['-c', QUERY_SCRIPT, HOSTILE_ID, '0.5', '2']
+    assert second[1:3] == first[1:3]
+    assert HOSTILE_ID not in QUERY_SCRIPT
+    assert 'TELEGRAM_API_HASH' in kwargs['env']
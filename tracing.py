@@ -0,0 +1,136 @@
+"""
+Per-stage latency tracing for the Quotex VIP Channel Bot
+
+Spans record their duration into a bounded in-memory sample per stage, from
+which p50/p95/p99 are computed on demand. If TRACE_FILE is set, every span is
+also written as a JSON line (via a background thread) for offline analysis.
+"""
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import math
+import queue
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Groups all spans of one verification under a common id
+current_trace_id = contextvars.ContextVar('current_trace_id', default=None)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+class StageStats:
+    """Bounded reservoir of recent durations for one stage"""
+
+    def __init__(self, max_samples: int):
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def summary(self) -> dict:
+        values = sorted(self.samples)
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': percentile(values, 50),
+            'p95': percentile(values, 95),
+            'p99': percentile(values, 99),
+            'max': self.max,
+        }
+
+
+class Tracer:
+    def __init__(self, max_samples: int = 1000, trace_file: Optional[str] = None):
+        self.max_samples = max_samples
+        self.stages: Dict[str, StageStats] = {}
+        self._trace_logger = None
+        self._listener = None
+        if trace_file:
+            self._open_trace_file(trace_file)
+
+    def _open_trace_file(self, trace_file: str):
+        """Write trace records through a queue so spans never touch the disk"""
+        trace_queue = queue.SimpleQueue()
+        handler = logging.FileHandler(trace_file, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        self._listener = logging.handlers.QueueListener(trace_queue, handler)
+        self._listener.start()
+
+        self._trace_logger = logging.getLogger('tracing.records')
+        self._trace_logger.propagate = False
+        self._trace_logger.setLevel(logging.INFO)
+        self._trace_logger.addHandler(logging.handlers.QueueHandler(trace_queue))
+
+    def record(self, stage: str, seconds: float, started_at: Optional[float] = None, **attrs):
+        """Record a measured duration for a stage"""
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages.setdefault(stage, StageStats(self.max_samples))
+        stats.add(seconds)
+
+        if self._trace_logger is not None:
+            self._trace_logger.info(json.dumps({
+                'trace_id': current_trace_id.get(),
+                'stage': stage,
+                'start': started_at if started_at is not None else time.time() - seconds,
+                'duration_ms': round(seconds * 1000, 3),
+                **attrs
+            }, default=str))
+
+    @contextmanager
+    def span(self, stage: str, **attrs):
+        """Time the enclosed block as one stage"""
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, started_at, **attrs)
+
+    @contextmanager
+    def trace(self):
+        """Start a new trace id for the enclosed block (and tasks/threads it spawns)"""
+        token = current_trace_id.set(uuid.uuid4().hex[:16])
+        try:
+            yield current_trace_id.get()
+        finally:
+            current_trace_id.reset(token)
+
+    def summary(self) -> Dict[str, dict]:
+        """Percentile summary per stage"""
+        return {stage: stats.summary() for stage, stats in sorted(self.stages.items())}
+
+    def reset(self):
+        """Forget all recorded samples"""
+        self.stages.clear()
+
+    def close(self):
+        """Flush pending trace records to disk"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+
+tracer = Tracer(Config.TRACE_MAX_SAMPLES, Config.TRACE_FILE or None)
@@ -6,9 +6,8 @@ import logging
 import asyncio
 import time
 from typing import Optional
-from telethon import TelegramClient
-from telethon.errors import SessionPasswordNeededError, PhoneCodeExpiredError
 from config import Config
+from response_classifier import classify
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +34,9 @@ class VerificationService:
                 logger.error("Telegram API credentials not configured")
                 return False
             
+            # Imported here so importing this module does not pay for Telethon
+            from telethon import TelegramClient
+
             self.client = TelegramClient(self.session_name, self.api_id, self.api_hash)
             await self.client.start(phone=self.phone_number)
             
@@ -94,20 +96,14 @@ class VerificationService:
             
             # Check the most recent messages for verification response
             for message in messages:
-                if message.text:
-                    message_text = message.text.lower()
-                    
-                    # Check for positive verification indicators
-                    if any(keyword in message_text for keyword in ['found', 'verified', 'valid', 'registered', 'success']):
-                        if quotex_user_id in message_text:
-                            logger.info(f"Verification successful for user ID: {quotex_user_id}")
-                            return True
-                    
-                    # Check for negative verification indicators
-                    if any(keyword in message_text for keyword in ['not found', 'invalid', 'not registered', 'error', 'fail']):
-                        if quotex_user_id in message_text:
-                            logger.info(f"Verification failed for user ID: {quotex_user_id}")
-                            return False
+                if message.text and quotex_user_id in message.text:
+                    result = classify(message.text)
+                    if result.registered:
+                        logger.info(f"Verification successful for user ID: {quotex_user_id}")
+                        return True
+                    if result.conclusive:
+                        logger.info(f"Verification failed for user ID: {quotex_user_id}")
+                        return False
             
             # If no clear response found, assume failed
             logger.warning(f"No clear verification response for user ID: {quotex_user_id}")
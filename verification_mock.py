@@ -1,4 +1,3 @@
-
 """
 Mock verification service that simulates real verification
 This is for testing purposes when the real service is not available
@@ -7,41 +6,94 @@ This is for testing purposes when the real service is not available
 import logging
 import time
 import random
+import threading
+import zlib
+from typing import Iterable, Optional
+from config import Config
+from response_classifier import ClassifiedReply, NOT_FOUND, REGISTERED, UNKNOWN
 
 logger = logging.getLogger(__name__)
 
 class MockVerificationService:
-    def __init__(self):
+    def __init__(self, latency: float = 2.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_latency: Optional[float] = None, registered_ratio: float = 0.0,
+                 connect_delay: float = 1.0, seed: Optional[int] = None,
+                 valid_user_ids: Optional[Iterable[str]] = None):
+        """
+        latency/jitter: mean and standard deviation (seconds) of a partner bot reply
+        error_rate: share of checks that fail like a backend error (no reply in time)
+        error_latency: how long such a failed check takes (defaults to VERIFICATION_TIMEOUT)
+        registered_ratio: share of unknown IDs treated as registered, chosen
+            deterministically from the ID so runs are reproducible
+        """
         # List of "valid" user IDs for testing
-        self.valid_user_ids = {
-            "12345678", "87654321", "11111111", "22222222", 
+        self.valid_user_ids = set(valid_user_ids) if valid_user_ids is not None else {
+            "12345678", "87654321", "11111111", "22222222",
             "99999999", "55555555", "77777777", "33333333"
         }
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_latency = Config.VERIFICATION_TIMEOUT if error_latency is None else error_latency
+        self.registered_ratio = registered_ratio
+        self.connect_delay = connect_delay
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
         logger.info("Mock verification service initialized")
 
+    def is_registered(self, quotex_user_id: str) -> bool:
+        """Whether the simulated partner bot knows this ID as a referral"""
+        if quotex_user_id in self.valid_user_ids:
+            return True
+        return zlib.crc32(quotex_user_id.encode()) % 10000 < self.registered_ratio * 10000
+
+    def _draw(self):
+        """Pick the outcome and delay for one check"""
+        with self._lock:
+            self.calls += 1
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.errors += 1
+                return True, self.error_latency
+            return False, max(0.0, self._random.gauss(self.latency, self.jitter) if self.jitter else self.latency)
+
     def verify_quotex_user(self, quotex_user_id: str) -> bool:
         """
         Mock verification that simulates checking with QuotexPartnerBot
         Returns True for predefined valid IDs, False otherwise
         """
+        return self.check_quotex_user(quotex_user_id).registered
+
+    def check_quotex_user(self, quotex_user_id: str) -> ClassifiedReply:
+        """Mock partner bot lookup, with a deposits sum and country derived from the ID"""
         logger.info(f"Mock verifying user ID: {quotex_user_id}")
-        
+
+        failed, delay = self._draw()
+
         # Simulate network delay
-        time.sleep(2)
-        
+        time.sleep(delay)
+
+        if failed:
+            logger.error(f"Mock verification backend error for user ID: {quotex_user_id}")
+            return ClassifiedReply(UNKNOWN)
+
         # Check if user ID is in our "valid" list
-        is_valid = quotex_user_id in self.valid_user_ids
-        
-        if is_valid:
-            logger.info(f"Mock verification successful for user ID: {quotex_user_id}")
-        else:
+        is_valid = self.is_registered(quotex_user_id)
+
+        if not is_valid:
             logger.info(f"Mock verification failed for user ID: {quotex_user_id}")
-        
-        return is_valid
+            return ClassifiedReply(NOT_FOUND)
+
+        logger.info(f"Mock verification successful for user ID: {quotex_user_id}")
+        checksum = zlib.crc32(quotex_user_id.encode())
+        return ClassifiedReply(REGISTERED, deposits_sum=float(checksum % 2000),
+                               country=('IN', 'BR', 'ID', 'NG', 'PK')[checksum % 5])
 
     def test_connection(self) -> bool:
         """Test connection to mock verification service"""
         logger.info("Testing mock verification connection")
-        time.sleep(1)  # Simulate connection test
+        time.sleep(self.connect_delay)  # Simulate connection test
         logger.info("Mock connection test successful")
         return True
@@ -0,0 +1,158 @@
+"""
+Priority scheduler for @QuotexPartnerBot queries
+
+Every partner bot lookup goes through the one Telethon account, so lookups are
+run by a small fixed pool of workers (PARTNER_BOT_CONCURRENCY, 1 by default)
+fed from two lanes:
+  - interactive: /verify and ID confirmations, always served first
+  - background: re-verification sweeps, run only when no interactive lookup is
+    waiting and the background budget for the current window is not spent
+With more than one worker, one is always kept free of background work.
+
+An optional circuit breaker refuses lookups with CircuitOpenError while the
+backend is down, both when they are queued and when a worker picks them up.
+
+Lookups run in worker threads, so the event loop keeps serving updates while
+the partner bot is being asked.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from metrics import PARTNER_QUERIES_TOTAL, PARTNER_QUEUE_DEPTH, PARTNER_QUEUE_WAIT
+from response_classifier import ClassifiedReply
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+LANES = (INTERACTIVE, BACKGROUND)
+
+
+class VerificationScheduler:
+    def __init__(self, service, concurrency: int = 1, background_budget: int = 20,
+                 budget_window: float = 3600.0, breaker: Optional[CircuitBreaker] = None):
+        """
+        service: verification service with check_quotex_user(quotex_user_id)
+        background_budget: background lookups allowed per budget_window seconds
+        breaker: fed with the outcome of every lookup; lookups fail fast while it is open
+        """
+        self.service = service
+        self.breaker = breaker
+        self.concurrency = max(1, concurrency)
+        self.background_budget = background_budget
+        self.budget_window = budget_window
+
+        # (quotex_user_id, future, queued_at) per lane
+        self._pending = {lane: deque() for lane in LANES}
+        self._background_dispatched: Deque[float] = deque()
+        self._background_running = 0
+        self._wakeup = asyncio.Event()
+        self._workers = []
+
+    async def start(self):
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        logger.info(f"Verification scheduler started with {self.concurrency} worker(s)")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for lane in LANES:
+            while self._pending[lane]:
+                _, future, _ = self._pending[lane].popleft()
+                future.cancel()
+            PARTNER_QUEUE_DEPTH.labels(lane).set(0)
+
+    async def check(self, quotex_user_id: str, lane: str = INTERACTIVE) -> ClassifiedReply:
+        """Queue a partner bot lookup in a lane and wait for its result"""
+        if self.breaker and self.breaker.rejecting():
+            raise CircuitOpenError("Verification backend unavailable")
+        future = asyncio.get_running_loop().create_future()
+        self._pending[lane].append((quotex_user_id, future, time.perf_counter()))
+        PARTNER_QUEUE_DEPTH.labels(lane).set(len(self._pending[lane]))
+        self._wakeup.set()
+        return await future
+
+    def background_budget_left(self) -> int:
+        self._expire_budget(time.monotonic())
+        return max(0, self.background_budget - len(self._background_dispatched))
+
+    def queue_depth(self, lane: str) -> int:
+        return len(self._pending[lane])
+
+    def _expire_budget(self, now: float):
+        while self._background_dispatched and self._background_dispatched[0] <= now - self.budget_window:
+            self._background_dispatched.popleft()
+
+    def _next_job(self) -> Tuple[Optional[tuple], Optional[float]]:
+        """Pick the next lookup; otherwise return how long until background work may run"""
+        if self._pending[INTERACTIVE]:
+            return (INTERACTIVE,) + self._pending[INTERACTIVE].popleft(), None
+
+        if not self._pending[BACKGROUND]:
+            return None, None
+        if self._background_running >= max(1, self.concurrency - 1):
+            return None, None
+
+        now = time.monotonic()
+        self._expire_budget(now)
+        if len(self._background_dispatched) >= self.background_budget:
+            if not self._background_dispatched:
+                return None, None
+            return None, self._background_dispatched[0] + self.budget_window - now
+        self._background_dispatched.append(now)
+        return (BACKGROUND,) + self._pending[BACKGROUND].popleft(), None
+
+    async def _worker(self):
+        while True:
+            job, retry_in = self._next_job()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), retry_in)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            lane, quotex_user_id, future, queued_at = job
+            PARTNER_QUEUE_DEPTH.labels(lane).set(len(self._pending[lane]))
+            if future.cancelled():
+                continue
+            if self.breaker and not self.breaker.allow():
+                future.set_exception(CircuitOpenError("Verification backend unavailable"))
+                continue
+            PARTNER_QUEUE_WAIT.labels(lane).observe(time.perf_counter() - queued_at)
+            PARTNER_QUERIES_TOTAL.labels(lane).inc()
+
+            if lane == BACKGROUND:
+                self._background_running += 1
+            try:
+                result = await asyncio.to_thread(self.service.check_quotex_user, quotex_user_id)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                if self.breaker:
+                    self.breaker.record_failure()
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if self.breaker:
+                    # A reply that says nothing about the ID means the backend did not answer
+                    if result.conclusive:
+                        self.breaker.record_success()
+                    else:
+                        self.breaker.record_failure()
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                if lane == BACKGROUND:
+                    self._background_running -= 1
+                    # A freed background slot may let the next background job run
+                    self._wakeup.set()
@@ -2,164 +2,106 @@
 Real verification service using Telethon to interact with QuotexPartnerBot
 """
 
+import json
 import logging
+import os
 import asyncio
 import threading
 import time
 import subprocess
 import sys
-from typing import Optional
+from typing import List, Optional
 from config import Config
+from response_classifier import ClassifiedReply, UNKNOWN, classify
+from tracing import tracer
 
 logger = logging.getLogger(__name__)
 
-class VerificationService:
-    def __init__(self):
-        self.quotex_bot_username = '@QuotexPartnerBot'
-        self.session_file = 'verification_session'
-        logger.info("Verification service initialized (isolated mode)")
+class TransportError(Exception):
+    """The partner bot could not be queried (connection, authorization or timeout problem)"""
 
-    def verify_quotex_user(self, quotex_user_id: str) -> bool:
-        """
-        Verify if a Quotex user ID was registered through our referral link
-        Uses subprocess to completely isolate the verification process
-        """
-        try:
-            logger.info(f"Verifying user ID: {quotex_user_id}")
 
-            # Create a separate Python script to run verification
-            script_content = f'''
+# Run with `python -c`, so there is no script file for concurrent lookups to
+# share. The Quotex ID and settings come in as argv and the API credentials
+# through the environment: nothing user-supplied becomes source code.
+QUERY_SCRIPT = '''
+import time
+SCRIPT_STARTED = time.time()
+
 import asyncio
+import json
+import os
 import sys
 from telethon import TelegramClient
-from telethon.errors import FloodWaitError
 
-async def verify_user():
-    api_id = {Config.TELEGRAM_API_ID or "None"}
-    api_hash = "{Config.TELEGRAM_API_HASH or ""}"
+# Stage timings reported back to the parent process for latency tracing
+timings = {"script_started": SCRIPT_STARTED}
+
+async def query_partner_bot(quotex_user_id, wait, history_limit):
+    api_id = os.environ.get("TELEGRAM_API_ID")
+    api_hash = os.environ.get("TELEGRAM_API_HASH")
 
     if not api_id or not api_hash:
         print("ERROR: API credentials not configured")
         return False
 
-    client = TelegramClient('verification_session', api_id, api_hash)
+    client = TelegramClient('verification_session', int(api_id), api_hash)
 
     try:
+        stage_start = time.perf_counter()
         await client.connect()
 
         if not await client.is_user_authorized():
             print("ERROR: Not authorized")
             return False
+        timings["telethon_connect"] = time.perf_counter() - stage_start
 
         # Get QuotexPartnerBot
+        stage_start = time.perf_counter()
         quotex_bot = await client.get_entity('@QuotexPartnerBot')
+        timings["partner_bot_lookup"] = time.perf_counter() - stage_start
 
         # Send verification message
-        await client.send_message(quotex_bot, "/{quotex_user_id}")
+        stage_start = time.perf_counter()
+        await client.send_message(quotex_bot, "/" + quotex_user_id)
 
         # Wait for response
-        await asyncio.sleep(3)
+        await asyncio.sleep(wait)
 
         # Get recent messages
-        messages = await client.get_messages(quotex_bot, limit=5)
-
-        for msg in messages:
-            if msg.text and "{quotex_user_id}" in msg.text:
-                response_text = msg.text.lower()
-
-                # Check result - be more specific about the failure cases
-                failure_indicators = ['was not found', 'not found', 'invalid', 'not registered', 'error', 'failed', 'not valid']
-                success_indicators = ['registered', 'verified', 'valid', 'success', 'confirmed', 'deposits sum:', 'deposit sum:']
-
-                # First check for failure indicators (more specific)
-                if any(indicator in response_text for indicator in failure_indicators):
-                    print("FAILED")
-                    return False
-
-                # Check for deposits sum which indicates successful registration
-                if 'deposits sum:' in response_text or 'deposit sum:' in response_text:
-                    print("SUCCESS")
-                    return True
+        messages = await client.get_messages(quotex_bot, limit=history_limit)
+        timings["partner_bot_reply"] = time.perf_counter() - stage_start
 
-                # Then check for other success indicators
-                if any(indicator in response_text for indicator in success_indicators):
-                    print("SUCCESS")
-                    return True
-
-        print("NO_RESPONSE")
-        return False
+        print("REPLIES " + json.dumps([msg.text for msg in messages if msg.text]))
+        return True
 
     except Exception as e:
-        print(f"ERROR: {{e}}")
+        print(f"ERROR: {e}")
         return False
     finally:
+        print("TIMINGS " + json.dumps(timings))
         if client.is_connected():
             await client.disconnect()
 
-if __name__ == "__main__":
-    result = asyncio.run(verify_user())
-    sys.exit(0 if result else 1)
+result = asyncio.run(query_partner_bot(sys.argv[1], float(sys.argv[2]), int(sys.argv[3])))
+sys.exit(0 if result else 1)
 '''
 
-            # Write script to temporary file
-            with open('temp_verify.py', 'w') as f:
-                f.write(script_content)
-
-            # Run verification in subprocess
-            result = subprocess.run([sys.executable, 'temp_verify.py'], 
-                                  capture_output=True, text=True, timeout=30)
-
-            # Clean up temp file
-            try:
-                import os
-                os.remove('temp_verify.py')
-            except:
-                pass
-
-            # Check result
-            if result.returncode == 0:
-                output = result.stdout.strip()
-                if "SUCCESS" in output:
-                    logger.info(f"Verification successful for user ID: {quotex_user_id}")
-                    return True
-                elif "FAILED" in output:
-                    logger.info(f"Verification failed for user ID: {quotex_user_id}")
-                    return False
-                else:
-                    logger.warning(f"No clear verification response for user ID: {quotex_user_id}")
-                    return False
-            else:
-                error_output = result.stderr.strip()
-                logger.error(f"Verification subprocess failed: {error_output}")
-                return False
-
-        except subprocess.TimeoutExpired:
-            logger.error("Verification timeout")
-            return False
-        except Exception as e:
-            logger.error(f"Error during verification: {e}")
-            return False
-
-    def test_connection(self) -> bool:
-        """Test connection to verification service"""
-        try:
-            logger.info("Testing verification connection (isolated mode)")
-
-            # Simple test script
-            script_content = f'''
+CONNECTION_TEST_SCRIPT = '''
 import asyncio
+import os
 import sys
 from telethon import TelegramClient
 
 async def test_connection():
-    api_id = {Config.TELEGRAM_API_ID or "None"}
-    api_hash = "{Config.TELEGRAM_API_HASH or ""}"
+    api_id = os.environ.get("TELEGRAM_API_ID")
+    api_hash = os.environ.get("TELEGRAM_API_HASH")
 
     if not api_id or not api_hash:
         print("ERROR: API credentials not configured")
         return False
 
-    client = TelegramClient('verification_session', api_id, api_hash)
+    client = TelegramClient('verification_session', int(api_id), api_hash)
 
     try:
         await client.connect()
@@ -174,31 +116,84 @@ async def test_connection():
         return True
 
     except Exception as e:
-        print(f"ERROR: {{e}}")
+        print(f"ERROR: {e}")
         return False
     finally:
         if client.is_connected():
             await client.disconnect()
 
-if __name__ == "__main__":
-    result = asyncio.run(test_connection())
-    sys.exit(0 if result else 1)
+result = asyncio.run(test_connection())
+sys.exit(0 if result else 1)
 '''
 
-            # Write script to temporary file
-            with open('temp_test.py', 'w') as f:
-                f.write(script_content)
 
-            # Run test in subprocess
-            result = subprocess.run([sys.executable, 'temp_test.py'], 
-                                  capture_output=True, text=True, timeout=15)
+def _script_env() -> dict:
+    """Environment for the Telethon scripts, with the (possibly reloaded) API credentials"""
+    env = dict(os.environ)
+    env['TELEGRAM_API_ID'] = str(Config.TELEGRAM_API_ID or '')
+    env['TELEGRAM_API_HASH'] = Config.TELEGRAM_API_HASH or ''
+    return env
+
+
+class SubprocessTransport:
+    """
+    Talks to @QuotexPartnerBot from a throwaway Telethon subprocess
+
+    query() sends "/<id>", waits for the bot to answer and returns the texts of
+    the most recent messages in the chat, newest first.
+    """
 
-            # Clean up temp file
+    def __init__(self, wait: float = 3.0, history_limit: int = 5):
+        self.wait = wait
+        self.history_limit = history_limit
+
+    def query(self, quotex_user_id: str) -> List[str]:
+        try:
+            # Run verification in subprocess
+            spawned_at = time.time()
+            with tracer.span('subprocess'):
+                result = subprocess.run(
+                    [sys.executable, '-c', QUERY_SCRIPT, quotex_user_id, str(self.wait), str(self.history_limit)],
+                    capture_output=True, text=True, timeout=Config.VERIFICATION_TIMEOUT, env=_script_env()
+                )
+            self._record_subprocess_timings(result.stdout, spawned_at)
+        except subprocess.TimeoutExpired:
+            raise TransportError("Verification timeout")
+
+        for line in result.stdout.splitlines():
+            if line.startswith('REPLIES '):
+                try:
+                    return json.loads(line[len('REPLIES '):])
+                except ValueError:
+                    raise TransportError(f"Unreadable reply list: {line[:200]}")
+            if line.startswith('ERROR: '):
+                raise TransportError(line[len('ERROR: '):])
+        raise TransportError(f"Verification subprocess failed: {result.stderr.strip()}")
+
+    def _record_subprocess_timings(self, output: str, spawned_at: float):
+        """Feed the stage timings printed by the verification script into the tracer"""
+        for line in output.splitlines():
+            if not line.startswith('TIMINGS '):
+                continue
             try:
-                import os
-                os.remove('temp_test.py')
-            except:
-                pass
+                timings = json.loads(line[len('TIMINGS '):])
+            except ValueError:
+                return
+            script_started = timings.pop('script_started', None)
+            if script_started is not None:
+                tracer.record('subprocess_startup', max(0.0, script_started - spawned_at), spawned_at)
+            for stage, seconds in timings.items():
+                tracer.record(stage, seconds)
+            return
+
+    def test_connection(self) -> bool:
+        """Check that the Telethon session can reach @QuotexPartnerBot"""
+        try:
+            logger.info("Testing verification connection (isolated mode)")
+
+            # Run test in subprocess
+            result = subprocess.run([sys.executable, '-c', CONNECTION_TEST_SCRIPT],
+                                    capture_output=True, text=True, timeout=15, env=_script_env())
 
             # Check result
             if result.returncode == 0 and "SUCCESS" in result.stdout:
@@ -213,4 +208,66 @@ if __name__ == "__main__":
             return False
         except Exception as e:
             logger.error(f"Connection test error: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+class VerificationService:
+    def __init__(self, transport=None):
+        """
+        transport: object with query(quotex_user_id) -> List[str] and
+            test_connection() -> bool; defaults to the one VERIFICATION_TRANSPORT
+            selects (a persistent in-memory-session Telethon client, or the
+            isolated per-check subprocess). Pass a
+            partner_bot_simulator.SimulatorTransport to run offline.
+        """
+        self.quotex_bot_username = '@QuotexPartnerBot'
+        self.session_file = 'verification_session'
+        self.transport = transport or self._default_transport()
+        logger.info(f"Verification service initialized ({type(self.transport).__name__})")
+
+    def verify_quotex_user(self, quotex_user_id: str) -> bool:
+        """
+        Verify if a Quotex user ID was registered through our referral link
+        """
+        return self.check_quotex_user(quotex_user_id).registered
+
+    def check_quotex_user(self, quotex_user_id: str) -> ClassifiedReply:
+        """Ask the partner bot about a Quotex user ID and parse its answer"""
+        logger.info(f"Verifying user ID: {quotex_user_id}")
+        try:
+            replies = self.transport.query(quotex_user_id)
+        except Exception as e:
+            logger.error(f"Error during verification: {e}")
+            return ClassifiedReply(UNKNOWN)
+
+        for text in replies:
+            # Replies about other IDs can be interleaved in the chat
+            if not text or quotex_user_id not in text:
+                continue
+            result = classify(text)
+            if result.conclusive:
+                if result.registered:
+                    logger.info(f"Verification successful for user ID: {quotex_user_id}")
+                else:
+                    logger.info(f"Verification failed for user ID: {quotex_user_id}")
+                return result
+
+        logger.warning(f"No clear verification response for user ID: {quotex_user_id}")
+        return ClassifiedReply(UNKNOWN)
+
+    def test_connection(self) -> bool:
+        """Test connection to verification service"""
+        return self.transport.test_connection()
+
+    def close(self):
+        """Release the transport's connection, if it keeps one"""
+        close = getattr(self.transport, 'close', None)
+        if close:
+            close()
+
+    def _default_transport(self):
+        if Config.VERIFICATION_TRANSPORT == 'subprocess':
+            return SubprocessTransport()
+        # Imported here so Telethon only loads when a live client is needed
+        from telethon_transport import TelethonTransport
+        return TelethonTransport(Config.TELETHON_SESSION, snapshot_interval=Config.SESSION_SNAPSHOT_SECONDS)